@@ -1,10 +1,16 @@
-import chromadb
 import os
+import sys
+from collections import Counter
 
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-CHROMA_DIR = os.path.join(BASE_DIR, "chroma_store")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-client = chromadb.PersistentClient(path=CHROMA_DIR)
-collection = client.get_collection("lecture_embeddings")
+from chroma_client import get_chroma, iter_records
+
+client, collection = get_chroma()
 
 print("Total chunks stored:", collection.count())
+
+# Streams metadata a page at a time instead of loading the whole collection
+per_lecture = Counter(r["metadata"]["title"] for r in iter_records(collection))
+for title, count in sorted(per_lecture.items()):
+    print(f"  {count:>6}  {title}")
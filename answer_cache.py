@@ -0,0 +1,133 @@
+import math
+import os
+import time
+from collections import OrderedDict
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+CACHE_THRESHOLD = float(os.getenv("RAG_CACHE_THRESHOLD", "0.92"))
+CACHE_TTL = float(os.getenv("RAG_CACHE_TTL", "3600"))
+CACHE_SIZE = int(os.getenv("RAG_CACHE_SIZE", "1024"))
+
+
+def _normalize(vector):
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+def _dot(a, b):
+    return sum(x * y for x, y in zip(a, b))
+
+
+# ============================================================
+# SEMANTIC ANSWER CACHE
+# ============================================================
+
+class SemanticAnswerCache:
+    """
+    Reuse answers for near-duplicate questions.
+
+    An entry is served only when the new query retrieved exactly the same
+    chunk set in the same scope and its embedding is within the cosine
+    threshold of the cached query. Entries are grouped by (scope, chunk ids),
+    so a lookup only compares against questions that hit the same chunks.
+    Eviction is LRU by size plus a TTL; entries are dropped when any lecture
+    they were built from is re-indexed or deleted.
+    """
+
+    def __init__(self, threshold=CACHE_THRESHOLD, ttl=CACHE_TTL, max_entries=CACHE_SIZE):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self._entries = OrderedDict()   # entry_id -> entry dict (LRU order)
+        self._by_key = {}               # (scope, chunk ids) -> set(entry_id)
+        self._by_title = {}             # lecture title -> set(entry_id)
+        self._next_id = 0
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _key(scope, chunk_ids):
+        return scope, frozenset(chunk_ids)
+
+    def get(self, query_embedding, scope, chunk_ids):
+        """Return a cached answer or None."""
+        key = self._key(scope, chunk_ids)
+        now = time.monotonic()
+        q = _normalize(query_embedding)
+
+        best_id, best_score = None, self.threshold
+        for entry_id in list(self._by_key.get(key, ())):
+            entry = self._entries[entry_id]
+            if now - entry["created"] > self.ttl:
+                self._remove(entry_id)
+                continue
+            score = _dot(q, entry["embedding"])
+            if score >= best_score:
+                best_id, best_score = entry_id, score
+
+        if best_id is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._entries.move_to_end(best_id)
+        return self._entries[best_id]["answer"]
+
+    def put(self, query_embedding, scope, chunk_ids, titles, answer, created=None):
+        """Cache an answer; `created` (epoch seconds, default now) is when it was generated, for the TTL."""
+        entry_id = self._next_id
+        self._next_id += 1
+
+        key = self._key(scope, chunk_ids)
+        titles = set(titles)
+        self._entries[entry_id] = {
+            "embedding": _normalize(query_embedding),
+            "key": key,
+            "titles": titles,
+            "answer": answer,
+            "created": time.monotonic() - (max(0.0, time.time() - created) if created is not None else 0.0)
+        }
+        self._by_key.setdefault(key, set()).add(entry_id)
+        for title in titles:
+            self._by_title.setdefault(title, set()).add(entry_id)
+
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def invalidate_title(self, title):
+        """Drop every entry built from chunks of this lecture. Returns the count."""
+        entry_ids = list(self._by_title.get(title, ()))
+        for entry_id in entry_ids:
+            self._remove(entry_id)
+        return len(entry_ids)
+
+    def clear(self):
+        self._entries.clear()
+        self._by_key.clear()
+        self._by_title.clear()
+
+    def _remove(self, entry_id):
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+
+        ids = self._by_key.get(entry["key"])
+        if ids is not None:
+            ids.discard(entry_id)
+            if not ids:
+                del self._by_key[entry["key"]]
+
+        for title in entry["titles"]:
+            ids = self._by_title.get(title)
+            if ids is not None:
+                ids.discard(entry_id)
+                if not ids:
+                    del self._by_title[title]
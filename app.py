@@ -8,18 +8,22 @@ sys.stderr.reconfigure(encoding="utf-8")
 import streamlit as st
 import os
 import subprocess
-import json
-import yt_dlp
 import io
-from openai import OpenAI
+import time
+import uuid
+import requests
 from dotenv import load_dotenv
-from chroma_client import get_chroma
+from chroma_client import has_lecture
 from preprocess_json_uploaded import embed_json_file
-from fpdf import FPDF
-from io import BytesIO
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
+from transcripts import delete_transcript
+from section_index import delete_sections, format_ts, load_sections
+from lecture_router import delete_routes
+import rag_client
+from metrics import span, file_bytes
+from pdf_export import render_pdf, summary_hash
+import shared_state
+import youtube_ingest
+from shared_state import QueryHistory, get_collection, lecture_catalog
 
 
 
@@ -36,8 +40,6 @@ os.makedirs(AUDIOS_DIR, exist_ok=True)
 os.makedirs(JSONS_DIR, exist_ok=True)
 
 
-client = OpenAI()
-
 st.set_page_config(page_title="RAG Video Assistant", layout="wide")
 
 
@@ -47,11 +49,15 @@ if "last_ingested" in st.session_state:
     st.success(st.session_state["last_ingested"])
     del st.session_state["last_ingested"]
     
-if "lecture_summary_quick" not in st.session_state:
-    st.session_state["lecture_summary_quick"] = None
-    
-if "lecture_summary_full" not in st.session_state:
-    st.session_state["lecture_summary_full"] = None
+# Summaries live in the process-wide cache (shared_state); a session only
+# remembers which lecture's summary it is showing
+if "summary_title" not in st.session_state:
+    st.session_state["summary_title"] = None
+
+# Identifies this browser session to the RAG service, so a new question
+# cancels the previous answer if it is still being generated
+if "session_id" not in st.session_state:
+    st.session_state["session_id"] = uuid.uuid4().hex
     
 # ============================================================
 # CUSTOM CSS STYLING
@@ -89,121 +95,77 @@ div[data-testid="stToggle"] label {
 """, unsafe_allow_html=True)
 
 
-    
-  
 # ============================================================
-# PDF GENERATION HELPERS
+# WARM-UP (ONCE PER PROCESS)
 # ============================================================
 
+@st.cache_resource(show_spinner=False)
+def warm_up():
+    """
+    Open the shared Chroma handle and lecture catalog, then start the RAG
+    service and wait until its warm-up (index, API connections, popular
+    queries) is done. Not cached if it fails, so the next run retries.
+    """
+    started = time.perf_counter()
+    with span("app_warm_up") as trace:
+        lecture_catalog(get_collection())
+        service = rag_client.wait_ready()
+        trace.update(service_ms=service.get("total_ms"))
+    return {**service, "app_ms": round((time.perf_counter() - started) * 1000)}
+
+
+# The UI renders only once the process is warm
+with st.spinner("⏳ Warming up: loading the lecture index and connecting to the model API..."):
+    try:
+        warmup = warm_up()
+    except Exception as e:
+        st.error(f"❌ The assistant is not ready yet: {e}")
+        if st.button("🔄 Retry"):
+            st.rerun()
+        st.stop()
 
-
-
-def generate_pdf_bytes(title, content):
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4)
-    styles = getSampleStyleSheet()
-    elements = []
-
-    elements.append(Paragraph(f"<b>{title}</b>", styles["Title"]))
-    elements.append(Spacer(1, 12))
-
-    for line in content.split("\n"):
-        elements.append(Paragraph(line, styles["Normal"]))
-        elements.append(Spacer(1, 8))
-
-    doc.build(elements)
-    buffer.seek(0)
-    return buffer
-
+st.sidebar.caption(f"⚡ Ready · warmed up in {warmup['app_ms'] / 1000:.1f}s"
+                   + (f" ({warmup['error']})" if warmup.get("error") else ""))
 
 
 # ============================================================
 # SUMMARIZATION HELPERS
 # ============================================================
 
-def summarize_lecture_both(title):
-    collection = st.session_state["collection"]
-
-    # Fetch all chunks of this lecture
-    results = collection.get(
-        where={"title": title},
-        include=["documents", "metadatas"]
-    )
-
-    # Sort by chunk number (correct lecture order)
-    chunks = sorted(
-        zip(results["documents"], results["metadatas"]),
-        key=lambda x: x[1]["number"]
-    )
-
-    full_text = "\n".join([c[0] for c in chunks])
-
-    # -------- Quick Summary Prompt --------
-    quick_prompt = f"""
-    You are a senior university professor preparing executive revision notes.
-
-    Task:
-    Create a **1–2 minute executive summary** of the lecture for fast revision.
-
-    Output Requirements:
-    - 120–180 words (strict)
-    - Make sure of this : Bullet points only (no paragraphs)
-    - Capture only the most important concepts, principles, and conclusions
-    - No derivations, no examples, no storytelling
-    - Use precise academic terminology
-    - Each bullet must be a complete, standalone idea
-    - No repetition
-    - No information not present in the transcript
-
-    Style:
-    - Concise
-    - Exam-focused
-    - Clear hierarchy of ideas
-    - Professional academic tone
-
-    Lecture Transcript:
-    {full_text}
+def stream_summaries(title, quick_slot, detailed_slot):
     """
-
-    # -------- Detailed Notes Prompt --------
-    full_prompt = f"""
-    You are a senior AI Teaching Assistant preparing complete, exam-ready lecture notes.
-
-    Task:
-    Transform the following lecture transcript into **fully structured study material** suitable for university revision.
-
-    Required Structure (use Markdown headings):
-
-    1. **Lecture Title**
-    2. **Executive Overview**  
-    - 5–8 bullet points summarizing the full lecture
-    3. **Key Concepts Explained**  
-    - Each major concept with concise technical explanation
-    4. **Step-by-Step Topic Flow**  
-    - Ordered progression of ideas as taught in the lecture
-    5. **Important Definitions**  
-    - Clear, formal definitions of all core terms
-    6. **Illustrative Examples** (only if present in transcript)  
-    7. **Final 10-Line Revision Notes**  
-    - Ultra-condensed exam-oriented takeaways
-
-    Strict Rules:
-    - Use only information present in the transcript
-    - No hallucinations, no external knowledge
-    - Academic, precise, and technical tone
-    - Markdown formatting with clear section headers
-    - Bullet points and numbered lists where appropriate
-    - No verbosity, no storytelling, no filler
-    - Each section must be logically coherent and complete
-
-    Lecture Transcript:
-    {full_text}
+    Quick + detailed summaries, generated concurrently by the RAG service
+    once and shared by all sessions. The quick summary is shown as soon as
+    it is ready while the detailed notes stream in below it. Returns the
+    pair, or None if the generation was cancelled. Raises RuntimeError
+    if the service reports an error, requests errors if it is unreachable.
     """
-    
-    quick_summary = inference(quick_prompt)
-    full_summary = inference(full_prompt)
-
-    return quick_summary, full_summary
+    summaries = shared_state.summaries.get(title)
+    if summaries is not None:
+        return summaries
+
+    session = st.session_state["session_id"]
+    full = ""
+    try:
+        for event in rag_client.summarize_stream(title, session):
+            if event["type"] == "quick":
+                quick_slot.markdown("**⚡ Quick Summary**\n\n" + event["text"])
+            elif event["type"] == "delta":
+                full += event["text"]
+                detailed_slot.markdown("**📚 Detailed Notes**\n\n" + full)
+            elif event["type"] == "done":
+                summaries = event["quick"], event["full"]
+                shared_state.summaries.put(title, summaries)
+            elif event["type"] == "error":
+                raise RuntimeError(event["message"])
+    finally:
+        # Picking another lecture interrupts this run (at the next render); stop the generation too
+        if summaries is None:
+            try:
+                rag_client.cancel(session, "summary")
+            except requests.RequestException:
+                pass    # keep the original error; the stream is gone either way
+    return summaries
 
 
     
@@ -213,8 +175,14 @@ def summarize_lecture_both(title):
 # ============================================================
 
 def delete_lecture(title):
-    # 1. Delete from ChromaDB
+    # 1. Delete from ChromaDB (and any answers cached from it)
     collection.delete(where={"title": title})
+    delete_transcript(title)
+    delete_sections(title)
+    delete_routes(title)
+    youtube_ingest.forget_source(title)
+    rag_client.invalidate(title)
+    shared_state.invalidate_lecture(title)
 
     # 2. Delete media files
     video_path = os.path.join(VIDEOS_DIR, title + ".mp4")
@@ -239,6 +207,8 @@ def reindex_lecture(title):
 
     # Re-embed
     count = embed_json_file(json_path)
+    rag_client.invalidate(title)
+    shared_state.invalidate_lecture(title)
     st.success(f"🔄 Re-indexed {title} ({count} chunks)")
 
 
@@ -248,52 +218,48 @@ def reindex_lecture(title):
 # ============================================================
 
 
-if "collection" not in st.session_state:
-    _, st.session_state["collection"] = get_chroma()
-
-collection = st.session_state["collection"]
+# One handle per process, not per session
+collection = get_collection()
 
 
 
 
 
 # ============================================================
-# EMBEDDING & LLM INFERENCE
+# YOUTUBE IMPORT (VIDEOS, PLAYLISTS, CHANNELS)
 # ============================================================
 
-def create_embedding(text_lists):
-    """Create vector embeddings for text using OpenAI."""
-    response = client.embeddings.create(
-        model="text-embedding-3-large",
-        input=text_lists
-    )
-    return [item.embedding for item in response.data]
-
-
-def inference(prompt):
-    """Generate answer from LLM using retrieved context."""
-    response = client.responses.create(
-        model="gpt-5",
-        input=prompt
-    )
-    return response.output_text
-
-# ============================================================
-# DOWNLOADING YOUTUBE VIDEO
-# ============================================================
-
-def download_youtube_video(url):
-    ydl_opts = {
-        "format": "bestvideo+bestaudio/best",
-        "outtmpl": os.path.join(VIDEOS_DIR, "%(id)s.%(ext)s"),
-        "merge_output_format": "mp4",
-        "quiet": True
-    }
-
-    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-        info = ydl.extract_info(url, download=True)
-        video_id = info["id"]
-        return os.path.join(VIDEOS_DIR, f"{video_id}.mp4")
+def import_youtube(urls):
+    """
+    Audio-only, parallel import (see youtube_ingest.py). Each item is
+    transcribed and indexed as soon as its download lands; progress is
+    written to the status box as events arrive.
+    """
+    indexed, failed = [], []
+    with span("import_youtube", items=len(urls)) as trace:
+        with st.status("📡 Listing videos...", expanded=True) as status:
+            for event in youtube_ingest.ingest(urls, skip=lambda title: has_lecture(collection, title)):
+                if event["type"] == "listed":
+                    total = event["count"]
+                    status.update(label=f"⬇️ Importing {total} video(s)...")
+                elif event["type"] == "downloaded":
+                    st.write(f"⬇️ Downloaded **{event['title']}**, transcribing...")
+                elif event["type"] == "skipped":
+                    st.write(f"⏭️ **{event['title']}** is already in the knowledge base")
+                elif event["type"] == "indexed":
+                    indexed.append(event["title"])
+                    st.write(f"✅ Indexed **{event['title']}** ({event['chunks']} chunks)")
+                    status.update(label=f"🧠 Indexed {len(indexed)} of {total} video(s)...")
+                else:
+                    failed.append(event)
+                    st.write(f"❌ {event['title'] or event['url']}: {event['stage']} failed")
+
+            status.update(
+                label=f"Imported {len(indexed)} video(s)" + (f", {len(failed)} failed" if failed else "") + " ✅",
+                state="error" if failed and not indexed else "complete"
+            )
+        trace.update(indexed=len(indexed), errors=len(failed))
+    return indexed, failed
 
 
 
@@ -309,41 +275,51 @@ def process_video(video_path):
 
     title = os.path.splitext(os.path.basename(video_path))[0]
 
-    # ---------- Step 1: Extract Audio ----------
-    with st.status("🎧 Extracting audio from video...") as audio_status:
-        try:
-            audio_path = subprocess.check_output(
-                [sys.executable, "video_to_audio.py", video_path],
-                text=True
-            ).strip()
-        except subprocess.CalledProcessError as e:
-            audio_status.update(label="❌ Audio extraction failed", state="error")
-            st.code(e.output)
-            return
-
-    audio_status.update(label="Audio extracted successfully ✅", state="complete")
-
-    # ---------- Step 2: Whisper Transcription ----------
-    with st.status("⏳ Extracting Text & Timestamp from Audio...\n\nNote: Takes time for long videos") as whisper_status:
-        result = subprocess.run(
-            [sys.executable, "audio_to_json_uploaded.py", os.path.basename(audio_path)],
-            capture_output=True,
-            text=True
-        )
+    with span("process_video", bytes=file_bytes(video_path)) as trace:
 
-    if result.returncode != 0:
-        whisper_status.update(label="❌ Transcription failed", state="error")
-        st.code(result.stderr)
-        return
+        # ---------- Step 1: Extract Audio ----------
+        with st.status("🎧 Extracting audio from video...") as audio_status:
+            try:
+                with span("ffmpeg", bytes=file_bytes(video_path)):
+                    audio_path = subprocess.check_output(
+                        [sys.executable, "video_to_audio.py", video_path],
+                        text=True
+                    ).strip()
+            except subprocess.CalledProcessError as e:
+                audio_status.update(label="❌ Audio extraction failed", state="error")
+                st.code(e.output)
+                trace["status"] = "error"
+                return
+
+        audio_status.update(label="Audio extracted successfully ✅", state="complete")
+
+        # ---------- Step 2: Whisper Transcription ----------
+        with st.status("⏳ Extracting Text & Timestamp from Audio...\n\nNote: Takes time for long videos") as whisper_status:
+            with span("whisper", bytes=file_bytes(audio_path)) as whisper_trace:
+                result = subprocess.run(
+                    [sys.executable, "audio_to_json_uploaded.py", os.path.basename(audio_path)],
+                    capture_output=True,
+                    text=True
+                )
+                if result.returncode != 0:
+                    whisper_trace["status"] = "error"
+
+        if result.returncode != 0:
+            whisper_status.update(label="❌ Transcription failed", state="error")
+            st.code(result.stderr)
+            trace["status"] = "error"
+            return
 
-    whisper_status.update(label="JSON created with timestamps ✅", state="complete")
-    json_path = result.stdout.strip()
+        whisper_status.update(label="JSON created with timestamps ✅", state="complete")
+        json_path = result.stdout.strip()
 
-    # ---------- Step 3: Embedding Generation ----------
-    with st.status("🧠 Creating embeddings for semantic search...") as embed_status:
-        count = embed_json_file(json_path)
-        embed_status.update(label=f"Embeddings stored in vector DB ({count} chunks) ✅", state="complete")
+        # ---------- Step 3: Embedding Generation ----------
+        with st.status("🧠 Creating embeddings for semantic search...") as embed_status:
+            count = embed_json_file(json_path)
+            shared_state.invalidate_lecture(title)
+            embed_status.update(label=f"Embeddings stored in vector DB ({count} chunks) ✅", state="complete")
 
+        trace["items"] = count
 
 
     #st.cache_resource.clear()
@@ -364,24 +340,32 @@ def process_audio(audio_path):
     Audio → Whisper → JSON → Embeddings
     """
     title = os.path.splitext(os.path.basename(audio_path))[0]
-    with st.status("⏳ Extracting Text & Timestamp from Audio...") as status:
-        result = subprocess.run(
-            [sys.executable, "audio_to_json_uploaded.py", os.path.basename(audio_path)],
-            capture_output=True,
-            text=True
-        )
+    with span("process_audio", bytes=file_bytes(audio_path)) as trace:
+        with st.status("⏳ Extracting Text & Timestamp from Audio...") as status:
+            with span("whisper", bytes=file_bytes(audio_path)) as whisper_trace:
+                result = subprocess.run(
+                    [sys.executable, "audio_to_json_uploaded.py", os.path.basename(audio_path)],
+                    capture_output=True,
+                    text=True
+                )
+                if result.returncode != 0:
+                    whisper_trace["status"] = "error"
+
+        if result.returncode != 0:
+            status.update(label="❌ Transcription failed", state="error")
+            st.code(result.stderr)
+            trace["status"] = "error"
+            return
 
-    if result.returncode != 0:
-        status.update(label="❌ Transcription failed", state="error")
-        st.code(result.stderr)
-        return
+        status.update(label="JSON created ✅", state="complete")
+        json_path = result.stdout.strip()
 
-    status.update(label="JSON created ✅", state="complete")
-    json_path = result.stdout.strip()
+        with st.status("🧠 Creating embeddings for semantic search...") as embed_status:
+            count = embed_json_file(json_path)
+            shared_state.invalidate_lecture(title)
+            embed_status.update(label=f"Embeddings stored in vector DB ({count} chunks) ✅", state="complete")
 
-    with st.status("🧠 Creating embeddings for semantic search...") as embed_status:
-        count = embed_json_file(json_path)
-        embed_status.update(label=f"Embeddings stored in vector DB ({count} chunks) ✅", state="complete")
+        trace["items"] = count
 
     
     # Persist success across rerun
@@ -413,7 +397,7 @@ def get_video_catalog():
 # ============================================================
 
 if "question_history" not in st.session_state:
-    st.session_state.question_history = []
+    st.session_state.question_history = QueryHistory()
 
 
 
@@ -572,34 +556,27 @@ with st.sidebar:
     ">
         <h3 style="margin-bottom:6px;">📺 Import Lecture from YouTube</h3>
         <p style="color:#e0e7ff;font-size:14px;">
-            Paste a YouTube lecture link to automatically download, transcribe, and index it into the AI knowledge base.
+            Paste YouTube lecture, playlist or channel links (one per line) to automatically download, transcribe, and index them into the AI knowledge base.
         </p>
     </div>
     """, unsafe_allow_html=True)
 
-    youtube_url = st.text_input("🔗 Enter YouTube Video URL", placeholder="https://www.youtube.com/watch?v=...",label_visibility="collapsed")
-
-    if st.button("⬇️ Download & Process Lecture", use_container_width=True):
-        if youtube_url.strip():
-            try:
-                with st.status("📡 Fetching video from YouTube servers...", expanded=True) as yt_status:
-                    video_path = download_youtube_video(youtube_url)
-                    yt_status.update(label="📁 Video successfully downloaded and stored", state="complete")
-
-                st.success("🎉 Video Imported Successfully!")
-
-                st.markdown(f"""
-                <div style="padding:12px;border-radius:10px;background:#0e1117;border-left:4px solid #22c55e;">
-                    <b>Saved File:</b><br>
-                    <code>{os.path.basename(video_path)}</code>
-                </div>
-                """, unsafe_allow_html=True)
+    youtube_urls = st.text_area(
+        "🔗 YouTube URLs",
+        placeholder="https://www.youtube.com/watch?v=...\nhttps://www.youtube.com/playlist?list=...\nhttps://www.youtube.com/@channel",
+        help="One video, playlist or channel URL per line",
+        label_visibility="collapsed"
+    )
 
-                with st.status("🧠 Running transcription, chunking & vector indexing...", expanded=True):
-                    process_video(video_path)
+    if st.button("⬇️ Download & Process Lectures", use_container_width=True):
+        urls = [u.strip() for u in youtube_urls.splitlines() if u.strip()]
+        if urls:
+            indexed, failed = import_youtube(urls)
+            if indexed:
+                st.success(f"🎉 Imported {len(indexed)} lecture(s)! Video for playback can be fetched from the sidebar.")
 
-            except Exception as e:
-                st.error("❌ Unable to download this YouTube video automatically.")
+            if failed:
+                st.error("❌ Some videos could not be downloaded or processed automatically.")
                 st.caption("This may be due to regional restrictions, DRM protection, or network issues.")
 
                 st.markdown("""
@@ -614,7 +591,8 @@ with st.sidebar:
                 """, unsafe_allow_html=True)
 
                 with st.expander("🔧 Technical Error Details"):
-                    st.code(str(e))
+                    for event in failed:
+                        st.code(f"[{event['stage']}] {event['title'] or event['url']}\n{event['message']}")
     st.divider()
 
     st.markdown("""
@@ -651,8 +629,7 @@ with st.sidebar:
 
         title = os.path.splitext(uploaded_video.name)[0]
 
-        existing = collection.get(where={"title": title})
-        if existing and len(existing.get("ids", [])) > 0:
+        if has_lecture(collection, title):
             st.error(f"⚠️ Lecture '{title}' already exists in the knowledge base.")
             st.stop()
 
@@ -689,8 +666,7 @@ with st.sidebar:
         title = os.path.splitext(uploaded_audio.name)[0]
 
         # Check duplicate BEFORE saving
-        existing = collection.get(where={"title": title})
-        if existing and len(existing.get("ids", [])) > 0:
+        if has_lecture(collection, title):
             st.error(f"⚠️ Lecture '{title}' already exists in the knowledge base.")
             st.stop()
 
@@ -733,8 +709,7 @@ with st.sidebar:
 
     # Load embedded titles (source of truth)
     
-    all_meta = collection.get(include=["metadatas"])
-    embedded_titles = sorted(set(m["title"] for m in all_meta["metadatas"]))
+    embedded_titles = lecture_catalog(collection)
 
     
     video_files = os.listdir(VIDEOS_DIR)
@@ -764,6 +739,13 @@ with st.sidebar:
     if st.session_state.get("reset_topic"):
         st.session_state["selected_topic"] = "All Lectures"
         st.session_state["reset_topic"] = False
+
+    # Handle "search only this lecture" from a routing suggestion
+    if st.session_state.get("scope_to"):
+        scope = st.session_state.pop("scope_to")
+        st.session_state["selected_topic"] = next(
+            (display for display, title in display_map.items() if title == scope), "All Lectures"
+        )
     
     selected_display = st.selectbox(
         "📚 Select Lecture for Scoped Search",
@@ -780,6 +762,19 @@ with st.sidebar:
     if "delete_msg" in st.session_state:
         st.success(st.session_state["delete_msg"])
         del st.session_state["delete_msg"]
+
+#--------------------- Lecture Sections ---------------------#
+
+    if selected_topic != "All Lectures":
+        sections = load_sections(selected_topic)
+        if sections:
+            with st.expander(f"🧭 Sections ({len(sections)})"):
+                for section in sections:
+                    st.markdown(
+                        f"**{format_ts(section['start'])}–{format_ts(section['end'])}** · {section['title']}  \n"
+                        f"<span style='font-size:12px;color:#94a3b8;'>{section['preview']}</span>",
+                        unsafe_allow_html=True
+                    )
         
         
 #--------------------- Delete & Re-index Lecture ---------------------#
@@ -852,6 +847,17 @@ with st.sidebar:
             if st.button("🔄 Re-index Lecture", use_container_width=True):
                 reindex_lecture(selected_topic)
 
+            # YouTube imports are audio-only; the video is downloaded only if wanted for playback
+            has_video = os.path.exists(os.path.join(VIDEOS_DIR, selected_topic + ".mp4"))
+            if not has_video and selected_topic in youtube_ingest.load_sources():
+                if st.button("🎥 Fetch Video for Playback", use_container_width=True):
+                    with st.spinner("Downloading video..."):
+                        try:
+                            youtube_ingest.fetch_video(selected_topic)
+                            st.success("🎥 Video ready for playback")
+                        except Exception as e:
+                            st.error(f"❌ Could not fetch the video: {e}")
+
 
 
 # ============================================================
@@ -916,18 +922,30 @@ if selected_topic != "All Lectures":
 
     col_left, col_mid, col_right = st.columns([3,2,3])
     with col_mid:
-        if st.button("🧠 Generate Summary", key="summary_btn", use_container_width=False):
-            with st.status("📚 Summarizing..."):
-                quick_summary, full_summary = summarize_lecture_both(selected_topic)
-
-                st.session_state["lecture_summary_quick"] = quick_summary
-                st.session_state["lecture_summary_full"] = full_summary
+        generate_summary = st.button("🧠 Generate Summary", key="summary_btn", use_container_width=False)
 
-    # ---- Check if summary exists ----
+    if generate_summary:
+        with st.status("📚 Summarizing...", expanded=True) as summary_status:
+            quick_slot = st.empty()
+            detailed_slot = st.empty()
+            try:
+                summaries = stream_summaries(selected_topic, quick_slot, detailed_slot)
+            except (RuntimeError, requests.RequestException) as e:
+                st.error(f"❌ Summary failed: {e}")
+                summary_status.update(label="Summary failed", state="error")
+            else:
+                if summaries:
+                    st.session_state["summary_title"] = selected_topic
+                    summary_status.update(label="Summary ready ✅", state="complete", expanded=False)
+                else:
+                    summary_status.update(label="Summary cancelled", state="error")
+
+    # ---- Check if summary exists (it may have been evicted or invalidated) ----
+    summary_quick, summary_full = shared_state.summaries.get(st.session_state["summary_title"], (None, None))
     has_summary = (
-        isinstance(st.session_state.get("lecture_summary_quick"), str)
-        and isinstance(st.session_state.get("lecture_summary_full"), str)
-        and st.session_state["lecture_summary_quick"].strip() != ""
+        isinstance(summary_quick, str)
+        and isinstance(summary_full, str)
+        and summary_quick.strip() != ""
     )
     
     if has_summary:
@@ -940,7 +958,7 @@ if selected_topic != "All Lectures":
     else:
         show_summary = False
 
-    if show_summary and st.session_state["lecture_summary_quick"] and st.session_state["lecture_summary_full"]:
+    if show_summary and summary_quick and summary_full:
 
         st.markdown("""
         <style>
@@ -994,7 +1012,7 @@ if selected_topic != "All Lectures":
             </div>
             """, unsafe_allow_html=True)
             
-            st.markdown(st.session_state["lecture_summary_quick"])
+            st.markdown(summary_quick)
 
         else:
             st.markdown("""
@@ -1010,36 +1028,33 @@ if selected_topic != "All Lectures":
             </div>
             """, unsafe_allow_html=True)
             
-            st.markdown(st.session_state["lecture_summary_full"])
+            st.markdown(summary_full)
 
         
         st.markdown("<div style='height:14px;'></div>", unsafe_allow_html=True)
 
 
         if view_mode == "⚡ Quick Summary (1–2 mins read)":
-            quick_pdf = generate_pdf_bytes(
-                f"{selected_topic} – Quick Summary",
-                st.session_state["lecture_summary_quick"]
-            )
-            st.download_button(
-                "⬇️ Download Quick Summary PDF",
-                data=quick_pdf,
-                file_name=f"{selected_topic}_quick_summary.pdf",
-                mime="application/pdf",
-                use_container_width=True
-            )
+            pdf_label, pdf_text, pdf_suffix = "Quick Summary", summary_quick, "quick_summary"
         else:
-            full_pdf = generate_pdf_bytes(
-                f"{selected_topic} – Detailed Notes",
-                st.session_state["lecture_summary_full"]
-            )
+            pdf_label, pdf_text, pdf_suffix = "Detailed Notes", summary_full, "detailed_notes"
+
+        # Rendered only once asked for, then memoized by summary hash (see pdf_export.py),
+        # so reruns and view toggles never rebuild it
+        pdf_title = f"{selected_topic} – {pdf_label}"
+        pdf_id = summary_hash(pdf_title, pdf_text)
+        # Only the PDF last asked for is remembered, so the session stays small
+        if st.session_state.get("pdf_requested") == pdf_id:
             st.download_button(
-                "⬇️ Download Detailed Notes PDF",
-                data=full_pdf,
-                file_name=f"{selected_topic}_detailed_notes.pdf",
+                f"⬇️ Download {pdf_label} PDF",
+                data=render_pdf(pdf_title, pdf_text),
+                file_name=f"{selected_topic}_{pdf_suffix}.pdf",
                 mime="application/pdf",
                 use_container_width=True
             )
+        elif st.button(f"📄 Prepare {pdf_label} PDF", use_container_width=True):
+            st.session_state.pdf_requested = pdf_id
+            st.rerun()
 
 
 
@@ -1116,7 +1131,7 @@ if st.session_state.question_history:
     st.markdown("#### 🕘 Query History")
     selected_prev = st.selectbox(
         "Reuse a previous query",
-        ["Select a question"] + st.session_state.question_history,
+        ["Select a question"] + list(st.session_state.question_history),
         label_visibility="collapsed"
     )
 else:
@@ -1139,10 +1154,8 @@ with col1:
 
 # ---- Processing Pipeline ----
 if ask_btn and query.strip():
-    if query not in st.session_state.question_history:
-        st.session_state.question_history.insert(0, query)
-        
-    collection = st.session_state["collection"]
+    st.session_state.question_history.add(query)
+
     if collection.count() == 0:
         st.info("📭 No lectures indexed yet. Upload a video or audio to begin.")
         st.stop()
@@ -1150,79 +1163,38 @@ if ask_btn and query.strip():
 
     with st.status("🧠 Performing vector similarity search across transcript embeddings using ChromaDB...") as search_status:
 
-        collection = st.session_state["collection"]  # 🔴 force fresh handle
-        
-        # Encode query
-        q_emb = create_embedding([query])[0]
-
-        # Vector search (scoped or global)
-        if selected_topic == "All Lectures":
-            results = collection.query(
-                query_embeddings=[q_emb],
-                n_results=5
-            )
-        else:
-            results = collection.query(
-                query_embeddings=[q_emb],
-                n_results=5,
-                where={"title": selected_topic}
-            )
+        # Embed + vector search (scoped or global) run in the RAG service;
+        # the first streamed event carries the retrieved chunks
+        events = rag_client.answer_stream(query, selected_topic, st.session_state["session_id"])
+        first_event = next(events)
 
-        if not results["documents"] or not results["documents"][0]:
-            st.warning("No chunks found. Try another query.")
+        if first_event["type"] == "cancelled":
             st.stop()
 
-        # Build chunks list
-        top_chunks = []
-        for meta, text in zip(results["metadatas"][0], results["documents"][0]):
-            top_chunks.append({
-                "title": meta["title"],
-                "number": meta["number"],
-                "start": meta["start"],
-                "end": meta["end"],
-                "text": text
-            })
+        if first_event["type"] == "error":
+            search_status.update(label="❌ Search failed", state="error")
+            st.code(first_event["message"])
+            st.stop()
+
+        top_chunks = first_event["chunks"]
+        if not top_chunks:
+            st.warning("No chunks found. Try another query.")
+            st.stop()
 
         best_chunk = top_chunks[0]
         search_status.update(label="Top relevant transcript segments retrieved 🔎", state="complete")
 
-    # ---- LLM Prompt ----
-    with st.status("🤖 Generating context-grounded answer using LLM (gpt-5 model) reasoning...") as llm_status:
-
-        prompt = f"""
-        You are an expert AI Teaching Assistant specialized in explaining lecture videos with timestamp grounding.
-
-        Context (most relevant transcript segments):
-        {json.dumps(top_chunks, indent=2)}
-
-        User Question:
-        {query}
-
-        Task:
-        Generate a factually grounded answer strictly based on the provided transcript segments.
-
-        Response Requirements:
-        1. Clearly identify the exact concept or topic being asked.
-        2. Mention the lecture title(s) where the answer is found.
-        3. Provide the precise timestamp range(s) for each explanation.
-        4. Explain the concept concisely but technically (no oversimplification, no fluff).
-        5. Use well-structured bullet points with sub-bullets where helpful.
-        6. Output in clean Markdown format.
-        7. English only.
-        8. Each bullet should be on its own line (no inline merging).
-        9. Do not hallucinate or add information not present in the transcript.
-        10. If the answer is partially present, explicitly state what is missing.
-
-        Formatting:
-        - Use **bold** for key terms.
-        - Use `code` formatting for formulas, algorithms, or variables.
-        - Keep each point short, precise, and exam-ready.
-
-        """
+    # ---- Lecture routing suggestion ("All Lectures" only) ----
+    routes = first_event.get("routes") or []
+    if routes and selected_topic == "All Lectures":
+        st.caption("🧭 Closest lectures: " + " · ".join(f"{r['title']} ({r['score']:.2f})" for r in routes))
+        st.button(
+            f"🔎 Search only in {routes[0]['title']}",
+            on_click=lambda title=routes[0]["title"]: st.session_state.update(scope_to=title)
+        )
 
-        answer = inference(prompt)
-        
-        llm_status.update(label="Answer generated with timestamp grounding ✅", state="complete")
+    # ---- LLM Answer (streamed) ----
+    llm_status = st.status("🤖 Generating context-grounded answer using LLM (gpt-5 model) reasoning...")
 
     # ============================================================
     # RESULT DISPLAY
@@ -1232,7 +1204,22 @@ if ask_btn and query.strip():
     st.success(query)
 
     st.markdown("## 🤖 AI Assistant Response")
-    st.info(answer)
+    answer_box = st.empty()
+    answer = ""
+
+    for event in events:
+        if event["type"] == "delta":
+            answer += event["text"]
+            answer_box.info(answer)
+        elif event["type"] == "error":
+            llm_status.update(label="❌ Answer generation failed", state="error")
+            st.code(event["message"])
+            st.stop()
+        elif event["type"] == "cancelled":
+            llm_status.update(label="Superseded by a newer question", state="error")
+            st.stop()
+
+    llm_status.update(label="Answer generated with timestamp grounding ✅", state="complete")
 
     st.markdown("""
     <div style="padding:16px;
@@ -1,7 +1,6 @@
 import sys
 import os
 import json
-from openai import OpenAI
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -14,39 +13,57 @@ JSONS_DIR  = os.path.join(BASE_DATA_DIR, "jsons")
 os.makedirs(AUDIOS_DIR, exist_ok=True)
 os.makedirs(JSONS_DIR, exist_ok=True)
 
-# ---------- OpenAI client ----------
-client = OpenAI()
-
-# ---------- Inputs ----------
-audio_file = sys.argv[1]
-audio_path = os.path.join(AUDIOS_DIR, audio_file)
-title = os.path.splitext(audio_file)[0]
-
-try:
-    with open(audio_path, "rb") as f:
-        transcript = client.audio.translations.create(
-            file=f,
-            model="whisper-1",
-            response_format="verbose_json",
-        )
-
-    chunks = []
-    for seg in transcript.segments:
-        chunks.append({
-            "number": title.split("_")[0] if title.split("_")[0].isdigit() else "NA",
-            "title": title,
-            "start": seg.start,
-            "end": seg.end,
-            "text": seg.text
-        })
-
-    json_path = os.path.join(JSONS_DIR, f"{title}.json")
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump({"chunks": chunks}, f, ensure_ascii=False, indent=2)
-
-    # IMPORTANT: print full path so app.py receives the correct file
-    print(json_path)
-
-except Exception as e:
-    print("OPENAI_ERROR:", str(e))
-    sys.exit(1)
+# ---------- Transcription backend ----------
+# "openai" (whisper-1 API, default) or "local" (faster-whisper on CPU, see local_transcribe.py)
+TRANSCRIBE_BACKEND = os.getenv("RAG_TRANSCRIBE_BACKEND", "openai")
+
+
+def transcribe_openai(audio_path):
+    # Shares the OpenAI rate limits with ingest embeddings and searches (see request_scheduler.py)
+    from providers import OpenAIBackend
+    return OpenAIBackend().transcribe(audio_path)
+
+
+def transcribe_local(audio_path):
+    from local_transcribe import transcribe_file
+    return transcribe_file(audio_path)
+
+
+def build_chunks(title, segments):
+    """Same chunk layout for every backend, so embedding and playback are unchanged."""
+    number = title.split("_")[0] if title.split("_")[0].isdigit() else "NA"
+    return [
+        {"number": number, "title": title, "start": start, "end": end, "text": text}
+        for start, end, text in segments
+    ]
+
+
+def main():
+    # ---------- Inputs ----------
+    audio_file = sys.argv[1]
+    audio_path = os.path.join(AUDIOS_DIR, audio_file)
+    title = os.path.splitext(audio_file)[0]
+
+    try:
+        if TRANSCRIBE_BACKEND == "local":
+            segments = transcribe_local(audio_path)
+        else:
+            segments = transcribe_openai(audio_path)
+
+        chunks = build_chunks(title, segments)
+
+        json_path = os.path.join(JSONS_DIR, f"{title}.json")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump({"chunks": chunks}, f, ensure_ascii=False, separators=(",", ":"))
+
+        # IMPORTANT: print full path so app.py receives the correct file
+        print(json_path)
+
+    except Exception as e:
+        print(f"{TRANSCRIBE_BACKEND.upper()}_ERROR:", str(e))
+        sys.exit(1)
+
+
+# Guarded: the local backend's worker processes re-import this module
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Embedding throughput / latency: local ONNX engine vs the API backends.
+
+Two workloads per backend, after a warm-up call that loads models and
+opens connections:
+
+  ingest   one embed() over every bundled chunk (embed_json_file's path)
+  queries  --concurrency threads each embedding single questions
+           (create_embedding's path), so the dynamic batcher is exercised
+
+The API backends run against the fake endpoints unless --real-api is given.
+
+    python -m benchmarks.embedding_benchmark
+    python -m benchmarks.embedding_benchmark --backends local --concurrency 32 --queries 40
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import fake_openai
+from benchmarks.retrieval_benchmark import CORPUS_DIR, load_questions
+from metrics import percentile
+from preprocess_json_uploaded import load_chunks
+from providers import create_backend
+
+
+def load_documents(corpus_dir=CORPUS_DIR):
+    documents = []
+    for name in sorted(os.listdir(corpus_dir)):
+        if name.endswith(".json"):
+            documents.extend(c["text"] for c in load_chunks(os.path.join(corpus_dir, name)))
+    return documents
+
+
+def use_fake_api(embed_latency_ms):
+    config = fake_openai.FakeOpenAIConfig(embed_latency_ms=embed_latency_ms)
+    base_url = fake_openai.start_in_thread(config)
+    os.environ["OPENAI_BASE_URL"] = base_url + "/v1"
+    os.environ["OPENAI_API_KEY"] = "fake-embedding-benchmark"
+    os.environ["OLLAMA_URL"] = base_url
+
+
+def run_backend(name, documents, questions, args):
+    start = time.perf_counter()
+    backend = create_backend(name)
+    backend.embed(["warm-up"])
+    warmup_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    backend.embed(documents)
+    ingest_s = time.perf_counter() - start
+
+    latencies = []
+
+    def session(i):
+        for j in range(args.queries):
+            query = questions[(i + j) % len(questions)]["question"]
+            t0 = time.perf_counter()
+            backend.embed([query])
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(session, range(args.concurrency)))
+    query_s = time.perf_counter() - start
+
+    return {
+        "model": backend.embed_model,
+        "warmup_ms": warmup_ms,
+        "ingest_texts_per_s": len(documents) / ingest_s,
+        "query_req_per_s": len(latencies) / query_s,
+        "query_p50_ms": percentile(latencies, 50),
+        "query_p95_ms": percentile(latencies, 95)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local vs API embedding throughput and latency.")
+    parser.add_argument("--backends", nargs="+", default=["local", "openai"])
+    parser.add_argument("--concurrency", type=int, default=16, help="Threads embedding queries at once")
+    parser.add_argument("--queries", type=int, default=20, help="Queries per thread")
+    parser.add_argument("--embed-latency-ms", type=float, default=120.0, help="Fake API latency per request")
+    parser.add_argument("--real-api", action="store_true", help="Call the configured APIs instead of the fakes")
+    args = parser.parse_args()
+
+    if not args.real_api:
+        use_fake_api(args.embed_latency_ms)
+
+    documents = load_documents()
+    questions = load_questions()
+    print(f"{len(documents)} chunks, {args.concurrency} threads x {args.queries} queries\n")
+
+    columns = ["warmup_ms", "ingest_texts_per_s", "query_req_per_s", "query_p50_ms", "query_p95_ms"]
+    print(f"{'backend':<10}{'model':<26}" + "".join(f"{c:>20}" for c in columns))
+    for name in args.backends:
+        row = run_backend(name, documents, questions, args)
+        print(f"{name:<10}{row['model']:<26}" + "".join(f"{row[c]:>20.1f}" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
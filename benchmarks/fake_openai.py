@@ -0,0 +1,384 @@
+"""
+Local stand-in for the OpenAI and Ollama APIs used by load tests.
+
+Serves /v1/embeddings and /api/embed (deterministic stub vectors),
+/v1/responses (plain and SSE streaming), /api/generate (plain and NDJSON
+streaming) and /v1/audio/translations (Whisper verbose_json) with
+configurable latency and error rate, so the real
+client code paths run unchanged against it. With --rpm / --tpm the OpenAI
+routes enforce per-model rate limits like the real API (429 with
+retry-after-ms once a bucket is empty). /v1/responses also mimics prompt
+caching: a prompt sharing 1024+ tokens of prefix with a recent one reports
+them as cached_tokens, and only uncached tokens add --prefill-ms-per-1k:
+
+    python -m benchmarks.fake_openai --port 8900 --latency-ms 400 --error-rate 0.02
+    python -m benchmarks.fake_openai --port 8900 --rpm 60 --tpm 40000
+    OPENAI_BASE_URL=http://127.0.0.1:8900/v1 OPENAI_API_KEY=fake python rag_service.py
+    RAG_EMBED_BACKEND=ollama RAG_LLM_BACKEND=ollama OLLAMA_URL=http://127.0.0.1:8900 python rag_service.py
+"""
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+import os
+import uuid
+from collections import Counter, deque
+
+from aiohttp import web
+
+from benchmarks.stub_embedding import stub_embed
+
+
+class FakeOpenAIConfig:
+    def __init__(self, latency_ms=300.0, jitter_ms=100.0, error_rate=0.0,
+                 stream_chunks=20, embed_latency_ms=40.0, answer_words=120,
+                 rpm_limit=0, tpm_limit=0, burst_seconds=10.0, prefill_ms_per_1k=0.0):
+        self.latency_ms = latency_ms              # generation latency (spread across stream chunks)
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate              # fraction of requests answered with 429/500
+        self.stream_chunks = stream_chunks
+        self.embed_latency_ms = embed_latency_ms
+        self.answer_words = answer_words
+        self.rpm_limit = rpm_limit                # per model; 0 = unlimited
+        self.tpm_limit = tpm_limit
+        self.burst_seconds = burst_seconds        # limits are enforced over this window
+        self.buckets = {}                         # model -> [requests, tokens, updated]
+        self.accepted = Counter()                 # model -> requests within limits
+        self.rejected = Counter()                 # model -> requests answered 429 by the limiter
+        self.prefill_ms_per_1k = prefill_ms_per_1k    # extra latency per 1k uncached prompt tokens
+        self.recent_prompts = deque(maxlen=64)    # prompt prefix cache
+
+
+def _delay(mean_ms, jitter_ms):
+    return max(0.0, random.gauss(mean_ms, jitter_ms)) / 1000
+
+
+def _maybe_fail(config):
+    if random.random() < config.error_rate:
+        status = random.choice([429, 500])
+        return web.Response(
+            status=status,
+            text=json.dumps({"error": {"message": "injected failure", "type": "fake", "code": status}}),
+            content_type="application/json",
+            headers={"retry-after-ms": "50"}
+        )
+    return None
+
+
+def _rate_limit(config, model, tokens):
+    """
+    Token buckets per model (requests and tokens, refilled continuously,
+    holding burst_seconds' worth). Returns a 429 response when either is
+    short, else None after charging the request.
+    """
+    if not (config.rpm_limit or config.tpm_limit):
+        return None
+    now = time.monotonic()
+    limits = (config.rpm_limit, config.tpm_limit)
+    capacity = [max(1.0, limit * config.burst_seconds / 60) for limit in limits]
+    bucket = config.buckets.setdefault(model, [*capacity, now])
+    for i in (0, 1):
+        bucket[i] = min(capacity[i], bucket[i] + (now - bucket[2]) * limits[i] / 60)
+    bucket[2] = now
+
+    wait = 0.0
+    for i, amount in ((0, 1), (1, tokens)):
+        if limits[i] and bucket[i] < min(amount, capacity[i]):
+            wait = max(wait, (min(amount, capacity[i]) - bucket[i]) * 60 / limits[i])
+    if wait:
+        config.rejected[model] += 1
+        return web.Response(
+            status=429,
+            text=json.dumps({"error": {"message": f"Rate limit reached for {model}", "type": "requests",
+                                       "code": "rate_limit_exceeded"}}),
+            content_type="application/json",
+            headers={"retry-after-ms": str(int(wait * 1000) + 1)}
+        )
+    bucket[0] -= 1
+    bucket[1] -= tokens
+    config.accepted[model] += 1
+    return None
+
+
+def _cached_tokens(config, prompt):
+    """
+    Longest prefix shared with a recent prompt, in tokens, counted like
+    the API: nothing below 1024, then in steps of 128.
+    """
+    shared = max((len(os.path.commonprefix([prompt, p])) for p in config.recent_prompts), default=0)
+    config.recent_prompts.append(prompt)
+    tokens = min(shared, len(prompt) - 1) // 4
+    return 0 if tokens < 1024 else 1024 + (tokens - 1024) // 128 * 128
+
+
+def _usage(prompt, text, cached_tokens=0):
+    input_tokens = max(1, len(prompt) // 4)
+    output_tokens = max(1, len(text) // 4)
+    return {
+        "input_tokens": input_tokens,
+        "input_tokens_details": {"cached_tokens": cached_tokens},
+        "output_tokens": output_tokens,
+        "output_tokens_details": {"reasoning_tokens": 0},
+        "total_tokens": input_tokens + output_tokens
+    }
+
+
+def _response_body(model, prompt, text, cached_tokens=0):
+    return {
+        "id": f"resp_{uuid.uuid4().hex}",
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": model,
+        "status": "completed",
+        "output": [{
+            "type": "message",
+            "id": f"msg_{uuid.uuid4().hex}",
+            "role": "assistant",
+            "status": "completed",
+            "content": [{"type": "output_text", "text": text, "annotations": []}]
+        }],
+        "parallel_tool_calls": True,
+        "tool_choice": "auto",
+        "tools": [],
+        "usage": _usage(prompt, text, cached_tokens)
+    }
+
+
+def _answer_text(config):
+    words = ["**Answer**", "grounded", "in", "the", "lecture", "transcript", "at", "the", "given", "timestamp."]
+    return " ".join(words[i % len(words)] for i in range(config.answer_words))
+
+
+# ============================================================
+# ROUTES
+# ============================================================
+
+async def handle_embeddings(request):
+    config = request.app["config"]
+    body = await request.json()
+    texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+    tokens = sum(max(1, len(t) // 4) for t in texts)
+    limited = _rate_limit(config, body.get("model"), tokens)
+    if limited is not None:
+        return limited
+    await asyncio.sleep(_delay(config.embed_latency_ms, config.embed_latency_ms / 4))
+    failure = _maybe_fail(config)
+    if failure is not None:
+        return failure
+
+    vectors = stub_embed(texts)
+    return web.json_response({
+        "object": "list",
+        "model": body.get("model"),
+        "data": [{"object": "embedding", "index": i, "embedding": v} for i, v in enumerate(vectors)],
+        "usage": {"prompt_tokens": tokens, "total_tokens": tokens}
+    })
+
+
+async def handle_audio_translations(request):
+    """Whisper-style verbose_json: one 5 s segment per ~20 KB of uploaded audio."""
+    config = request.app["config"]
+    form = await request.post()
+    size = len(form["file"].file.read())
+    limited = _rate_limit(config, form.get("model", "whisper-1"), 0)
+    if limited is not None:
+        return limited
+    await asyncio.sleep(_delay(config.latency_ms, config.jitter_ms))
+    failure = _maybe_fail(config)
+    if failure is not None:
+        return failure
+
+    words = _answer_text(config).split(" ")
+    segments = [
+        {"id": i, "start": i * 5.0, "end": (i + 1) * 5.0,
+         "text": " " + " ".join(words[(i * 12) % len(words):(i * 12) % len(words) + 12])}
+        for i in range(max(1, size // 20000))
+    ]
+    return web.json_response({
+        "task": "translate",
+        "language": "english",
+        "duration": segments[-1]["end"],
+        "text": "".join(s["text"] for s in segments),
+        "segments": segments
+    })
+
+
+async def handle_responses(request):
+    config = request.app["config"]
+    body = await request.json()
+    prompt = body["input"] if isinstance(body["input"], str) else json.dumps(body["input"])
+    model = body.get("model", "gpt-5")
+    text = _answer_text(config)
+
+    # Charged like the API does before generating: prompt plus expected output
+    limited = _rate_limit(config, model, _usage(prompt, text)["total_tokens"])
+    if limited is not None:
+        return limited
+
+    failure = _maybe_fail(config)
+    if failure is not None:
+        await asyncio.sleep(_delay(config.embed_latency_ms, 0))
+        return failure
+
+    cached = _cached_tokens(config, prompt)
+    await asyncio.sleep((len(prompt) // 4 - cached) / 1000 * config.prefill_ms_per_1k / 1000)
+
+    if not body.get("stream"):
+        await asyncio.sleep(_delay(config.latency_ms, config.jitter_ms))
+        return web.json_response(_response_body(model, prompt, text, cached))
+
+    response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+    await response.prepare(request)
+
+    async def send(event):
+        await response.write(f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode("utf-8"))
+
+    words = text.split(" ")
+    per_chunk = max(1, len(words) // config.stream_chunks)
+    item_id = f"msg_{uuid.uuid4().hex}"
+    total = _delay(config.latency_ms, config.jitter_ms)
+    seq = 0
+
+    try:
+        for i in range(0, len(words), per_chunk):
+            await asyncio.sleep(total / config.stream_chunks)
+            delta = " ".join(words[i:i + per_chunk]) + " "
+            await send({"type": "response.output_text.delta", "item_id": item_id, "output_index": 0,
+                        "content_index": 0, "delta": delta, "logprobs": [], "sequence_number": seq})
+            seq += 1
+
+        await send({"type": "response.completed", "sequence_number": seq,
+                    "response": _response_body(model, prompt, text, cached)})
+    except ConnectionResetError:
+        # Client cancelled the stream (e.g. a superseded answer)
+        return response
+    await response.write_eof()
+    return response
+
+
+async def handle_ollama_embed(request):
+    config = request.app["config"]
+    body = await request.json()
+    await asyncio.sleep(_delay(config.embed_latency_ms, config.embed_latency_ms / 4))
+    failure = _maybe_fail(config)
+    if failure is not None:
+        return failure
+
+    texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+    return web.json_response({
+        "model": body.get("model"),
+        "embeddings": stub_embed(texts),
+        "prompt_eval_count": sum(max(1, len(t) // 4) for t in texts)
+    })
+
+
+async def handle_ollama_generate(request):
+    config = request.app["config"]
+    body = await request.json()
+    if "prompt" not in body:
+        # Model load request (used for warm-up)
+        return web.json_response({"model": body.get("model"), "response": "", "done": True, "done_reason": "load"})
+    prompt = body["prompt"]
+    text = _answer_text(config)
+    usage = _usage(prompt, text)
+    final = {"model": body.get("model"), "done": True,
+             "prompt_eval_count": usage["input_tokens"], "eval_count": usage["output_tokens"]}
+
+    failure = _maybe_fail(config)
+    if failure is not None:
+        return failure
+
+    if not body.get("stream", True):
+        await asyncio.sleep(_delay(config.latency_ms, config.jitter_ms))
+        return web.json_response({**final, "response": text})
+
+    response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+    await response.prepare(request)
+
+    words = text.split(" ")
+    per_chunk = max(1, len(words) // config.stream_chunks)
+    total = _delay(config.latency_ms, config.jitter_ms)
+
+    try:
+        for i in range(0, len(words), per_chunk):
+            await asyncio.sleep(total / config.stream_chunks)
+            chunk = {"model": body.get("model"), "response": " ".join(words[i:i + per_chunk]) + " ", "done": False}
+            await response.write((json.dumps(chunk) + "\n").encode("utf-8"))
+
+        await response.write((json.dumps({**final, "response": ""}) + "\n").encode("utf-8"))
+    except ConnectionResetError:
+        return response
+    await response.write_eof()
+    return response
+
+
+async def handle_models(request):
+    return web.json_response({"object": "list", "data": [
+        {"id": model, "object": "model", "created": 0, "owned_by": "fake"}
+        for model in ("gpt-5", "text-embedding-3-large", "whisper-1")
+    ]})
+
+
+async def handle_ollama_version(request):
+    return web.json_response({"version": "0.0.0-fake"})
+
+
+def create_app(config=None):
+    app = web.Application(client_max_size=64 * 1024 ** 2)
+    app["config"] = config or FakeOpenAIConfig()
+    app.router.add_post("/v1/embeddings", handle_embeddings)
+    app.router.add_post("/v1/responses", handle_responses)
+    app.router.add_post("/v1/audio/translations", handle_audio_translations)
+    app.router.add_post("/api/embed", handle_ollama_embed)
+    app.router.add_post("/api/generate", handle_ollama_generate)
+    app.router.add_get("/v1/models", handle_models)
+    app.router.add_get("/api/version", handle_ollama_version)
+    return app
+
+
+def start_in_thread(config=None, host="127.0.0.1", port=0):
+    """Serve the fake APIs on a daemon thread; returns the server's base URL."""
+    ready = threading.Event()
+    result = {}
+
+    def _run():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        runner = web.AppRunner(create_app(config))
+        loop.run_until_complete(runner.setup())
+        loop.run_until_complete(web.TCPSite(runner, host, port).start())
+        bound_host, bound_port = runner.addresses[0][:2]
+        result["url"] = f"http://{bound_host}:{bound_port}"
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=_run, name="fake-openai", daemon=True).start()
+    ready.wait()
+    return result["url"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake OpenAI / Ollama endpoints for load tests.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--jitter-ms", type=float, default=100.0)
+    parser.add_argument("--embed-latency-ms", type=float, default=40.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--stream-chunks", type=int, default=20)
+    parser.add_argument("--rpm", type=int, default=0, help="requests/min per model (0 = unlimited)")
+    parser.add_argument("--tpm", type=int, default=0, help="tokens/min per model (0 = unlimited)")
+    parser.add_argument("--prefill-ms-per-1k", type=float, default=0.0)
+    args = parser.parse_args()
+
+    config = FakeOpenAIConfig(args.latency_ms, args.jitter_ms, args.error_rate,
+                              args.stream_chunks, args.embed_latency_ms,
+                              rpm_limit=args.rpm, tpm_limit=args.tpm,
+                              prefill_ms_per_1k=args.prefill_ms_per_1k)
+    web.run_app(create_app(config), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
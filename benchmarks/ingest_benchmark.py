@@ -0,0 +1,186 @@
+"""
+Batch import benchmark: sequential vs pipelined YouTube-style ingestion.
+
+Serves local media files over a throttled HTTP server as a "playlist" page
+(one <audio> tag per file), which yt_dlp's generic extractor expands like
+a YouTube playlist. It then imports the page twice:
+
+  sequential  the old flow: one download at a time, processing after all
+              downloads finish
+  pipelined   youtube_ingest.ingest: parallel audio-only downloads, each
+              item processed as soon as it lands
+
+By default processing is simulated with a fixed delay, so no ffmpeg or API
+key is needed. --real runs the actual ffmpeg → transcription → embedding
+steps (ffmpeg must be on PATH), against the fake OpenAI endpoints unless
+--real-api is given.
+
+    python -m benchmarks.ingest_benchmark --files 6 --throttle-kbps 4000 --process-ms 1500
+    python -m benchmarks.ingest_benchmark --files 3 --real
+"""
+import argparse
+import functools
+import html
+import http.server
+import os
+import shutil
+import tempfile
+import threading
+import time
+import urllib.parse
+
+from benchmarks import fake_openai
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MEDIA_DIR = os.path.join(REPO_DIR, "audios")
+
+
+# ============================================================
+# LOCAL "PLAYLIST" SERVER
+# ============================================================
+
+class ThrottledHandler(http.server.SimpleHTTPRequestHandler):
+    """
+    Static files at a capped rate per connection. "/playlist.html?run=<name>"
+    is the playlist page; its title (and so the lecture titles) include the
+    run name, so each run indexes its own lectures.
+    """
+
+    throttle_bps = 0
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        if url.path in ("/", "/playlist.html"):
+            run = urllib.parse.parse_qs(url.query).get("run", ["local"])[0]
+            names = sorted(n for n in os.listdir(self.directory) if not n.startswith("."))
+            body = f"<html><head><title>{html.escape(run)} playlist</title></head><body>" + "".join(
+                f'<h2>{html.escape(os.path.splitext(n)[0])}</h2>'
+                f'<audio controls src="/{urllib.parse.quote(n)}"></audio>' for n in names
+            ) + "</body></html>"
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        super().do_GET()
+
+    def copyfile(self, source, outputfile):
+        if not self.throttle_bps:
+            return super().copyfile(source, outputfile)
+        block = 64 * 1024
+        while True:
+            data = source.read(block)
+            if not data:
+                return
+            outputfile.write(data)
+            time.sleep(len(data) / self.throttle_bps)
+
+
+def serve(directory, throttle_kbps):
+    handler = type("Handler", (ThrottledHandler,), {"throttle_bps": throttle_kbps * 1000 / 8})
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(handler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}/playlist.html"
+
+
+# ============================================================
+# RUNS
+# ============================================================
+
+def simulated_process(delay_s):
+    def process(path):
+        time.sleep(delay_s)
+        os.remove(path)
+        return 0
+    return process
+
+
+def run_sequential(url, process):
+    import youtube_ingest
+
+    start = time.perf_counter()
+    paths = [youtube_ingest.download_audio(item, allow_files=True)[2]
+             for item in youtube_ingest.list_entries(url, allow_files=True)]
+    first, items, errors = None, 0, 0
+    for path in paths:
+        try:
+            process(path)
+        except Exception as e:
+            errors += 1
+            print(f"  error (process): {str(getattr(e, 'stderr', '') or e)[:200]}")
+            continue
+        items += 1
+        first = first or time.perf_counter() - start
+    return {"wall_s": time.perf_counter() - start, "first_indexed_s": first, "items": items, "errors": errors}
+
+
+def run_pipelined(url, process, download_workers, ingest_workers):
+    import youtube_ingest
+
+    start = time.perf_counter()
+    first, items, errors = None, 0, 0
+    for event in youtube_ingest.ingest([url], download_workers=download_workers,
+                                       ingest_workers=ingest_workers, process=process, allow_files=True):
+        if event["type"] == "indexed":
+            items += 1
+            first = first or time.perf_counter() - start
+        elif event["type"] == "error":
+            errors += 1
+            print(f"  error ({event['stage']}): {event['message'][:200]}")
+    return {"wall_s": time.perf_counter() - start, "first_indexed_s": first, "items": items, "errors": errors}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sequential vs pipelined batch import over local media.")
+    parser.add_argument("--media", default=MEDIA_DIR, help="Folder of audio/video files to serve")
+    parser.add_argument("--files", type=int, default=6, help="Files from --media in the playlist")
+    parser.add_argument("--throttle-kbps", type=float, default=4000, help="Per-connection download rate (0 = unlimited)")
+    parser.add_argument("--process-ms", type=float, default=1500, help="Simulated processing time per item")
+    parser.add_argument("--download-workers", type=int, default=3)
+    parser.add_argument("--ingest-workers", type=int, default=2)
+    parser.add_argument("--real", action="store_true", help="Run ffmpeg + transcription + embedding for real")
+    parser.add_argument("--real-api", action="store_true", help="With --real, call the configured APIs instead of the fakes")
+    args = parser.parse_args()
+
+    if args.real:
+        # ffmpeg output, transcripts and vectors go to a throwaway home, not ~/rag_data and ~/chroma_store
+        os.environ["HOME"] = tempfile.mkdtemp(prefix="rag_bench_home_")
+
+    media = tempfile.mkdtemp(prefix="rag_bench_media_")
+    for name in sorted(os.listdir(args.media))[:args.files]:
+        shutil.copy(os.path.join(args.media, name), media)
+    url = serve(media, args.throttle_kbps)
+
+    import youtube_ingest
+    youtube_ingest.DOWNLOADS_DIR = tempfile.mkdtemp(prefix="rag_bench_downloads_")
+    youtube_ingest.SOURCES_FILE = os.path.join(youtube_ingest.DOWNLOADS_DIR, "sources.json")
+
+    if args.real:
+        if not args.real_api:
+            # Subprocesses inherit these, so transcription hits the fakes too
+            base_url = fake_openai.start_in_thread(fake_openai.FakeOpenAIConfig(latency_ms=args.process_ms))
+            os.environ.update(OPENAI_BASE_URL=base_url + "/v1", OPENAI_API_KEY="fake-ingest-benchmark",
+                              RAG_EMBED_BACKEND="openai", RAG_TRANSCRIBE_BACKEND="openai")
+        process = youtube_ingest.process_download
+    else:
+        process = simulated_process(args.process_ms / 1000)
+
+    print(f"Playlist: {url} ({len(os.listdir(media))} files, {args.throttle_kbps:g} kbps per download)\n")
+    results = {
+        "sequential": run_sequential(url + "?run=sequential", process),
+        "pipelined": run_pipelined(url + "?run=pipelined", process, args.download_workers, args.ingest_workers),
+    }
+
+    print(f"{'mode':<12}{'items':>8}{'errors':>8}{'wall s':>10}{'first indexed s':>18}")
+    for mode, r in results.items():
+        first = f"{r['first_indexed_s']:.2f}" if r["first_indexed_s"] else "-"
+        print(f"{mode:<12}{r['items']:>8}{r['errors']:>8}{r['wall_s']:>10.2f}{first:>18}")
+
+
+if __name__ == "__main__":
+    main()
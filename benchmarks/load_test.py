@@ -0,0 +1,273 @@
+"""
+Load test: simulated Streamlit sessions against local API stand-ins.
+
+Starts the fake OpenAI endpoints and the RAG service in-process (over the
+bundled corpus with stub embeddings), then runs many simulated user
+sessions at a target concurrency. Each session mirrors app.py: it keeps
+its own session_state with question_history, streams answers through
+rag_client and sometimes generates a lecture summary.
+
+    python -m benchmarks.load_test --sessions 60 --concurrency 30 --latency-ms 800 --error-rate 0.02
+    python -m benchmarks.load_test --session-layout legacy   # per-session summaries + list history
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import fake_openai
+from benchmarks.retrieval_benchmark import BenchCorpus, load_questions
+from metrics import percentile
+
+
+# ============================================================
+# MEMORY HELPERS
+# ============================================================
+
+def rss_bytes():
+    """Current resident set size (Linux /proc, falls back to peak RSS)."""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def deep_sizeof(obj, seen=None):
+    """Approximate retained size of a session_state-like object graph."""
+    seen = seen if seen is not None else set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if hasattr(obj, "__dict__"):
+        size += deep_sizeof(vars(obj), seen)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    return size
+
+
+# ============================================================
+# SIMULATED SESSION
+# ============================================================
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, flow, seconds, ok=True):
+        with self.lock:
+            if ok:
+                self.latencies[flow].append(seconds * 1000)
+            else:
+                self.errors[flow] += 1
+
+
+def run_session(session_id, questions, titles, args, stats):
+    import rag_client
+    import shared_state
+
+    rng = random.Random(session_id)
+    legacy = args.session_layout == "legacy"
+    if legacy:
+        # Layout before shared_state: unbounded list history, summaries copied into every session
+        session_state = {
+            "question_history": [],
+            "lecture_summary_quick": None,
+            "lecture_summary_full": None,
+            "selected_topic": "All Lectures"
+        }
+    else:
+        session_state = {
+            "question_history": shared_state.QueryHistory(),
+            "summary_title": None,
+            "selected_topic": "All Lectures"
+        }
+
+    for _ in range(args.queries):
+        query = rng.choice(questions)["question"]
+        if args.unique_questions:
+            query = f"{query} (student {session_id})"
+
+        # Same bookkeeping as app.py's Search handler
+        if not legacy:
+            session_state["question_history"].add(query)
+        elif query not in session_state["question_history"]:
+            session_state["question_history"].insert(0, query)
+
+        start = time.perf_counter()
+        try:
+            events = rag_client.answer_stream(query, "All Lectures")
+            first = next(events)
+            stats.record("search_chunks", time.perf_counter() - start, first["type"] == "chunks")
+            answer = ""
+            for event in events:
+                if event["type"] == "delta":
+                    answer += event["text"]
+                elif event["type"] == "error":
+                    raise RuntimeError(event["message"])
+            stats.record("search_answer", time.perf_counter() - start)
+        except Exception:
+            stats.record("search_answer", time.perf_counter() - start, ok=False)
+
+        time.sleep(rng.uniform(0, args.think_ms) / 1000)
+
+    if rng.random() < args.summarize_ratio:
+        start = time.perf_counter()
+        try:
+            title = rng.choice(titles)
+            if legacy:
+                quick, full = rag_client.summarize(title)
+                session_state["lecture_summary_quick"] = quick
+                session_state["lecture_summary_full"] = full
+            else:
+                # Same as app.py's stream_summaries: generated once per process, quick summary first
+                if shared_state.summaries.get(title) is None:
+                    for event in rag_client.summarize_stream(title, f"load-{session_id}"):
+                        if event["type"] == "quick":
+                            stats.record("summary_first", time.perf_counter() - start)
+                        elif event["type"] == "done":
+                            shared_state.summaries.put(title, (event["quick"], event["full"]))
+                        elif event["type"] == "error":
+                            raise RuntimeError(event["message"])
+                session_state["summary_title"] = title
+            stats.record("summarize", time.perf_counter() - start)
+        except Exception:
+            stats.record("summarize", time.perf_counter() - start, ok=False)
+
+    return session_state
+
+
+# ============================================================
+# DRIVER
+# ============================================================
+
+def start_stack(args):
+    """Fake OpenAI + RAG service over the bundled corpus; returns the corpus."""
+    config = fake_openai.FakeOpenAIConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        embed_latency_ms=args.embed_latency_ms,
+        answer_words=args.answer_words
+    )
+    base_url = fake_openai.start_in_thread(config)
+    os.environ["OPENAI_BASE_URL"] = base_url + "/v1"
+    os.environ["OPENAI_API_KEY"] = "fake-load-test"
+    os.environ["OLLAMA_URL"] = base_url
+    os.environ["RAG_EMBED_BACKEND"] = args.backend
+    os.environ["RAG_LLM_BACKEND"] = args.backend
+
+    import rag_client
+    import rag_service
+    import lecture_router
+    import query_log
+    import section_index
+    import transcripts
+    from rag_pipeline import RAGPipeline
+
+    # Summaries rebuild ordered transcripts from the bench collection; keep them out of ~/rag_data
+    transcripts.TRANSCRIPTS_DIR = tempfile.mkdtemp(prefix="rag_bench_transcripts_")
+    section_index.SECTIONS_DIR = tempfile.mkdtemp(prefix="rag_bench_sections_")
+    lecture_router.ROUTES_DIR = tempfile.mkdtemp(prefix="rag_bench_routes_")
+    query_log.LOG_DIR = tempfile.mkdtemp(prefix="rag_bench_querylog_")
+    query_log.LOG_FILE = os.path.join(query_log.LOG_DIR, "queries.jsonl")
+    corpus = BenchCorpus()
+    for title, (ids, embeddings) in corpus.lecture_vectors().items():
+        lecture_router.index_lecture(title, ids, embeddings)
+    pipeline = RAGPipeline(collection=corpus.collection, max_concurrency=args.service_concurrency)
+    if args.no_answer_cache:
+        pipeline.answer_cache.max_entries = 0
+    rag_client.use_service(rag_service.start_in_thread(port=0, pipeline=pipeline))
+    rag_client.wait_ready()
+    return corpus
+
+
+def print_report(stats, args, wall, rss_before, rss_after, states):
+    print(f"\nSessions: {args.sessions}  concurrency: {args.concurrency}  "
+          f"queries/session: {args.queries}  wall: {wall:.1f}s")
+
+    print(f"\n{'flow':<16}{'ok':>8}{'errors':>8}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for flow in ("search_chunks", "search_answer", "summary_first", "summarize"):
+        values = stats.latencies.get(flow, [])
+        errors = stats.errors.get(flow, 0)
+        if not values and not errors:
+            continue
+        row = [percentile(values, q) or 0 for q in (50, 95, 99, 100)]
+        print(f"{flow:<16}{len(values):>8}{errors:>8}{len(values) / wall:>9.2f}" +
+              "".join(f"{v:>10.0f}" for v in row))
+
+    state_sizes = [deep_sizeof(s) for s in states]
+    history_sizes = [deep_sizeof(s["question_history"]) for s in states]
+    history_lengths = [len(s["question_history"]) for s in states]
+    n = max(1, len(states))
+    import shared_state
+
+    print("\nMemory")
+    print(f"  RSS before / after:            {rss_before / 1e6:.1f} MB / {rss_after / 1e6:.1f} MB")
+    print(f"  RSS growth per session:        {(rss_after - rss_before) / n / 1024:.1f} KB")
+    print(f"  session_state per session:     {sum(state_sizes) / n / 1024:.1f} KB (max {max(state_sizes, default=0) / 1024:.1f} KB)")
+    print(f"  question_history per session:  {sum(history_sizes) / n / 1024:.1f} KB, "
+          f"{sum(history_lengths) / n:.1f} entries")
+    if args.session_layout == "shared":
+        print(f"  shared summaries (process):    {deep_sizeof(shared_state.summaries) / 1024:.1f} KB, "
+              f"{len(shared_state.summaries)} lectures")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent session load test against local API stand-ins.")
+    parser.add_argument("--sessions", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=20, help="Simultaneously active sessions")
+    parser.add_argument("--queries", type=int, default=5, help="Searches per session")
+    parser.add_argument("--summarize-ratio", type=float, default=0.2, help="Fraction of sessions that summarize")
+    parser.add_argument("--think-ms", type=float, default=200.0, help="Max pause between a session's queries")
+    parser.add_argument("--latency-ms", type=float, default=600.0, help="Fake generation latency")
+    parser.add_argument("--jitter-ms", type=float, default=150.0)
+    parser.add_argument("--embed-latency-ms", type=float, default=40.0)
+    parser.add_argument("--answer-words", type=int, default=120, help="Length of fake answers and summaries")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--backend", default="openai", choices=["openai", "ollama"], help="Provider API to exercise")
+    parser.add_argument("--service-concurrency", type=int, default=32, help="RAG service OpenAI call cap")
+    parser.add_argument("--unique-questions", action="store_true", help="Make every session's wording distinct")
+    parser.add_argument("--no-answer-cache", action="store_true")
+    parser.add_argument("--session-layout", default="shared", choices=["shared", "legacy"],
+                        help="Session state as app.py keeps it now, or the old per-session layout")
+    args = parser.parse_args()
+
+    corpus = start_stack(args)
+    questions = load_questions()
+    titles = sorted({m["title"] for m in corpus.metadatas})
+    stats = Stats()
+
+    gc.collect()
+    rss_before = rss_bytes()
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        states = list(pool.map(
+            lambda i: run_session(i, questions, titles, args, stats),
+            range(args.sessions)
+        ))
+
+    wall = time.perf_counter() - start
+    gc.collect()
+    print_report(stats, args, wall, rss_before, rss_bytes(), states)
+
+
+if __name__ == "__main__":
+    main()
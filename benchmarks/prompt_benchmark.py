@@ -0,0 +1,206 @@
+"""
+Prompt layout benchmark: provider prompt caching with the current
+templates (prompts.py) versus the layout they replaced.
+
+Sends every lecture's quick + detailed summary and an answer for each
+benchmark question through OpenAIBackend to the fake endpoints, which
+report cached_tokens like the API and charge prefill latency only for
+uncached tokens. Each layout starts from an empty prompt cache.
+
+    python -m benchmarks.prompt_benchmark --prefill-ms-per-1k 60 --cached-price 0.1
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from benchmarks import fake_openai
+from benchmarks.retrieval_benchmark import BenchCorpus, chroma_retriever, load_questions
+from prompts import answer_prompt, summary_prompts
+from providers import OpenAIBackend
+from rag_pipeline import ALL_LECTURES, TOP_K
+
+
+# ============================================================
+# LEGACY LAYOUT
+# ============================================================
+
+def legacy_answer_prompt(query, top_chunks):
+    return f"""
+        You are an expert AI Teaching Assistant specialized in explaining lecture videos with timestamp grounding.
+
+        Context (most relevant transcript segments):
+        {json.dumps(top_chunks, indent=2)}
+
+        User Question:
+        {query}
+
+        Task:
+        Generate a factually grounded answer strictly based on the provided transcript segments.
+
+        Response Requirements:
+        1. Clearly identify the exact concept or topic being asked.
+        2. Mention the lecture title(s) where the answer is found.
+        3. Provide the precise timestamp range(s) for each explanation.
+        4. Explain the concept concisely but technically (no oversimplification, no fluff).
+        5. Use well-structured bullet points with sub-bullets where helpful.
+        6. Output in clean Markdown format.
+        7. English only.
+        8. Each bullet should be on its own line (no inline merging).
+        9. Do not hallucinate or add information not present in the transcript.
+        10. If the answer is partially present, explicitly state what is missing.
+
+        Formatting:
+        - Use **bold** for key terms.
+        - Use `code` formatting for formulas, algorithms, or variables.
+        - Keep each point short, precise, and exam-ready.
+
+        """
+
+
+def legacy_summary_prompts(full_text):
+    """The summary prompts before prompts.py (instructions first, transcript sent in full twice)."""
+
+    # -------- Quick Summary Prompt --------
+    quick_prompt = f"""
+    You are a senior university professor preparing executive revision notes.
+
+    Task:
+    Create a **1–2 minute executive summary** of the lecture for fast revision.
+
+    Output Requirements:
+    - 120–180 words (strict)
+    - Make sure of this : Bullet points only (no paragraphs)
+    - Capture only the most important concepts, principles, and conclusions
+    - No derivations, no examples, no storytelling
+    - Use precise academic terminology
+    - Each bullet must be a complete, standalone idea
+    - No repetition
+    - No information not present in the transcript
+
+    Style:
+    - Concise
+    - Exam-focused
+    - Clear hierarchy of ideas
+    - Professional academic tone
+
+    Lecture Transcript:
+    {full_text}
+    """
+
+    # -------- Detailed Notes Prompt --------
+    full_prompt = f"""
+    You are a senior AI Teaching Assistant preparing complete, exam-ready lecture notes.
+
+    Task:
+    Transform the following lecture transcript into **fully structured study material** suitable for university revision.
+
+    Required Structure (use Markdown headings):
+
+    1. **Lecture Title**
+    2. **Executive Overview**
+    - 5–8 bullet points summarizing the full lecture
+    3. **Key Concepts Explained**
+    - Each major concept with concise technical explanation
+    4. **Step-by-Step Topic Flow**
+    - Ordered progression of ideas as taught in the lecture
+    5. **Important Definitions**
+    - Clear, formal definitions of all core terms
+    6. **Illustrative Examples** (only if present in transcript)
+    7. **Final 10-Line Revision Notes**
+    - Ultra-condensed exam-oriented takeaways
+
+    Strict Rules:
+    - Use only information present in the transcript
+    - No hallucinations, no external knowledge
+    - Academic, precise, and technical tone
+    - Markdown formatting with clear section headers
+    - Bullet points and numbered lists where appropriate
+    - No verbosity, no storytelling, no filler
+    - Each section must be logically coherent and complete
+
+    Lecture Transcript:
+    {full_text}
+    """
+
+    return quick_prompt, full_prompt
+
+
+LAYOUTS = {
+    "legacy": (legacy_answer_prompt, lambda title, text: legacy_summary_prompts(text)),
+    "prefix": (answer_prompt, summary_prompts),
+}
+
+
+# ============================================================
+# RUN
+# ============================================================
+
+async def run_layout(layout, corpus, questions, args):
+    build_answer, build_summaries = LAYOUTS[layout]
+    config = fake_openai.FakeOpenAIConfig(latency_ms=args.latency_ms, jitter_ms=0,
+                                          prefill_ms_per_1k=args.prefill_ms_per_1k)
+    os.environ["OPENAI_BASE_URL"] = fake_openai.start_in_thread(config) + "/v1"
+    os.environ.setdefault("OPENAI_API_KEY", "fake")
+    backend = OpenAIBackend()
+
+    rows = {}
+
+    async def send(flow, prompt):
+        started = time.perf_counter()
+        _, usage = await backend.agenerate(prompt)
+        row = rows.setdefault(flow, {"requests": 0, "input_tokens": 0, "cached_tokens": 0, "ms": 0.0})
+        row["requests"] += 1
+        row["input_tokens"] += usage.get("input_tokens", 0)
+        row["cached_tokens"] += usage.get("cached_tokens", 0)
+        row["ms"] += (time.perf_counter() - started) * 1000
+
+    # Quick, then detailed: the pipeline only starts the detailed summary once the quick one is generating
+    for title, segments in sorted(corpus.transcripts.items()):
+        quick, detailed = build_summaries(title, "\n".join(text for _, _, text in segments))
+        await send("summary", quick)
+        await send("summary", detailed)
+
+    retrieve = chroma_retriever(corpus)
+    for label in questions:
+        await send("answer", build_answer(label["question"], retrieve(label["question"], ALL_LECTURES, TOP_K)))
+
+    await backend.aclose()
+    return rows
+
+
+def print_report(results, args):
+    print(f"{'layout':<8}{'flow':<9}{'requests':>9}{'input tok':>11}{'cached':>9}{'cached %':>10}"
+          f"{'billed tok':>12}{'ms/request':>12}")
+    for layout, rows in results.items():
+        for flow, r in rows.items():
+            billed = r["input_tokens"] - r["cached_tokens"] * (1 - args.cached_price)
+            share = r["cached_tokens"] / r["input_tokens"] * 100 if r["input_tokens"] else 0
+            print(f"{layout:<8}{flow:<9}{r['requests']:>9}{r['input_tokens']:>11}{r['cached_tokens']:>9}"
+                  f"{share:>9.1f}%{billed:>12.0f}{r['ms'] / r['requests']:>12.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--layouts", nargs="+", default=list(LAYOUTS), choices=list(LAYOUTS))
+    parser.add_argument("--prefill-ms-per-1k", type=float, default=60.0,
+                        help="Fake prefill time per 1k uncached prompt tokens")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Fake generation time per request")
+    parser.add_argument("--cached-price", type=float, default=0.1,
+                        help="Price of a cached input token relative to an uncached one")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    corpus = BenchCorpus()
+    questions = load_questions()
+    results = {layout: asyncio.run(run_layout(layout, corpus, questions, args)) for layout in args.layouts}
+    print_report(results, args)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Rate-limit test: background ingest and interactive searches sharing one
+OpenAI budget.
+
+Starts the fake OpenAI endpoints with per-model rate limits, then runs
+ingest workers (sync embedding batches, as preprocess_json_uploaded.py)
+alongside simulated users (query embedding + streamed answer, as the RAG
+service) for a fixed time. Each mode runs against a fresh server:
+
+    on   requests go through request_scheduler.RequestScheduler
+    off  direct client calls with the SDK's own retries (RAG_SCHEDULER=0)
+
+    python -m benchmarks.rate_limit_test --duration 20 --ingest-workers 4 --users 4
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import threading
+import time
+
+from benchmarks import fake_openai
+from metrics import percentile
+from providers import OPENAI_EMBED_MODEL, OPENAI_LLM_MODEL, OpenAIBackend
+from request_scheduler import RequestScheduler
+
+WORDS = ("gradient descent converges when the learning rate is small enough for the loss surface "
+         "and the batch normalisation layer keeps activations in range during training").split()
+
+
+def _text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+# ============================================================
+# WORKLOAD
+# ============================================================
+
+def ingest_worker(backend, deadline, stats, seed):
+    rng = random.Random(seed)
+    while time.monotonic() < deadline:
+        batch = [_text(rng, 40) for _ in range(backend.batch_size)]
+        try:
+            backend.embed(batch)
+            stats["ingest_ok"] += 1
+        except Exception:
+            stats["ingest_failed"] += 1
+
+
+async def user(backend, deadline, stats, seed, think_s):
+    rng = random.Random(seed)
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        try:
+            await backend.aembed([_text(rng, 12)])
+            async for _ in backend.agenerate_stream(_text(rng, 400)):
+                pass
+            stats["latencies"].append((time.perf_counter() - started) * 1000)
+        except Exception:
+            stats["search_failed"] += 1
+        await asyncio.sleep(rng.uniform(0, 2 * think_s))
+
+
+async def sample_queue(scheduler, deadline, stats):
+    while scheduler is not None and time.monotonic() < deadline:
+        depth = scheduler.queue_depth()
+        stats["peak_queue"] = max(stats["peak_queue"], sum(sum(c.values()) for c in depth.values()))
+        await asyncio.sleep(0.1)
+
+
+def run_mode(mode, args):
+    config = fake_openai.FakeOpenAIConfig(
+        latency_ms=args.latency_ms, jitter_ms=args.latency_ms / 4, stream_chunks=10,
+        rpm_limit=args.rpm, tpm_limit=args.tpm
+    )
+    os.environ["OPENAI_BASE_URL"] = fake_openai.start_in_thread(config) + "/v1"
+    os.environ["OPENAI_API_KEY"] = "fake"
+    os.environ["RAG_SCHEDULER"] = "1" if mode == "on" else "0"
+
+    scheduler = None
+    if mode == "on":
+        limits = {OPENAI_EMBED_MODEL: (args.rpm, args.tpm), OPENAI_LLM_MODEL: (args.rpm, args.tpm)}
+        scheduler = RequestScheduler(limits, state_dir=tempfile.mkdtemp(prefix="ratelimit_"))
+    backend = OpenAIBackend(scheduler=scheduler)
+
+    stats = {"ingest_ok": 0, "ingest_failed": 0, "search_failed": 0, "latencies": [], "peak_queue": 0}
+    deadline = time.monotonic() + args.duration
+    workers = [threading.Thread(target=ingest_worker, args=(backend, deadline, stats, i))
+               for i in range(args.ingest_workers)]
+    for w in workers:
+        w.start()
+
+    async def _users():
+        await asyncio.gather(
+            sample_queue(scheduler, deadline, stats),
+            *[user(backend, deadline, stats, 1000 + i, args.think_s) for i in range(args.users)]
+        )
+        await backend.aclose()
+
+    started = time.monotonic()
+    asyncio.run(_users())
+    for w in workers:
+        w.join()
+    stats["wall"] = time.monotonic() - started
+    stats["rejected"] = sum(config.rejected.values())
+    stats["accepted"] = sum(config.accepted.values())
+    return stats
+
+
+def print_report(results, args):
+    print(f"\nLimits per model: {args.rpm} req/min, {args.tpm} tokens/min  "
+          f"ingest workers: {args.ingest_workers}  users: {args.users}  duration: {args.duration}s")
+    print(f"\n{'mode':<6}{'searches':>10}{'failed':>8}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}"
+          f"{'ingest ok':>11}{'failed':>8}{'429s':>7}{'peak queue':>12}")
+    for mode, s in results.items():
+        lat = s["latencies"]
+        p50, p95 = percentile(lat, 50), percentile(lat, 95)
+        fmt = lambda v: f"{v:>10.0f}" if v is not None else f"{'-':>10}"
+        print(f"{mode:<6}{len(lat):>10}{s['search_failed']:>8}{fmt(p50)}{fmt(p95)}{fmt(max(lat, default=None))}"
+              f"{s['ingest_ok']:>11}{s['ingest_failed']:>8}{s['rejected']:>7}{s['peak_queue']:>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("on", "off", "both"), default="both")
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--ingest-workers", type=int, default=4)
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--think-s", type=float, default=1.0, help="mean pause between a user's searches")
+    parser.add_argument("--rpm", type=int, default=240, help="fake server limit per model")
+    parser.add_argument("--tpm", type=int, default=200_000)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    args = parser.parse_args()
+
+    modes = ("off", "on") if args.mode == "both" else (args.mode,)
+    print_report({mode: run_mode(mode, args) for mode in modes}, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""
+Offline retrieval benchmark over the bundled lecture corpus.
+
+Indexes jsons/ into an in-memory Chroma collection with deterministic stub
+embeddings, runs the labeled questions through each retriever and reports
+recall@k, MRR, timestamp-hit accuracy, per-query latency, and what each
+retriever would send to the LLM: mean chunks, estimated prompt tokens, the
+share of questions that need an LLM call at all, and an estimated answer
+latency (retrieval + a simple LLM cost model, see --llm-ms).
+
+    python -m benchmarks.retrieval_benchmark
+    python -m benchmarks.retrieval_benchmark --k 3 --retrievers chroma exact --json out.json
+    python -m benchmarks.retrieval_benchmark --retrievers expanded adaptive
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import uuid
+
+import chromadb
+import numpy as np
+from chromadb.config import Settings
+
+from benchmarks.stub_embedding import stub_embed
+import lecture_router
+import section_index
+from context_expansion import ContextExpander, CONTEXT_WINDOW_S
+from metrics import percentile
+from preprocess_json_uploaded import load_chunks, build_chunk_records
+from prompts import answer_prompt
+from rag_pipeline import (candidate_count, fetch_results, query_collection, pack_chunks,
+                          select_hits, ALL_LECTURES, TOP_K)
+from retrieval_policy import collection_space
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORPUS_DIR = os.path.join(REPO_DIR, "jsons")
+QUESTIONS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "retrieval_questions.json")
+
+
+# ============================================================
+# CORPUS
+# ============================================================
+
+class BenchCorpus:
+    """The bundled transcripts, embedded once and loaded into an ephemeral collection."""
+
+    def __init__(self, corpus_dir=CORPUS_DIR, embed=stub_embed):
+        self.embed = embed
+        chunks = []
+        for name in sorted(os.listdir(corpus_dir)):
+            if name.endswith(".json"):
+                chunks.extend(load_chunks(os.path.join(corpus_dir, name)))
+
+        self.ids, self.documents, self.metadatas = build_chunk_records(chunks)
+        self.embeddings = embed(self.documents)
+
+        # Ordered [start, end, text] per lecture, as transcripts.get_transcript returns
+        self.transcripts = {}
+        for meta, text in zip(self.metadatas, self.documents):
+            self.transcripts.setdefault(meta["title"], []).append([meta["start"], meta["end"], text])
+
+        client = chromadb.EphemeralClient(settings=Settings(anonymized_telemetry=False))
+        self.collection = client.create_collection(name=f"bench_{uuid.uuid4().hex[:8]}")
+        for i in range(0, len(self.ids), 500):
+            self.collection.add(
+                ids=self.ids[i:i + 500],
+                documents=self.documents[i:i + 500],
+                embeddings=self.embeddings[i:i + 500],
+                metadatas=self.metadatas[i:i + 500]
+            )
+
+    def lecture_vectors(self):
+        """Lecture title -> (chunk ids, chunk embeddings)."""
+        lectures = {}
+        for id, meta, embedding in zip(self.ids, self.metadatas, self.embeddings):
+            ids, embeddings = lectures.setdefault(meta["title"], ([], []))
+            ids.append(id)
+            embeddings.append(embedding)
+        return lectures
+
+
+# ============================================================
+# RETRIEVERS
+# ============================================================
+# A retriever factory takes the corpus and returns retrieve(query, topic, k) -> chunks.
+# Retrievers that answer some questions without the LLM return Answered chunks.
+
+class Answered(list):
+    """Chunks returned with a templated answer; no LLM call is needed."""
+
+def chroma_retriever(corpus):
+    """The production path: rag_pipeline.query_collection over the HNSW index."""
+    def retrieve(query, topic, k):
+        q_emb = corpus.embed([query])[0]
+        return pack_chunks(query_collection(corpus.collection, q_emb, topic, k))
+    return retrieve
+
+
+def exact_retriever(corpus):
+    """Brute-force cosine over every chunk; the recall ceiling for the embedder."""
+    matrix = np.asarray(corpus.embeddings, dtype=np.float32)
+    titles = np.asarray([m["title"] for m in corpus.metadatas])
+
+    def retrieve(query, topic, k):
+        q = np.asarray(corpus.embed([query])[0], dtype=np.float32)
+        scores = matrix @ q
+        if topic != ALL_LECTURES:
+            scores = np.where(titles == topic, scores, -np.inf)
+        order = np.argsort(-scores)[:k]
+        return [
+            {**{key: corpus.metadatas[i][key] for key in ("title", "number", "start", "end")},
+             "text": corpus.documents[i]}
+            for i in order if np.isfinite(scores[i])
+        ]
+    return retrieve
+
+
+def expanded_retriever(corpus):
+    """chroma hits widened to ±RAG_CONTEXT_WINDOW_S of transcript, overlapping windows merged."""
+    base = chroma_retriever(corpus)
+    expander = ContextExpander(pad_s=CONTEXT_WINDOW_S,
+                               loader=lambda title, _: corpus.transcripts.get(title, []))
+
+    def retrieve(query, topic, k):
+        return expander.expand(base(query, topic, k))
+    return retrieve
+
+
+def sections_retriever(corpus):
+    """Navigational questions answered from the per-lecture section index, the rest by chroma."""
+    base = chroma_retriever(corpus)
+    section_index.SECTIONS_DIR = tempfile.mkdtemp(prefix="rag_bench_sections_")
+    for title, segments in corpus.transcripts.items():
+        rows = [i for i, m in enumerate(corpus.metadatas) if m["title"] == title]
+        chunks = [{**corpus.metadatas[i], "text": corpus.documents[i]} for i in rows]
+        section_index.index_lecture(title, chunks, [corpus.embeddings[i] for i in rows])
+    index = section_index.SectionIndex()
+
+    def retrieve(query, topic, k):
+        found = section_index.is_navigational(query) and index.lookup(query)
+        if not found:
+            return base(query, topic, k)
+        title, section, _ = found
+        segment = section_index.locate(section, query, corpus.transcripts[title])
+        start, end = (segment[0], segment[1]) if segment else (section["start"], section["end"])
+        return Answered([{"title": title, "number": section["number"], "start": start, "end": end,
+                          "text": segment[2] if segment else section["preview"]}])
+    return retrieve
+
+
+def _two_level_search(corpus):
+    """search(q_emb, topic, n) -> Chroma-shaped result, via lecture routing + per-lecture chunk matrices."""
+    lecture_router.ROUTES_DIR = tempfile.mkdtemp(prefix="rag_bench_routes_")
+    for title, (ids, embeddings) in corpus.lecture_vectors().items():
+        lecture_router.index_lecture(title, ids, embeddings)
+    router = lecture_router.LectureRouter()
+    catalog = list(corpus.transcripts)
+    space = collection_space(corpus.collection)
+
+    def search(q_emb, topic, n):
+        titles = router.route(q_emb, catalog)[0] if topic == ALL_LECTURES else [topic]
+        if titles is None:
+            return query_collection(corpus.collection, q_emb, topic, n)
+        return fetch_results(corpus.collection, *router.search(q_emb, titles, n), space)
+    return search
+
+
+def adaptive_retriever(corpus):
+    """
+    The production path: lecture routing, k chosen from the score
+    distribution (at most --k), hits expanded, dominant navigational hits
+    answered directly.
+    """
+    space = collection_space(corpus.collection)
+    search = _two_level_search(corpus)
+    expander = ContextExpander(pad_s=CONTEXT_WINDOW_S,
+                               loader=lambda title, _: corpus.transcripts.get(title, []))
+
+    def retrieve(query, topic, k):
+        q_emb = corpus.embed([query])[0]
+        results = search(q_emb, topic, candidate_count(k, adaptive=True))
+        _, hits, dominant = select_hits(results, space, k, adaptive=True)
+        if dominant and section_index.is_navigational(query):
+            return Answered(hits[:1])
+        return expander.expand(hits)
+    return retrieve
+
+
+def routed_retriever(corpus):
+    """
+    Two-level search: the RAG_ROUTE_LECTURES lectures whose centroid /
+    representatives match best, then an exact search over their chunk matrices.
+    """
+    search = _two_level_search(corpus)
+
+    def retrieve(query, topic, k):
+        return pack_chunks(search(corpus.embed([query])[0], topic, k))
+    return retrieve
+
+
+RETRIEVERS = {
+    "chroma": chroma_retriever,
+    "exact": exact_retriever,
+    "expanded": expanded_retriever,
+    "sections": sections_retriever,
+    "adaptive": adaptive_retriever,
+    "routed": routed_retriever,
+}
+
+
+# ============================================================
+# EVALUATION
+# ============================================================
+
+def load_questions(path=QUESTIONS_FILE):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["questions"]
+
+
+def is_relevant(chunk, label):
+    return (
+        chunk["title"] == label["title"]
+        and chunk["start"] < label["end"]
+        and chunk["end"] > label["start"]
+    )
+
+
+def evaluate(retrieve, questions, k=TOP_K, topic=ALL_LECTURES, llm_ms=1500.0, prefill_ms_per_1k=60.0):
+    hits, reciprocal_ranks, ts_hits, title_hits, latencies, context_chars = 0, [], 0, 0, [], []
+    chunk_counts, prompt_tokens, llm_calls, answer_ms = [], [], 0, []
+
+    for label in questions:
+        start = time.perf_counter()
+        chunks = retrieve(label["question"], topic, k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        context_chars.append(sum(len(c["text"]) for c in chunks))
+        chunk_counts.append(len(chunks))
+
+        # ~4 characters per token; templated answers make no LLM call
+        tokens = 0 if isinstance(chunks, Answered) else len(answer_prompt(label["question"], chunks)) // 4
+        prompt_tokens.append(tokens)
+        llm_calls += tokens > 0
+        answer_ms.append(latencies[-1] + (llm_ms + tokens / 1000 * prefill_ms_per_1k if tokens else 0))
+
+        rank = next((i + 1 for i, c in enumerate(chunks) if is_relevant(c, label)), None)
+        hits += rank is not None
+        reciprocal_ranks.append(1 / rank if rank else 0.0)
+        if chunks:
+            ts_hits += is_relevant(chunks[0], label)
+            title_hits += chunks[0]["title"] == label["title"]
+
+    n = len(questions)
+    return {
+        "queries": n,
+        f"recall@{k}": round(hits / n, 3),
+        "mrr": round(sum(reciprocal_ranks) / n, 3),
+        "timestamp_hit@1": round(ts_hits / n, 3),
+        "title_hit@1": round(title_hits / n, 3),
+        "context_chars": round(sum(context_chars) / n),
+        "chunks": round(sum(chunk_counts) / n, 2),
+        "prompt_tokens": round(sum(prompt_tokens) / n),
+        "llm_calls": round(llm_calls / n, 3),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "est_answer_ms": round(sum(answer_ms) / n)
+    }
+
+
+def print_table(results):
+    columns = list(next(iter(results.values())).keys())
+    print(f"{'retriever':<12}" + "".join(f"{c:>17}" for c in columns))
+    for name, row in results.items():
+        print(f"{name:<12}" + "".join(f"{row[c]:>17}" for c in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline retrieval benchmark over the bundled lectures.")
+    parser.add_argument("--k", type=int, default=TOP_K)
+    parser.add_argument("--retrievers", nargs="+", default=list(RETRIEVERS), choices=list(RETRIEVERS))
+    parser.add_argument("--questions", default=QUESTIONS_FILE)
+    parser.add_argument("--corpus", default=CORPUS_DIR)
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--llm-ms", type=float, default=1500.0,
+                        help="Estimated LLM time per answer, excluding prompt prefill")
+    parser.add_argument("--prefill-ms-per-1k", type=float, default=60.0,
+                        help="Estimated LLM time per 1k prompt tokens")
+    args = parser.parse_args()
+
+    corpus = BenchCorpus(args.corpus)
+    questions = load_questions(args.questions)
+    print(f"Indexed {len(corpus.ids)} chunks, {len(questions)} questions, k={args.k}\n")
+
+    results = {
+        name: evaluate(RETRIEVERS[name](corpus), questions, args.k,
+                       llm_ms=args.llm_ms, prefill_ms_per_1k=args.prefill_ms_per_1k)
+        for name in args.retrievers
+    }
+    print_table(results)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import hashlib
+import math
+import re
+
+# ============================================================
+# DETERMINISTIC OFFLINE EMBEDDINGS
+# ============================================================
+
+STUB_DIM = 384
+
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "do", "does", "for", "from",
+    "how", "i", "in", "is", "it", "of", "on", "or", "so", "that", "the", "this",
+    "to", "we", "what", "when", "where", "which", "why", "with", "you", "your"
+}
+
+
+def _tokens(text):
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    # Stopword-only segments ("What will happen?") keep their words so no vector is all zeros
+    words = [w for w in words if w not in _STOPWORDS] or words or ["<empty>"]
+    return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+
+def _bucket(token, dim):
+    digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+    value = int.from_bytes(digest, "little")
+    return value % dim, 1.0 if (value >> 63) else -1.0
+
+
+def stub_embed(texts, dim=STUB_DIM):
+    """
+    Signed feature-hashing of unigrams + bigrams, L2-normalized.
+
+    Same text always gives the same vector on every machine, and lexical
+    overlap gives cosine similarity, so retrieval quality is meaningful
+    without any model or network access.
+    """
+    vectors = []
+    for text in texts:
+        vec = [0.0] * dim
+        for token in _tokens(text):
+            index, sign = _bucket(token, dim)
+            vec[index] += sign
+        norm = math.sqrt(sum(x * x for x in vec)) or 1.0
+        vectors.append([x / norm for x in vec])
+    return vectors
@@ -0,0 +1,61 @@
+"""
+Real-time factor of the local faster-whisper backend per worker count.
+
+For each --workers value a fresh Transcriber is started and warmed up
+(model load is reported separately), then the audio file is transcribed.
+RTF = wall time / audio duration; below 1.0 is faster than real time.
+
+    python -m benchmarks.transcribe_benchmark
+    python -m benchmarks.transcribe_benchmark --audio "audios/Naive Bayes.mp3" --workers 1 2 4 --model base
+"""
+import argparse
+import os
+import time
+
+from local_transcribe import Transcriber, default_workers
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+AUDIO_FILE = os.path.join(REPO_DIR, "audios", "Bias And Variance .mp3")
+
+
+def run(audio, workers, model, compute_type):
+    start = time.perf_counter()
+    with Transcriber(workers=workers, model=model, compute_type=compute_type) as transcriber:
+        transcriber.warm()
+        load_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        segments, duration = transcriber.transcribe(audio)
+        elapsed = time.perf_counter() - start
+
+    return {
+        "load_s": load_s,
+        "audio_s": duration,
+        "wall_s": elapsed,
+        "rtf": elapsed / duration if duration else 0.0,
+        "segments": len(segments)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local transcription real-time factor per core count.")
+    parser.add_argument("--audio", default=AUDIO_FILE)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, default_workers()}))
+    parser.add_argument("--model", default=os.getenv("RAG_WHISPER_MODEL", "small"))
+    parser.add_argument("--compute-type", default=os.getenv("RAG_WHISPER_COMPUTE_TYPE", "int8"))
+    args = parser.parse_args()
+
+    print(f"{os.path.basename(args.audio)}  model={args.model} ({args.compute_type})  "
+          f"cpus={os.cpu_count()}\n")
+    columns = ["load_s", "audio_s", "wall_s", "rtf", "segments"]
+    print(f"{'workers':<10}" + "".join(f"{c:>12}" for c in columns))
+    for workers in args.workers:
+        row = run(args.audio, workers, args.model, args.compute_type)
+        print(f"{workers:<10}" + "".join(
+            f"{row[c]:>12}" if c == "segments" else f"{row[c]:>12.2f}" for c in columns
+        ))
+
+
+if __name__ == "__main__":
+    main()
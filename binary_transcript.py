@@ -0,0 +1,226 @@
+import argparse
+import glob
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+
+# ============================================================
+# FORMAT
+# ============================================================
+# Columnar, little-endian, memory-mappable transcript (".rtx"):
+#
+#   header   magic "RTX1", version u16, reserved u16, count u32, meta_len u32
+#   meta     UTF-8 JSON with lecture-level fields (title, number, ...), stored once
+#   starts   float64[count]       segment start times (s), ascending
+#   ends     float64[count]       segment end times (s)
+#   offsets  uint32[count + 1]    byte offsets of each segment's text in the blob
+#   text     UTF-8 blob           all segment texts back to back
+#
+# Times stay float64 so they compare equal to the start / end stored in
+# Chroma metadata. Each section begins on an 8-byte boundary so the arrays
+# can be viewed in place with numpy. A segment (or the segment playing at a timestamp) is
+# found with O(1) / O(log n) work and reads only its own bytes.
+
+MAGIC = b"RTX1"
+VERSION = 1
+EXTENSION = ".rtx"
+_HEADER = struct.Struct("<4sHHII")
+
+
+def _pad(n):
+    return (-n) % 8
+
+
+def encode(segments, meta):
+    """Bytes of a .rtx file for [[start, end, text], ...] in playback order."""
+    texts = [s[2].encode("utf-8") for s in segments]
+    offsets = np.zeros(len(texts) + 1, dtype="<u4")
+    np.cumsum([len(t) for t in texts], out=offsets[1:])
+    meta_bytes = json.dumps(meta, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    parts = [_HEADER.pack(MAGIC, VERSION, 0, len(texts), len(meta_bytes)), meta_bytes,
+             b"\0" * _pad(_HEADER.size + len(meta_bytes))]
+    parts.append(np.asarray([s[0] for s in segments], dtype="<f8").tobytes())
+    parts.append(np.asarray([s[1] for s in segments], dtype="<f8").tobytes())
+    parts.append(offsets.tobytes())
+    parts.append(b"\0" * _pad(offsets.nbytes))
+    parts.extend(texts)
+    return b"".join(parts)
+
+
+def write(path, segments, meta):
+    """Atomically write segments + lecture metadata to path."""
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(encode(segments, meta))
+    os.replace(tmp, path)
+
+
+# ============================================================
+# MEMORY-MAPPED READER
+# ============================================================
+
+class MappedTranscript:
+    """
+    Read-only view of a .rtx file. Behaves like the [[start, end, text], ...]
+    list the JSON transcripts used to be (len, indexing, slicing, iteration),
+    but only touches the pages it reads. starts / ends are numpy views.
+
+    The mapping pins the file (Windows cannot replace or delete it, Linux
+    keeps serving the old inode), so close it, or use it as a context
+    manager, rather than keeping it around; copy what must outlive it.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+        self.starts = self.ends = self.offsets = None
+        try:
+            if len(self._buffer) < _HEADER.size:
+                raise ValueError(f"{path}: not a transcript file")
+            magic, version, _, count, meta_len = _HEADER.unpack_from(self._buffer, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path}: not a version {VERSION} transcript file")
+
+            pos = _HEADER.size
+            self.meta = json.loads(bytes(self._buffer[pos:pos + meta_len]).decode("utf-8"))
+            pos += meta_len + _pad(_HEADER.size + meta_len)
+
+            self.starts = np.frombuffer(self._buffer, dtype="<f8", count=count, offset=pos)
+            pos += 8 * count
+            self.ends = np.frombuffer(self._buffer, dtype="<f8", count=count, offset=pos)
+            pos += 8 * count
+            self.offsets = np.frombuffer(self._buffer, dtype="<u4", count=count + 1, offset=pos)
+            pos += self.offsets.nbytes + _pad(self.offsets.nbytes)
+        except Exception:
+            # A truncated or foreign file must not keep its mapping open
+            self.close()
+            raise
+        self._text_base = pos
+        self.count = count
+
+    def close(self):
+        """Release the mapping; starts / ends / offsets are gone afterwards."""
+        self.starts = self.ends = self.offsets = None
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def title(self):
+        return self.meta.get("title")
+
+    def text(self, i):
+        lo, hi = int(self.offsets[i]), int(self.offsets[i + 1])
+        return bytes(self._buffer[self._text_base + lo:self._text_base + hi]).decode("utf-8")
+
+    def segment(self, i):
+        return [float(self.starts[i]), float(self.ends[i]), self.text(i)]
+
+    def index_at(self, t):
+        """Ordinal of the segment playing at time t (the last one starting at or before t)."""
+        return max(0, int(np.searchsorted(self.starts, t, side="right")) - 1)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self.segment(i) for i in range(*key.indices(self.count))]
+        if key < 0:
+            key += self.count
+        if not 0 <= key < self.count:
+            raise IndexError(key)
+        return self.segment(key)
+
+    def __iter__(self):
+        return (self.segment(i) for i in range(self.count))
+
+    def __bool__(self):
+        return self.count > 0
+
+    def full_text(self, sep="\n"):
+        return sep.join(self.text(i) for i in range(self.count))
+
+
+# ============================================================
+# CONVERTERS
+# ============================================================
+
+def chunks_to_segments(chunks):
+    """Chunk dicts (any order) → (segments in playback order, lecture metadata)."""
+    ordered = sorted((c for c in chunks if c["text"]), key=lambda c: (c["start"], c["end"]))
+    meta = {
+        "title": ordered[0]["title"] if ordered else None,
+        "number": ordered[0]["number"] if ordered else None
+    }
+    return [[c["start"], c["end"], c["text"]] for c in ordered], meta
+
+
+def read_chunks(path):
+    """Chunk dicts from a .rtx file, in the same shape as the chunk JSON files."""
+    with MappedTranscript(path) as transcript:
+        title, number = transcript.meta.get("title"), transcript.meta.get("number")
+        return [{"number": number, "title": title, "start": s, "end": e, "text": t} for s, e, t in transcript]
+
+
+def json_to_rtx(json_path, out_dir=None):
+    with open(json_path, "r", encoding="utf-8") as f:
+        segments, meta = chunks_to_segments(json.load(f)["chunks"])
+    name = os.path.splitext(os.path.basename(json_path))[0] + EXTENSION
+    out = os.path.join(out_dir or os.path.dirname(json_path), name)
+    write(out, segments, meta)
+    return out
+
+
+def rtx_to_json(rtx_path, out_dir=None):
+    name = os.path.splitext(os.path.basename(rtx_path))[0] + ".json"
+    out = os.path.join(out_dir or os.path.dirname(rtx_path), name)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump({"chunks": read_chunks(rtx_path)}, f, ensure_ascii=False)
+    return out
+
+
+def _expand(paths, extension):
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, f"*{extension}"))))
+        else:
+            files.append(path)
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert chunk JSON transcripts to/from the .rtx format.")
+    parser.add_argument("command", choices=["to-rtx", "to-json"])
+    parser.add_argument("paths", nargs="+", help="Files or folders (e.g. jsons/)")
+    parser.add_argument("--out", help="Output folder (default: next to each input)")
+    args = parser.parse_args()
+
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+    convert, extension = (json_to_rtx, ".json") if args.command == "to-rtx" else (rtx_to_json, EXTENSION)
+    total_in = total_out = 0
+    for path in _expand(args.paths, extension):
+        out = convert(path, args.out)
+        size_in, size_out = os.path.getsize(path), os.path.getsize(out)
+        total_in += size_in
+        total_out += size_out
+        print(f"{size_in / 1024:>9.1f} KB → {size_out / 1024:>8.1f} KB  {os.path.basename(out)}")
+    if total_in:
+        print(f"{total_in / 1024:>9.1f} KB → {total_out / 1024:>8.1f} KB  total ({total_out / total_in:.0%})")
+
+
+if __name__ == "__main__":
+    main()
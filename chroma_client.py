@@ -4,11 +4,86 @@ import chromadb
 CHROMA_DIR = os.path.join(os.path.expanduser("~"), "chroma_store")
 os.makedirs(CHROMA_DIR, exist_ok=True)
 
-def get_chroma():
-    client = chromadb.PersistentClient(
+# Vectors from different embedding backends are not comparable;
+# use a separate collection per backend (e.g. "lecture_embeddings_bge_m3").
+COLLECTION_NAME = os.getenv("RAG_COLLECTION", "lecture_embeddings")
+
+# HNSW parameters applied when a collection is created. Unset ones keep
+# Chroma's defaults (space=l2, M=16, ef_construction=100, ef_search=10).
+# An existing collection keeps the parameters it was built with until
+# `python chroma_maintenance.py rebuild` recreates it.
+HNSW_ENV = {
+    "hnsw:space": ("RAG_HNSW_SPACE", str),
+    "hnsw:M": ("RAG_HNSW_M", int),
+    "hnsw:construction_ef": ("RAG_HNSW_EF_CONSTRUCTION", int),
+    "hnsw:search_ef": ("RAG_HNSW_EF_SEARCH", int),
+}
+
+
+def hnsw_metadata():
+    """Collection metadata for the configured HNSW parameters, or None if none are set."""
+    metadata = {}
+    for key, (env, cast) in HNSW_ENV.items():
+        if os.getenv(env):
+            metadata[key] = cast(os.getenv(env))
+    return metadata or None
+
+
+def get_client():
+    return chromadb.PersistentClient(
         path=CHROMA_DIR,
         tenant="default_tenant",
         database="default_database"
     )
-    collection = client.get_or_create_collection(name="lecture_embeddings")
+
+
+def get_chroma(name=COLLECTION_NAME):
+    client = get_client()
+    try:
+        # get_or_create would overwrite the stored HNSW metadata of an existing
+        # collection without rebuilding its index
+        collection = client.get_collection(name=name)
+    except ValueError:
+        collection = client.get_or_create_collection(name=name, metadata=hnsw_metadata())
     return client, collection
+
+
+# ============================================================
+# PAGINATED READS
+# ============================================================
+# Full-collection reads go through these so memory is bounded by one page,
+# not by the corpus. Offset paging: records deleted mid-scan can shift a
+# page, so use them for reporting/listing, not as a consistent snapshot.
+
+PAGE_SIZE = int(os.getenv("RAG_CHROMA_PAGE_SIZE", "1000"))
+
+
+def iter_pages(collection, include=("metadatas",), where=None, page_size=PAGE_SIZE):
+    """Yield collection.get() results of at most page_size records each."""
+    offset = 0
+    while True:
+        page = collection.get(where=where, include=list(include), limit=page_size, offset=offset)
+        if not page["ids"]:
+            return
+        yield page
+        offset += len(page["ids"])
+
+
+def iter_records(collection, include=("metadatas",), where=None, page_size=PAGE_SIZE):
+    """Yield one dict per record: {"id", "metadata", "document", "embedding"} as included."""
+    singular = {"metadatas": "metadata", "documents": "document", "embeddings": "embedding"}
+    for page in iter_pages(collection, include, where, page_size):
+        for i, id in enumerate(page["ids"]):
+            record = {"id": id}
+            for key in include:
+                record[singular[key]] = page[key][i]
+            yield record
+
+
+def lecture_titles(collection):
+    """Distinct lecture titles, sorted, streamed a page at a time."""
+    return sorted({r["metadata"]["title"] for r in iter_records(collection)})
+
+
+def has_lecture(collection, title):
+    return bool(collection.get(where={"title": title}, include=[], limit=1)["ids"])
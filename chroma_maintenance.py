@@ -0,0 +1,231 @@
+"""
+Offline maintenance for the Chroma collection.
+
+    python chroma_maintenance.py stats
+    python chroma_maintenance.py rebuild --M 32 --ef-construction 200 --ef-search 64
+    python chroma_maintenance.py rebuild --space cosine --collection lecture_embeddings_bge_m3
+
+`rebuild` copies every record into a fresh collection built with the given
+HNSW parameters (unset ones come from RAG_HNSW_* or the current collection).
+It then swaps that collection in under the original name and VACUUMs
+chroma.sqlite3. This drops the tombstones that delete_lecture and
+reindex_lecture leave in the index. Stop the app and the RAG service first.
+
+Repeated delete/re-add cycles can also leave records whose vector is
+missing from the HNSW segment. Those chunks never show up in search.
+`stats` counts them as missing_vectors. `rebuild --reembed-missing`
+re-embeds them from their stored text with the configured backend.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import time
+
+import numpy as np
+
+from chroma_client import CHROMA_DIR, COLLECTION_NAME, PAGE_SIZE, get_client, hnsw_metadata, iter_pages
+from metrics import percentile
+
+SQLITE_FILE = os.path.join(CHROMA_DIR, "chroma.sqlite3")
+
+
+# ============================================================
+# INSPECTION
+# ============================================================
+
+def _dir_bytes(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+    return total
+
+
+def vector_segment_dir(collection):
+    """Folder holding the collection's HNSW files (link_lists.bin, index_metadata.pickle...)."""
+    with sqlite3.connect(f"file:{SQLITE_FILE}?mode=ro", uri=True) as db:
+        row = db.execute(
+            "SELECT id FROM segments WHERE collection = ? AND scope = 'VECTOR'",
+            (str(collection.id),)
+        ).fetchone()
+    return os.path.join(CHROMA_DIR, row[0]) if row else None
+
+
+def read_embeddings(collection, ids):
+    """Vectors for ids (None where the HNSW segment has lost the record)."""
+    vectors = []
+    for i in range(0, len(ids), PAGE_SIZE):
+        page_ids = ids[i:i + PAGE_SIZE]
+        try:
+            page = collection.get(ids=page_ids, include=["embeddings"])
+            found = dict(zip(page["ids"], page["embeddings"]))
+            if len(found) == len(page_ids):
+                vectors.extend(found[id] for id in page_ids)
+                continue
+        except IndexError:
+            # Chroma's get_vectors fails on the whole page if any id is missing
+            pass
+        for id in page_ids:
+            try:
+                found = collection.get(ids=[id], include=["embeddings"])["embeddings"]
+            except IndexError:
+                found = None
+            vectors.append(found[0] if found else None)
+    return vectors
+
+
+def measure(collection, queries=50, k=5):
+    """Size on disk, query latency and recall@k of the index against exact search."""
+    segment_dir = vector_segment_dir(collection)
+    stats = {
+        "count": collection.count(),
+        "index_bytes": _dir_bytes(segment_dir) if segment_dir else 0,
+        "sqlite_bytes": os.path.getsize(SQLITE_FILE) if os.path.exists(SQLITE_FILE) else 0,
+    }
+    if stats["count"] == 0:
+        return stats
+
+    ids = [id for page in iter_pages(collection, []) for id in page["ids"]]
+    vectors = read_embeddings(collection, ids)
+    present = [i for i, v in enumerate(vectors) if v is not None]
+    stats["missing_vectors"] = len(ids) - len(present)
+    if not present:
+        return stats
+
+    ids = [ids[i] for i in present]
+    matrix = np.asarray([vectors[i] for i in present], dtype=np.float32)
+    sample = random.Random(0).sample(range(len(matrix)), min(queries, len(matrix)))
+    space = (collection.metadata or {}).get("hnsw:space", "l2")
+
+    norms = np.linalg.norm(matrix, axis=1) + 1e-12
+    n = min(k, len(matrix))
+
+    latencies, recalls = [], []
+    for i in sample:
+        start = time.perf_counter()
+        result = collection.query(query_embeddings=[matrix[i].tolist()], n_results=n)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        # Distances in Chroma's convention; hits are compared by distance so
+        # duplicate chunks ("Thank you.") tie instead of counting as misses
+        if space == "l2":
+            exact = ((matrix - matrix[i]) ** 2).sum(axis=1)
+        elif space == "cosine":
+            exact = 1 - (matrix @ matrix[i]) / (norms * norms[i])
+        else:
+            exact = 1 - matrix @ matrix[i]
+        kth = np.partition(exact, n - 1)[n - 1]
+        recalls.append(sum(d <= kth + 1e-4 for d in result["distances"][0]) / n)
+
+    stats.update({
+        "query_p50_ms": percentile(latencies, 50),
+        "query_p95_ms": percentile(latencies, 95),
+        f"recall@{k}": sum(recalls) / len(recalls),
+    })
+    return stats
+
+
+def print_stats(before, after=None):
+    print(f"{'':<16}{'before':>16}" + (f"{'after':>16}" if after else ""))
+    for key, value in before.items():
+        line = f"{key:<16}{_fmt(key, value):>16}"
+        if after:
+            line += f"{_fmt(key, after.get(key)):>16}"
+        print(line)
+
+
+def _fmt(key, value):
+    if value is None:
+        return "-"
+    if key.endswith("_bytes"):
+        return f"{value / 1024:.1f} KB"
+    if isinstance(value, float):
+        return f"{value:.3f}"
+    return str(value)
+
+
+# ============================================================
+# REBUILD
+# ============================================================
+
+def rebuild(client, name, params, reembed_missing=False):
+    old = client.get_collection(name=name)
+    metadata = {**(old.metadata or {}), **(hnsw_metadata() or {}), **params}
+
+    tmp_name = f"{name}__rebuild"
+    try:
+        client.delete_collection(name=tmp_name)
+    except ValueError:
+        pass
+    new = client.create_collection(name=tmp_name, metadata=metadata)
+
+    # Copied a page at a time so memory stays flat however large the store is
+    for page in iter_pages(old, ["documents", "metadatas"]):
+        embeddings = read_embeddings(old, page["ids"])
+        missing = [i for i, v in enumerate(embeddings) if v is None]
+        if missing and not reembed_missing:
+            client.delete_collection(name=tmp_name)
+            raise RuntimeError(f"Records with no vector in the index (e.g. {page['ids'][missing[0]]}); "
+                               "rerun with --reembed-missing to embed them again")
+        if missing:
+            from preprocess_json_uploaded import create_embeddings_batch
+            vectors = create_embeddings_batch([page["documents"][i] for i in missing])
+            for i, vector in zip(missing, vectors):
+                embeddings[i] = vector
+
+        new.add(ids=page["ids"], embeddings=embeddings,
+                documents=page["documents"], metadatas=page["metadatas"])
+
+    if new.count() != old.count():
+        raise RuntimeError(f"Copied {new.count()} of {old.count()} records; '{name}' left untouched")
+
+    client.delete_collection(name=name)
+    # If this step fails the data is safe in '<name>__rebuild'; rename it by hand
+    new.modify(name=name)
+    return client.get_collection(name=name)
+
+
+def vacuum():
+    with sqlite3.connect(SQLITE_FILE) as db:
+        db.execute("VACUUM")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chroma collection stats and offline HNSW rebuild.")
+    parser.add_argument("command", choices=["stats", "rebuild"])
+    parser.add_argument("--collection", default=COLLECTION_NAME)
+    parser.add_argument("--space", choices=["l2", "cosine", "ip"])
+    parser.add_argument("--M", type=int)
+    parser.add_argument("--ef-construction", type=int)
+    parser.add_argument("--ef-search", type=int)
+    parser.add_argument("--reembed-missing", action="store_true",
+                        help="Embed records whose vector was lost instead of aborting")
+    parser.add_argument("--queries", type=int, default=50, help="Sampled queries for latency/recall")
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    client = get_client()
+    collection = client.get_collection(name=args.collection)
+    print(f"Collection '{args.collection}'  metadata: {collection.metadata}\n")
+    before = measure(collection, args.queries, args.k)
+
+    if args.command == "stats":
+        print_stats(before)
+        return
+
+    params = {
+        key: value for key, value in {
+            "hnsw:space": args.space,
+            "hnsw:M": args.M,
+            "hnsw:construction_ef": args.ef_construction,
+            "hnsw:search_ef": args.ef_search,
+        }.items() if value is not None
+    }
+    collection = rebuild(client, args.collection, params, args.reembed_missing)
+    vacuum()
+    print(f"Rebuilt with metadata: {collection.metadata}\n")
+    print_stats(before, measure(collection, args.queries, args.k))
+
+
+if __name__ == "__main__":
+    main()
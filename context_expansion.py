@@ -0,0 +1,118 @@
+import bisect
+import os
+import threading
+from dotenv import load_dotenv
+from transcripts import get_transcript
+
+load_dotenv()
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+# Seconds of transcript added before and after each retrieved segment (0 disables)
+CONTEXT_WINDOW_S = float(os.getenv("RAG_CONTEXT_WINDOW_S", "6"))
+
+
+# ============================================================
+# PER-LECTURE INTERVAL INDEX
+# ============================================================
+
+class LectureTimeline:
+    """A lecture's ordered segments plus their sorted start times, for bisect lookups."""
+
+    def __init__(self, segments):
+        # Timelines are cached, so they hold copies: a mapped transcript is
+        # read once and closed rather than pinning its file
+        mapped = getattr(segments, "starts", None) is not None
+        self.starts = segments.starts.tolist() if mapped else [s[0] for s in segments]
+        self.segments = segments[:]
+        if hasattr(segments, "close"):
+            segments.close()
+
+    def window(self, start, end, pad):
+        """Index range [lo, hi) of the segments overlapping [start - pad, end + pad]."""
+        lo = max(0, bisect.bisect_right(self.starts, start - pad) - 1)
+        if lo < len(self.segments) - 1 and self.segments[lo][1] <= start - pad:
+            lo += 1
+        hi = bisect.bisect_left(self.starts, end + pad)
+        return lo, min(len(self.segments), max(hi, lo + 1))
+
+
+# ============================================================
+# EXPANSION
+# ============================================================
+
+class ContextExpander:
+    """
+    Widens retrieved segments to ±pad_s seconds of surrounding transcript.
+
+    Windows that overlap or run on without a pause are merged, so each
+    stretch of transcript is sent to the LLM once. The merged window keeps
+    the rank of its best hit. Timelines are loaded lazily per lecture and
+    cached until invalidate(title).
+    """
+
+    def __init__(self, pad_s=CONTEXT_WINDOW_S, collection=None, loader=get_transcript):
+        self.pad_s = pad_s
+        self.collection = collection
+        self.loader = loader
+        self._timelines = {}
+        self._lock = threading.Lock()
+
+    def timeline(self, title):
+        with self._lock:
+            timeline = self._timelines.get(title)
+        if timeline is None:
+            segments = self.loader(title, self.collection)
+            if not segments:
+                return None
+            timeline = LectureTimeline(segments)
+            with self._lock:
+                self._timelines[title] = timeline
+        return timeline
+
+    def invalidate(self, title):
+        with self._lock:
+            self._timelines.pop(title, None)
+
+    def expand(self, hits):
+        """Return context windows (same keys as the hits) in hit-rank order."""
+        if self.pad_s <= 0 or not hits:
+            return hits
+
+        # title -> (timeline, [(lo, hi, rank, hit)])
+        ranges, windows = {}, []
+        for rank, hit in enumerate(hits):
+            timeline = self.timeline(hit["title"])
+            if timeline is None:
+                windows.append((rank, hit))
+                continue
+            lo, hi = timeline.window(hit["start"], hit["end"], self.pad_s)
+            ranges.setdefault(hit["title"], (timeline, []))[1].append((lo, hi, rank, hit))
+
+        for title, (timeline, spans) in ranges.items():
+            segments = timeline.segments
+            spans.sort(key=lambda s: (s[0], s[1]))
+            merged = [list(spans[0])]
+            for lo, hi, rank, hit in spans[1:]:
+                current = merged[-1]
+                # Overlapping, or back-to-back with no pause between them
+                if lo < current[1] or (lo == current[1] and segments[lo][0] - segments[lo - 1][1] < 1.0):
+                    current[1] = max(current[1], hi)
+                    if rank < current[2]:
+                        current[2], current[3] = rank, hit
+                else:
+                    merged.append([lo, hi, rank, hit])
+
+            for lo, hi, rank, hit in merged:
+                windows.append((rank, {
+                    "title": title,
+                    "number": hit["number"],
+                    "start": segments[lo][0],
+                    "end": segments[hi - 1][1],
+                    "text": "".join(s[2] for s in segments[lo:hi]).strip()
+                }))
+
+        windows.sort(key=lambda w: w[0])
+        return [w for _, w in windows]
@@ -0,0 +1,298 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+from dotenv import load_dotenv
+
+from chroma_client import COLLECTION_NAME
+
+load_dotenv()
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+# Two-level index for "All Lectures" search. Level 1: each lecture is
+# summarised by its centroid plus a few representative vectors (one per
+# topic cluster); a query is scored against those first. Level 2: the
+# chunk vectors of each lecture in their own matrix file, so only
+# the best ROUTE_LECTURES lectures are searched (exactly). Cost then grows
+# with the number of lectures, not the number of chunks. Kept per
+# collection, since each collection may hold another backend's vectors.
+
+ROUTES_DIR = os.path.join(os.getenv(
+    "RAG_ROUTES_DIR",
+    os.path.join(os.path.expanduser("~"), "rag_data", "routes")
+), COLLECTION_NAME)
+
+LECTURE_ROUTING = os.getenv("RAG_LECTURE_ROUTING", "1") == "1"
+ROUTE_LECTURES = int(os.getenv("RAG_ROUTE_LECTURES", "2"))
+REPRESENTATIVES = int(os.getenv("RAG_ROUTE_REPRESENTATIVES", "4"))
+KMEANS_ITERATIONS = 8
+
+
+# ============================================================
+# LECTURE VECTORS
+# ============================================================
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+def lecture_vectors(embeddings, representatives=REPRESENTATIVES):
+    """
+    Unit-length centroid followed by up to `representatives` k-means
+    centroids of a lecture's chunk embeddings, as a float32 matrix.
+    """
+    vectors = _normalize(np.asarray(embeddings, dtype=np.float32))
+    centroid = _normalize(vectors.mean(axis=0, keepdims=True))
+    k = min(representatives, len(vectors))
+    if k <= 1:
+        return centroid
+
+    # Farthest-point seeding, then a few Lloyd iterations on cosine similarity
+    seeds = [int(np.argmin(vectors @ centroid[0]))]
+    for _ in range(k - 1):
+        seeds.append(int(np.argmin((vectors @ vectors[seeds].T).max(axis=1))))
+    means = vectors[seeds]
+    for _ in range(KMEANS_ITERATIONS):
+        assignment = (vectors @ means.T).argmax(axis=1)
+        means = _normalize(np.stack([
+            vectors[assignment == i].mean(axis=0) if np.any(assignment == i) else means[i]
+            for i in range(k)
+        ]))
+    return np.vstack([centroid, means]).astype(np.float32)
+
+
+# ============================================================
+# STORAGE
+# ============================================================
+
+def routes_path(title):
+    return os.path.join(ROUTES_DIR, f"{title}.npy")
+
+
+def chunks_path(title):
+    return os.path.join(ROUTES_DIR, "chunks", f"{title}.npy")
+
+
+def chunk_ids_path(title):
+    return os.path.join(ROUTES_DIR, "chunks", f"{title}.json")
+
+
+def _save_array(path, array):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp, path)
+
+
+def save_routes(title, vectors):
+    _save_array(routes_path(title), vectors)
+
+
+def save_chunks(title, ids, embeddings):
+    """A lecture's chunk ids and unit-length vectors, row-aligned."""
+    tmp = chunk_ids_path(title) + ".tmp"
+    os.makedirs(os.path.dirname(tmp), exist_ok=True)
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(list(ids), f, ensure_ascii=False)
+    os.replace(tmp, chunk_ids_path(title))
+    _save_array(chunks_path(title), _normalize(np.asarray(embeddings, dtype=np.float32)))
+
+
+def load_chunks(title):
+    """
+    (ids, vectors) of a lecture, or None. Read into memory rather than
+    mapped: a lecture's matrix is small, and a cached mapping would keep
+    the file from being replaced or deleted on Windows.
+    """
+    try:
+        with open(chunk_ids_path(title), "r", encoding="utf-8") as f:
+            ids = json.load(f)
+        return ids, np.load(chunks_path(title))
+    except FileNotFoundError:
+        return None
+
+
+def load_routes(title):
+    try:
+        return np.load(routes_path(title))
+    except FileNotFoundError:
+        return None
+
+
+def delete_routes(title):
+    for path in (routes_path(title), chunks_path(title), chunk_ids_path(title)):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def index_lecture(title, ids, embeddings):
+    """
+    Ingest stage: store a lecture's routing vectors and its chunk matrix.
+    A lecture without vectors gets an empty routing file, so it is known to
+    the router but never routed to (vector search cannot find it either).
+    """
+    if not len(embeddings):
+        save_routes(title, np.zeros((0, 0), dtype=np.float32))
+        return 0
+    save_chunks(title, ids, embeddings)
+    vectors = lecture_vectors(embeddings)
+    save_routes(title, vectors)
+    return len(vectors)
+
+
+# ============================================================
+# ROUTING
+# ============================================================
+
+class LectureRouter:
+    """
+    Every lecture's routing vectors stacked in one matrix, so scoring a
+    query is a single (lectures × representatives) matrix product. Re-scans
+    the folder at most every refresh_s so lectures indexed by another
+    process show up without a restart. Vectors of a different dimension
+    than the query (another embedding backend) count as missing.
+    """
+
+    def __init__(self, refresh_s=5.0):
+        self.refresh_s = refresh_s
+        self._lock = threading.Lock()
+        self._mtimes = {}
+        self._vectors = {}        # lecture title -> routing vectors (may be empty)
+        self._chunks = {}         # lecture title -> (ids, chunk vectors), loaded on first search
+        self._titles = []
+        self._matrix = None
+        self._owners = None       # row -> index into _titles
+        self._dim = None          # width of _matrix
+        self._checked = 0.0
+
+    def _refresh(self):
+        now = time.monotonic()
+        if now - self._checked < self.refresh_s:
+            return
+        self._checked = now
+
+        mtimes = {}
+        if os.path.isdir(ROUTES_DIR):
+            for entry in os.scandir(ROUTES_DIR):
+                if entry.name.endswith(".npy"):
+                    mtimes[entry.name[:-4]] = entry.stat().st_mtime
+        if mtimes == self._mtimes:
+            return
+
+        vectors = {t: self._vectors[t] if self._mtimes.get(t) == m else load_routes(t)
+                   for t, m in mtimes.items()}
+        vectors = {t: v for t, v in vectors.items() if v is not None}
+        # Files left by another backend have another width and cannot be stacked;
+        # keep the most common one
+        dims = Counter(v.shape[1] for v in vectors.values() if len(v))
+        self._dim = dims.most_common(1)[0][0] if dims else None
+        self._titles = sorted(t for t, v in vectors.items() if len(v) and v.shape[1] == self._dim)
+        if self._titles:
+            self._matrix = np.vstack([vectors[t] for t in self._titles])
+            self._owners = np.concatenate([np.full(len(vectors[t]), i) for i, t in enumerate(self._titles)])
+        else:
+            self._matrix = self._owners = None
+        self._chunks = {t: c for t, c in self._chunks.items() if self._mtimes.get(t) == mtimes.get(t)}
+        self._mtimes, self._vectors = mtimes, vectors
+
+    def invalidate(self, title=None):
+        with self._lock:
+            self._checked = 0.0
+
+    def known(self, dim=None):
+        """
+        Titles with a routing file, including lectures that have no vectors.
+        With dim, only those whose vectors can be compared to a query of
+        that dimension.
+        """
+        with self._lock:
+            self._refresh()
+            if dim is None:
+                return set(self._vectors)
+            return {t for t, v in self._vectors.items() if not len(v) or (self._dim == dim and t in self._titles)}
+
+    def scores(self, q_emb):
+        """[(lecture title, score)] best first; a lecture scores its best-matching vector."""
+        q = np.asarray(q_emb, dtype=np.float32)
+        with self._lock:
+            self._refresh()
+            if self._matrix is None or self._dim != len(q):
+                return []
+            matrix, owners, titles = self._matrix, self._owners, self._titles
+
+        q = q / (np.linalg.norm(q) or 1.0)
+        best = np.full(len(titles), -np.inf, dtype=np.float32)
+        np.maximum.at(best, owners, matrix @ q)
+        order = np.argsort(-best)
+        return [(titles[i], round(float(best[i]), 4)) for i in order]
+
+    def route(self, q_emb, catalog, m=ROUTE_LECTURES):
+        """
+        (titles to search, routing scores) for an "All Lectures" query, or
+        (None, scores) when every lecture should be searched: routing is
+        off, there are too few lectures to gain anything, or some lecture in
+        the catalog (indexed lecture titles) has no usable routing file yet.
+        """
+        scores = self.scores(q_emb)
+        known = self.known(len(q_emb))
+        if not LECTURE_ROUTING or len(known) <= m or set(catalog) - known:
+            return None, scores
+        return [t for t, _ in scores[:m]], scores
+
+    def _lecture_chunks(self, title):
+        with self._lock:
+            self._refresh()
+            if title not in self._chunks:
+                self._chunks[title] = load_chunks(title)
+            return self._chunks[title]
+
+    def search(self, q_emb, titles, n):
+        """
+        Exact search over the chunks of the given lectures: ([chunk id],
+        [cosine similarity]) best first, or None if a lecture has no chunk
+        matrix of the query's dimension (search Chroma instead).
+        """
+        q = np.asarray(q_emb, dtype=np.float32)
+        q = q / (np.linalg.norm(q) or 1.0)
+        ids, scores = [], []
+        for title in titles:
+            chunks = self._lecture_chunks(title)
+            if chunks is None or chunks[1].shape[1] != len(q):
+                return None
+            lecture_ids, matrix = chunks
+            similarity = matrix @ q
+            top = np.argpartition(-similarity, n - 1)[:n] if len(similarity) > n else np.arange(len(similarity))
+            ids.extend(lecture_ids[i] for i in top)
+            scores.extend(similarity[top].tolist())
+        order = np.argsort(scores)[::-1][:n]
+        return [ids[i] for i in order], [scores[i] for i in order]
+
+
+# ============================================================
+# BACKFILL CLI
+# ============================================================
+
+def backfill(titles=None):
+    """Build routing vectors for lectures indexed before this stage existed."""
+    from chroma_client import get_chroma, iter_records, lecture_titles
+    from chroma_maintenance import read_embeddings
+
+    _, collection = get_chroma()
+    for title in titles or lecture_titles(collection):
+        ids = [r["id"] for r in iter_records(collection, (), where={"title": title})]
+        # Records whose vector was lost from the index are left out
+        pairs = [(i, v) for i, v in zip(ids, read_embeddings(collection, ids)) if v is not None]
+        routes = index_lecture(title, [i for i, _ in pairs], [v for _, v in pairs])
+        print(f"{len(pairs):>5} chunks  {routes} vectors  {title}" if routes else f"   - no vectors  {title}")
+
+
+if __name__ == "__main__":
+    backfill(sys.argv[1:] or None)
@@ -0,0 +1,198 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+#
+#   RAG_LOCAL_EMBED_MODEL_DIR    folder with model.onnx + tokenizer.json
+#                                (defaults to Chroma's all-MiniLM-L6-v2 download)
+#   RAG_LOCAL_EMBED_QUANTIZE     "1" quantizes weights to int8 once and reuses the file
+#   RAG_LOCAL_EMBED_MAX_TOKENS   truncation length (256)
+#   RAG_LOCAL_EMBED_BATCH        max texts per forward pass (32)
+#   RAG_LOCAL_EMBED_WAIT_MS      how long a batch waits for more requests (5)
+#   RAG_LOCAL_EMBED_WORKERS      forward passes running at once (2)
+
+DEFAULT_MODEL_DIR = Path.home() / ".cache" / "chroma" / "onnx_models" / "all-MiniLM-L6-v2" / "onnx"
+QUANTIZED_NAME = "model.int8.onnx"
+
+
+def _env_int(name, default):
+    return int(os.getenv(name, str(default)))
+
+
+# ============================================================
+# MODEL
+# ============================================================
+
+class OnnxEmbeddingModel:
+    """Sentence-transformer style encoder: ONNX Runtime on CPU, mean pooling, L2 norm."""
+
+    def __init__(self, model_dir=None, quantize=True, max_tokens=256, threads=None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.model_dir = Path(model_dir or os.getenv("RAG_LOCAL_EMBED_MODEL_DIR") or DEFAULT_MODEL_DIR)
+        if not (self.model_dir / "model.onnx").exists() and self.model_dir == DEFAULT_MODEL_DIR:
+            _download_default_model()
+        if not (self.model_dir / "model.onnx").exists():
+            raise FileNotFoundError(f"No model.onnx in {self.model_dir}; set RAG_LOCAL_EMBED_MODEL_DIR")
+
+        self.tokenizer = Tokenizer.from_file(str(self.model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_tokens)
+        self.tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = threads or os.cpu_count() or 1
+        options.inter_op_num_threads = 1
+
+        model_path = self._quantized_path() if quantize else self.model_dir / "model.onnx"
+        self.session = ort.InferenceSession(str(model_path), sess_options=options,
+                                            providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        base = self.model_dir.parent.name if self.model_dir.name == "onnx" else self.model_dir.name
+        self.name = f"{base}{'-int8' if quantize else ''}"
+
+    def _quantized_path(self):
+        """Dynamic int8 weight quantization, done once per model folder."""
+        target = self.model_dir / QUANTIZED_NAME
+        if not target.exists():
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+            tmp = target.with_suffix(".tmp")
+            quantize_dynamic(str(self.model_dir / "model.onnx"), str(tmp), weight_type=QuantType.QInt8)
+            os.replace(tmp, target)
+        return target
+
+    def encode(self, texts):
+        """Return (vectors, token counts) for a list of texts."""
+        encodings = self.tokenizer.encode_batch(list(texts))
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+        hidden = self.session.run(None, {k: v for k, v in feeds.items() if k in self.input_names})[0]
+
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.tolist(), attention_mask.sum(axis=1).tolist()
+
+
+def _download_default_model():
+    # Chroma ships the same MiniLM export (with a checksum) for its default embedding function
+    from chromadb.utils.embedding_functions import ONNXMiniLM_L6_V2
+    ONNXMiniLM_L6_V2()._download_model_if_not_exists()
+
+
+# ============================================================
+# DYNAMIC BATCHER
+# ============================================================
+
+class DynamicBatcher:
+    """
+    Coalesces texts from concurrent callers into shared forward passes.
+
+    A collector thread takes the first queued text, waits up to max_wait_ms
+    for more (up to max_batch) and hands the batch to a bounded pool. While
+    every worker is busy the collector keeps filling the next batch, so
+    batches grow with load instead of the queue of forward passes.
+    """
+
+    def __init__(self, model, max_batch=32, max_wait_ms=5.0, workers=2):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._slots = threading.BoundedSemaphore(workers)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="local-embed")
+        threading.Thread(target=self._collect, name="local-embed-batcher", daemon=True).start()
+
+    def submit(self, texts):
+        """One Future per text, each resolving to (vector, tokens)."""
+        futures = []
+        for text in texts:
+            future = Future()
+            self._queue.put((text, future))
+            futures.append(future)
+        return futures
+
+    def embed(self, texts):
+        """Blocking helper: (vectors, usage) in input order."""
+        results = [f.result() for f in self.submit(texts)]
+        return [v for v, _ in results], {"input_tokens": sum(t for _, t in results)}
+
+    def _collect(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            self._slots.acquire()
+            # Pick up whatever arrived while waiting for a free worker
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._pool.submit(self._run, batch)
+
+    def _run(self, batch):
+        try:
+            live = [(text, f) for text, f in batch if f.set_running_or_notify_cancel()]
+            if not live:
+                return
+            try:
+                vectors, tokens = self.model.encode([text for text, _ in live])
+            except Exception as e:
+                for _, future in live:
+                    future.set_exception(e)
+                return
+            for (_, future), vector, count in zip(live, vectors, tokens):
+                future.set_result((vector, count))
+        finally:
+            self._slots.release()
+
+
+# ============================================================
+# PROCESS-WIDE ENGINE
+# ============================================================
+# The model is loaded once per process and shared by every backend instance.
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            workers = _env_int("RAG_LOCAL_EMBED_WORKERS", 2)
+            model = OnnxEmbeddingModel(
+                quantize=os.getenv("RAG_LOCAL_EMBED_QUANTIZE", "1") == "1",
+                max_tokens=_env_int("RAG_LOCAL_EMBED_MAX_TOKENS", 256),
+                threads=max(1, (os.cpu_count() or 1) // workers)
+            )
+            _engine = DynamicBatcher(
+                model,
+                max_batch=_env_int("RAG_LOCAL_EMBED_BATCH", 32),
+                max_wait_ms=float(os.getenv("RAG_LOCAL_EMBED_WAIT_MS", "5")),
+                workers=workers
+            )
+        return _engine
@@ -0,0 +1,150 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+#
+#   RAG_WHISPER_MODEL          faster-whisper model name or CTranslate2 folder ("small")
+#   RAG_WHISPER_COMPUTE_TYPE   CTranslate2 compute type ("int8")
+#   RAG_WHISPER_TASK           "translate" (English output, like the API path) or "transcribe"
+#   RAG_WHISPER_LANGUAGE       source language code; detected per segment when unset
+#   RAG_WHISPER_BEAM_SIZE      beam width (5)
+#   RAG_TRANSCRIBE_WORKERS     decoder processes (CPU count, up to 4)
+#   RAG_TRANSCRIBE_SEGMENT_S   longest stretch of audio one worker decodes at a time (60)
+
+SAMPLE_RATE = 16000
+
+
+def _env_int(name, default):
+    return int(os.getenv(name, str(default)))
+
+
+def default_workers():
+    return max(1, min(4, os.cpu_count() or 1))
+
+
+# ============================================================
+# VAD SEGMENTATION
+# ============================================================
+
+def split_on_silence(audio, segment_s):
+    """
+    Group VAD speech spans into (offset_s, samples) windows of at most
+    segment_s, cut only at silences. Leading/trailing silence is dropped.
+    """
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+    spans = get_speech_timestamps(
+        audio,
+        VadOptions(min_silence_duration_ms=500, max_speech_duration_s=segment_s),
+        sampling_rate=SAMPLE_RATE
+    )
+
+    limit = int(segment_s * SAMPLE_RATE)
+    windows = []
+    for span in spans:
+        if windows and span["end"] - windows[-1][0] <= limit:
+            windows[-1][1] = span["end"]
+        else:
+            windows.append([span["start"], span["end"]])
+
+    return [(start / SAMPLE_RATE, audio[start:end]) for start, end in windows]
+
+
+# ============================================================
+# WORKER PROCESS
+# ============================================================
+# Each worker loads the model once in its initializer and keeps it.
+
+_model = None
+_options = None
+
+
+def _init_worker(model_name, compute_type, cpu_threads, options):
+    global _model, _options
+    from faster_whisper import WhisperModel
+    _model = WhisperModel(model_name, device="cpu", compute_type=compute_type,
+                          cpu_threads=cpu_threads, num_workers=1)
+    _options = options
+
+
+def _decode_window(offset, samples):
+    segments, _ = _model.transcribe(samples, vad_filter=False, **_options)
+    return [(offset + s.start, offset + s.end, s.text) for s in segments]
+
+
+def _ready(_):
+    return _model is not None
+
+
+# ============================================================
+# TRANSCRIBER
+# ============================================================
+
+class Transcriber:
+    """
+    CPU Whisper (CTranslate2 int8) over a process pool.
+
+    Audio is cut at silences found by VAD, the windows are decoded in
+    parallel and the segments come back with absolute timestamps in order.
+    Keep one instance around to reuse the loaded models.
+    """
+
+    def __init__(self, workers=None, model=None, compute_type=None):
+        self.workers = workers or _env_int("RAG_TRANSCRIBE_WORKERS", default_workers())
+        self.segment_s = float(os.getenv("RAG_TRANSCRIBE_SEGMENT_S", "60"))
+        options = {
+            "task": os.getenv("RAG_WHISPER_TASK", "translate"),
+            "language": os.getenv("RAG_WHISPER_LANGUAGE") or None,
+            "beam_size": _env_int("RAG_WHISPER_BEAM_SIZE", 5)
+        }
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(
+                model or os.getenv("RAG_WHISPER_MODEL", "small"),
+                compute_type or os.getenv("RAG_WHISPER_COMPUTE_TYPE", "int8"),
+                max(1, (os.cpu_count() or 1) // self.workers),
+                options
+            )
+        )
+
+    def warm(self):
+        """Start every worker (and load its model) before timing anything."""
+        list(self.pool.map(_ready, range(self.workers)))
+
+    def transcribe(self, audio_path):
+        """Return ([(start, end, text), ...], audio duration in seconds)."""
+        from faster_whisper import decode_audio
+
+        audio = decode_audio(audio_path, sampling_rate=SAMPLE_RATE)
+        windows = split_on_silence(audio, self.segment_s)
+        futures = [self.pool.submit(_decode_window, offset, samples) for offset, samples in windows]
+
+        segments = []
+        for future in futures:
+            segments.extend(future.result())
+        return segments, len(audio) / SAMPLE_RATE
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def transcribe_file(audio_path):
+    """One-shot helper for audio_to_json_uploaded.py."""
+    with Transcriber() as transcriber:
+        segments, _ = transcriber.transcribe(audio_path)
+    return segments
@@ -0,0 +1,315 @@
+import asyncio
+import atexit
+import json
+import math
+import os
+import queue
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+BASE_DATA_DIR = os.path.join(os.path.expanduser("~"), "rag_data")
+METRICS_DIR = os.getenv("RAG_METRICS_DIR", os.path.join(BASE_DATA_DIR, "metrics"))
+SPANS_FILE = os.path.join(METRICS_DIR, "spans.jsonl")
+
+# Set RAG_METRICS_JSONL=0 to keep spans in memory only
+JSONL_ENABLED = os.getenv("RAG_METRICS_JSONL", "1") != "0"
+# Past this size the file is moved to spans.jsonl.1 (replacing the previous one)
+MAX_BYTES = int(os.getenv("RAG_METRICS_MAX_BYTES", str(16 * 1024 ** 2)))
+# Records waiting for the writer thread; beyond this they are dropped
+EXPORT_QUEUE = 10000
+# Recent durations kept per stage for in-process quantiles
+WINDOW = int(os.getenv("RAG_METRICS_WINDOW", "2048"))
+
+# Numeric span attributes that are summed into Prometheus counters
+COUNTER_ATTRS = ("input_tokens", "output_tokens", "cached_tokens", "total_tokens", "bytes", "items")
+
+os.makedirs(METRICS_DIR, exist_ok=True)
+
+_lock = threading.Lock()
+_durations = defaultdict(lambda: deque(maxlen=WINDOW))   # stage -> recent durations (ms)
+_span_counts = defaultdict(int)                          # (stage, status) -> count
+_span_sums = defaultdict(float)                          # stage -> total duration (ms)
+_attr_totals = defaultdict(float)                        # (stage, attr) -> total
+_cache_counts = defaultdict(int)                         # (cache, "hit"|"miss") -> count
+_gauges = {}                                             # (name, labels) -> current value
+_gauge_help = {}                                         # name -> HELP text
+
+_pending = queue.Queue(maxsize=EXPORT_QUEUE)             # JSONL lines for the writer thread
+_writer = None
+
+
+# ============================================================
+# RECORDING
+# ============================================================
+
+def _write_pending():
+    """Writer thread: append queued lines in batches, rotating by size."""
+    while True:
+        lines = [_pending.get()]
+        while True:
+            try:
+                lines.append(_pending.get_nowait())
+            except queue.Empty:
+                break
+        stop = None in lines
+        try:
+            with open(SPANS_FILE, "a", encoding="utf-8") as f:
+                f.writelines(line for line in lines if line is not None)
+                size = f.tell()
+            if size > MAX_BYTES:
+                os.replace(SPANS_FILE, SPANS_FILE + ".1")
+        except OSError:
+            pass
+        if stop:
+            return
+
+
+def _flush():
+    if _writer is not None:
+        _pending.put(None)
+        _writer.join(timeout=2)
+
+
+def _export(record):
+    """Queue a record for the JSONL file; callers (often on the event loop) never touch the disk."""
+    global _writer
+    if not JSONL_ENABLED:
+        return
+    if _writer is None:
+        _writer = threading.Thread(target=_write_pending, name="metrics-export", daemon=True)
+        _writer.start()
+        atexit.register(_flush)
+    try:
+        _pending.put_nowait(json.dumps(record, ensure_ascii=False) + "\n")
+    except queue.Full:
+        pass
+
+
+def record_span(stage, duration_ms, status="ok", **attrs):
+    record = {"ts": time.time(), "stage": stage, "ms": round(duration_ms, 3), "status": status}
+    record.update(attrs)
+
+    with _lock:
+        _durations[stage].append(duration_ms)
+        _span_counts[(stage, status)] += 1
+        _span_sums[stage] += duration_ms
+        for key in COUNTER_ATTRS:
+            if isinstance(attrs.get(key), (int, float)):
+                _attr_totals[(stage, key)] += attrs[key]
+        _export(record)
+
+
+@contextmanager
+def span(stage, **attrs):
+    """
+    Time a pipeline stage.
+
+    Yields a dict; anything put in it (token counts, bytes, ...) is stored
+    with the span, and a "status" key overrides the recorded status.
+    Works around awaits too, since it only reads the clock.
+    """
+    attrs = dict(attrs)
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield attrs
+    except (GeneratorExit, asyncio.CancelledError):
+        status = "cancelled"
+        raise
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        status = attrs.pop("status", status)
+        record_span(stage, (time.perf_counter() - start) * 1000, status, **attrs)
+
+
+def record_cache(cache, hit):
+    with _lock:
+        _cache_counts[(cache, "hit" if hit else "miss")] += 1
+        _export({"ts": time.time(), "cache": cache, "hit": bool(hit)})
+
+
+def set_gauge(name, value, help=None, **labels):
+    """Current value of a point-in-time metric (queue depth, ...); not exported to JSONL."""
+    with _lock:
+        _gauges[(name, tuple(sorted(labels.items())))] = value
+        if help:
+            _gauge_help[name] = help
+
+
+def usage_attrs(usage):
+    """Map an OpenAI usage object (embeddings or responses) to span attributes."""
+    if usage is None:
+        return {}
+
+    attrs = {}
+    input_tokens = getattr(usage, "input_tokens", None)
+    if input_tokens is None:
+        input_tokens = getattr(usage, "prompt_tokens", None)
+    if input_tokens is not None:
+        attrs["input_tokens"] = input_tokens
+
+    output_tokens = getattr(usage, "output_tokens", None)
+    if output_tokens is not None:
+        attrs["output_tokens"] = output_tokens
+
+    details = getattr(usage, "input_tokens_details", None)
+    cached_tokens = getattr(details, "cached_tokens", None)
+    if cached_tokens is not None:
+        attrs["cached_tokens"] = cached_tokens
+
+    total_tokens = getattr(usage, "total_tokens", None)
+    if total_tokens is not None:
+        attrs["total_tokens"] = total_tokens
+    return attrs
+
+
+def file_bytes(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+# ============================================================
+# AGGREGATION
+# ============================================================
+
+def percentile(values, q):
+    """Nearest-rank percentile of an iterable (q in 0..100)."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize_spans(records):
+    """Per-stage count / p50 / p95 / errors / token totals from span records."""
+    stages = defaultdict(lambda: {"durations": [], "errors": 0, "input_tokens": 0, "cached_tokens": 0,
+                                  "output_tokens": 0, "bytes": 0})
+    for r in records:
+        if "stage" not in r:
+            continue
+        s = stages[r["stage"]]
+        s["durations"].append(r["ms"])
+        if r.get("status") != "ok":
+            s["errors"] += 1
+        for key in ("input_tokens", "cached_tokens", "output_tokens", "bytes"):
+            s[key] += r.get(key) or 0
+
+    rows = []
+    for stage, s in sorted(stages.items()):
+        rows.append({
+            "stage": stage,
+            "count": len(s["durations"]),
+            "p50_ms": round(percentile(s["durations"], 50), 1),
+            "p95_ms": round(percentile(s["durations"], 95), 1),
+            "errors": s["errors"],
+            "input_tokens": s["input_tokens"],
+            "cached_tokens": s["cached_tokens"],
+            "cached_share": round(s["cached_tokens"] / s["input_tokens"], 3) if s["input_tokens"] else None,
+            "output_tokens": s["output_tokens"],
+            "bytes": s["bytes"]
+        })
+    return rows
+
+
+def summarize_templates(records):
+    """Per prompt template version: calls, latency and how much of the input the provider served from cache."""
+    templates = defaultdict(lambda: {"durations": [], "input_tokens": 0, "cached_tokens": 0})
+    for r in records:
+        if r.get("stage") == "inference" and r.get("template") and r.get("status") == "ok":
+            t = templates[r["template"]]
+            t["durations"].append(r["ms"])
+            t["input_tokens"] += r.get("input_tokens") or 0
+            t["cached_tokens"] += r.get("cached_tokens") or 0
+
+    return [
+        {"template": name, "count": len(t["durations"]),
+         "p50_ms": round(percentile(t["durations"], 50), 1),
+         "input_tokens": t["input_tokens"], "cached_tokens": t["cached_tokens"],
+         "cached_share": round(t["cached_tokens"] / t["input_tokens"], 3) if t["input_tokens"] else None}
+        for name, t in sorted(templates.items())
+    ]
+
+
+def summarize_caches(records):
+    counts = defaultdict(lambda: [0, 0])
+    for r in records:
+        if "cache" in r:
+            counts[r["cache"]][0 if r["hit"] else 1] += 1
+
+    return [
+        {"cache": name, "hits": hits, "misses": misses,
+         "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None}
+        for name, (hits, misses) in sorted(counts.items())
+    ]
+
+
+def read_spans(path=SPANS_FILE, limit=20000):
+    """Load the most recent `limit` records from the JSONL export (and its rotated file)."""
+    lines = deque(maxlen=limit)
+    for part in (path + ".1", path):
+        if os.path.exists(part):
+            with open(part, "r", encoding="utf-8") as f:
+                lines.extend(f)
+    return [json.loads(line) for line in lines if line.strip()]
+
+
+# ============================================================
+# PROMETHEUS EXPORT
+# ============================================================
+
+def _labels(**labels):
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
+
+
+def render_prometheus():
+    """Text exposition of this process's metrics."""
+    with _lock:
+        durations = {stage: list(values) for stage, values in _durations.items()}
+        span_counts = dict(_span_counts)
+        span_sums = dict(_span_sums)
+        attr_totals = dict(_attr_totals)
+        cache_counts = dict(_cache_counts)
+        gauges = dict(_gauges)
+        gauge_help = dict(_gauge_help)
+
+    lines = [
+        "# HELP rag_stage_duration_ms Stage latency in milliseconds (recent window quantiles).",
+        "# TYPE rag_stage_duration_ms summary"
+    ]
+    for stage, values in sorted(durations.items()):
+        for q in (0.5, 0.95, 0.99):
+            lines.append(f"rag_stage_duration_ms{_labels(stage=stage, quantile=q)} {percentile(values, q * 100):.3f}")
+        lines.append(f"rag_stage_duration_ms_sum{_labels(stage=stage)} {span_sums.get(stage, 0):.3f}")
+        count = sum(n for (s, _), n in span_counts.items() if s == stage)
+        lines.append(f"rag_stage_duration_ms_count{_labels(stage=stage)} {count}")
+
+    lines += ["# HELP rag_stage_total Completed spans by status.", "# TYPE rag_stage_total counter"]
+    for (stage, status), n in sorted(span_counts.items()):
+        lines.append(f"rag_stage_total{_labels(stage=stage, status=status)} {n}")
+
+    lines += ["# HELP rag_stage_attr_total Summed span attributes (tokens, bytes).", "# TYPE rag_stage_attr_total counter"]
+    for (stage, attr), total in sorted(attr_totals.items()):
+        lines.append(f"rag_stage_attr_total{_labels(stage=stage, attr=attr)} {total:g}")
+
+    lines += ["# HELP rag_cache_requests_total Cache lookups by result.", "# TYPE rag_cache_requests_total counter"]
+    for (cache, result), n in sorted(cache_counts.items()):
+        lines.append(f"rag_cache_requests_total{_labels(cache=cache, result=result)} {n}")
+
+    for name in sorted({name for name, _ in gauges}):
+        lines += [f"# HELP rag_{name} {gauge_help.get(name, name)}", f"# TYPE rag_{name} gauge"]
+        for (gauge, labels), value in sorted(gauges.items()):
+            if gauge == name:
+                lines.append(f"rag_{name}{_labels(**dict(labels))} {value:g}")
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,41 @@
+# ============================================================
+# ADMIN: PER-STAGE LATENCY & COST
+# ============================================================
+import streamlit as st
+from metrics import read_spans, summarize_spans, summarize_caches, summarize_templates, SPANS_FILE
+
+st.set_page_config(page_title="RAG Admin · Metrics", layout="wide")
+
+st.markdown("## 📊 Pipeline Metrics")
+st.caption(f"Source: `{SPANS_FILE}` (most recent spans)")
+
+limit = st.slider("Spans to analyse", 1000, 100000, 20000, step=1000)
+
+if st.button("🔄 Refresh"):
+    st.rerun()
+
+records = read_spans(limit=limit)
+
+if not records:
+    st.info("No spans recorded yet. Ingest a lecture or run a search to collect metrics.")
+    st.stop()
+
+# -------- Stage latency table --------
+st.markdown("### ⏱ Latency per stage")
+st.dataframe(summarize_spans(records), use_container_width=True, hide_index=True)
+
+# -------- Cache hit rates --------
+caches = summarize_caches(records)
+if caches:
+    st.markdown("### 🎯 Cache hit rates")
+    st.dataframe(caches, use_container_width=True, hide_index=True)
+
+# -------- Prompt caching --------
+templates = summarize_templates(records)
+if templates:
+    st.markdown("### 🧩 Prompt templates (provider prompt cache)")
+    st.dataframe(templates, use_container_width=True, hide_index=True)
+
+# -------- Raw spans --------
+with st.expander("🔧 Latest spans"):
+    st.dataframe(records[-200:][::-1], use_container_width=True, hide_index=True)
@@ -0,0 +1,165 @@
+import hashlib
+import os
+import re
+from io import BytesIO
+
+from reportlab.lib.enums import TA_LEFT
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import mm
+from reportlab.platypus import HRFlowable, Paragraph, Preformatted, SimpleDocTemplate, Spacer
+
+from shared_state import LRUCache
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+# Rendered PDFs kept in memory, keyed by summary hash (shared by all sessions)
+PDF_CACHE_SIZE = int(os.getenv("RAG_PDF_CACHE_SIZE", "32"))
+
+
+def _build_styles():
+    base = getSampleStyleSheet()
+    styles = {
+        "title": base["Title"],
+        "body": ParagraphStyle("Body", parent=base["Normal"], fontSize=10.5, leading=14, spaceAfter=6),
+        "code": ParagraphStyle("Code", parent=base["Code"], fontSize=8.5, leading=11,
+                               backColor="#f1f5f9", borderPadding=4, spaceBefore=4, spaceAfter=8),
+    }
+    for level, size in zip(range(1, 7), (17, 15, 13, 12, 11, 10.5)):
+        styles[f"h{level}"] = ParagraphStyle(
+            f"H{level}", parent=base["Heading1"], fontSize=size, leading=size * 1.25,
+            spaceBefore=10 if level <= 2 else 6, spaceAfter=4, alignment=TA_LEFT
+        )
+    for depth in range(4):
+        styles[f"bullet{depth}"] = ParagraphStyle(
+            f"Bullet{depth}", parent=styles["body"], leftIndent=14 + depth * 12,
+            bulletIndent=4 + depth * 12, spaceAfter=3
+        )
+    return styles
+
+
+# Stylesheets are immutable once built; one set serves every render
+STYLES = _build_styles()
+
+
+# ============================================================
+# MARKDOWN → FLOWABLES
+# ============================================================
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*)$")
+_BULLET = re.compile(r"^(\s*)[-*+]\s+(.*)$")
+_NUMBERED = re.compile(r"^(\s*)(\d+)[.)]\s+(.*)$")
+_RULE = re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$")
+
+
+def inline_markup(text):
+    """Markdown inline syntax → reportlab paragraph markup (escaped first)."""
+    text = _escape(text)
+    # Code spans first so ** or _ inside them stay literal
+    spans = []
+
+    def keep(match):
+        spans.append(f'<font face="Courier">{match.group(1)}</font>')
+        return f"\x00{len(spans) - 1}\x00"
+
+    text = re.sub(r"`([^`]+)`", keep, text)
+    text = re.sub(r"\*\*(.+?)\*\*|__(.+?)__", lambda m: f"<b>{m.group(1) or m.group(2)}</b>", text)
+    text = re.sub(r"(?<![\w*])\*(?!\s)(.+?)(?<!\s)\*(?!\w)|(?<!\w)_(?!\s)(.+?)(?<!\s)_(?!\w)",
+                  lambda m: f"<i>{m.group(1) or m.group(2)}</i>", text)
+    return re.sub(r"\x00(\d+)\x00", lambda m: spans[int(m.group(1))], text)
+
+
+def _escape(text):
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def paragraph(text, style, **kwargs):
+    """A Paragraph of Markdown inline text; emphasis the markup cannot nest (model output) falls back to plain text."""
+    try:
+        return Paragraph(inline_markup(text), style, **kwargs)
+    except ValueError:
+        return Paragraph(_escape(text), style, **kwargs)
+
+
+def markdown_flowables(markdown, styles=STYLES):
+    """Headings, bullet / numbered lists (nested by indent), fenced code, rules and paragraphs."""
+    flowables, lines, code = [], [], None
+
+    def flush():
+        if lines:
+            flowables.append(paragraph(" ".join(lines), styles["body"]))
+            lines.clear()
+
+    for line in markdown.splitlines():
+        if line.strip().startswith("```"):
+            if code is None:
+                flush()
+                code = []
+            else:
+                flowables.append(Preformatted("\n".join(code), styles["code"]))
+                code = None
+            continue
+        if code is not None:
+            code.append(line)
+            continue
+
+        if not line.strip():
+            flush()
+            continue
+
+        heading = _HEADING.match(line.strip())
+        bullet = _BULLET.match(line)
+        numbered = _NUMBERED.match(line)
+        if heading:
+            flush()
+            level = len(heading.group(1))
+            flowables.append(paragraph(heading.group(2).strip("# "), styles[f"h{level}"]))
+        elif _RULE.match(line):
+            flush()
+            flowables.append(HRFlowable(width="100%", thickness=0.5, color="#94a3b8",
+                                        spaceBefore=4, spaceAfter=6))
+        elif bullet or numbered:
+            flush()
+            indent, marker, text = (bullet.group(1), "•", bullet.group(2)) if bullet else \
+                (numbered.group(1), f"{numbered.group(2)}.", numbered.group(3))
+            depth = min(len(indent.expandtabs(4)) // 2, 3)
+            flowables.append(paragraph(text, styles[f"bullet{depth}"], bulletText=marker))
+        else:
+            lines.append(line.strip())
+
+    flush()
+    if code is not None:
+        # Unterminated fence: keep the text rather than dropping it
+        flowables.append(Preformatted("\n".join(code), styles["code"]))
+    return flowables
+
+
+# ============================================================
+# RENDERING (MEMOIZED)
+# ============================================================
+
+_cache = LRUCache(PDF_CACHE_SIZE)
+
+
+def summary_hash(title, markdown):
+    return hashlib.sha256(f"{title}\x00{markdown}".encode("utf-8")).hexdigest()
+
+
+def build_pdf(title, markdown):
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, title=title,
+                            leftMargin=18 * mm, rightMargin=18 * mm, topMargin=16 * mm, bottomMargin=16 * mm)
+    doc.build([paragraph(title, STYLES["title"]), Spacer(1, 6)] + markdown_flowables(markdown))
+    return buffer.getvalue()
+
+
+def render_pdf(title, markdown):
+    """PDF bytes for a summary; identical title + text is rendered once per process."""
+    key = summary_hash(title, markdown)
+    pdf = _cache.get(key)
+    if pdf is None:
+        pdf = build_pdf(title, markdown)
+        _cache.put(key, pdf)
+    return pdf
@@ -1,36 +1,46 @@
 import json
 import os
-from openai import OpenAI
 from dotenv import load_dotenv
+from binary_transcript import EXTENSION, read_chunks
 from chroma_client import get_chroma
+from metrics import span, file_bytes
+from providers import create_backend, embed_backend_name
+from section_index import index_lecture
+import lecture_router
+from transcripts import order_chunks, write_transcript
 
 load_dotenv()
-client = OpenAI()
-
-def create_embeddings_batch(texts, batch_size=50):
-    all_embeddings = []
-    for i in range(0, len(texts), batch_size):
-        batch = texts[i:i+batch_size]
-        response = client.embeddings.create(
-            model="text-embedding-3-large",
-            input=batch
-        )
-        all_embeddings.extend([item.embedding for item in response.data])
-    return all_embeddings
 
-def embed_json_file(json_file):
-    chroma_client, collection = get_chroma()
+# Created on first use so importing the chunk helpers needs no API key
+_backend = None
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = create_backend(embed_backend_name())
+    return _backend
+
+def create_embeddings_batch(texts):
+    backend = get_backend()
+    with span("create_embedding", items=len(texts), source="ingest", backend=backend.name) as trace:
+        embeddings, usage = backend.embed(texts)
+        trace.update(usage)
+    return embeddings
 
+def load_chunks(json_file):
+    """Read a transcript JSON (or a converted .rtx file) and return its non-empty chunks."""
+    if json_file.endswith(EXTENSION):
+        return [c for c in read_chunks(json_file) if c["text"]]
     with open(json_file, "r", encoding="utf-8") as f:
         data = json.load(f)
+    return [c for c in data["chunks"] if c["text"]]
 
-    chunks = [c for c in data["chunks"] if c["text"]]
-    texts = [c["text"] for c in chunks]
-    embeddings = create_embeddings_batch(texts)
 
+def build_chunk_records(chunks):
+    """Chroma ids, documents and metadatas for transcript chunks, in playback order."""
     ids, documents, metadatas = [], [], []
 
-    for chunk in chunks:
+    for chunk in order_chunks(chunks):
         uid = f"{chunk['title']}__{chunk['number']}__{int(chunk['start']*1000)}"
         ids.append(uid)
         documents.append(chunk["text"])
@@ -39,14 +49,39 @@ def embed_json_file(json_file):
             "chunk_id": chunk["number"],
             "start": chunk["start"],
             "end": chunk["end"],
-            "number": chunk["number"]
+            "number": chunk["number"],
+            "ordinal": chunk["ordinal"]
         })
 
-    collection.add(
-        ids=ids,
-        documents=documents,
-        embeddings=embeddings,
-        metadatas=metadatas
-    )
+    return ids, documents, metadatas
+
+
+def embed_json_file(json_file):
+    with span("embed_json_file", bytes=file_bytes(json_file)) as trace:
+        chroma_client, collection = get_chroma()
+
+        chunks = order_chunks(load_chunks(json_file))
+        ids, documents, metadatas = build_chunk_records(chunks)
+        embeddings = create_embeddings_batch(documents)
+
+        with span("chroma_add", items=len(ids)):
+            collection.add(
+                ids=ids,
+                documents=documents,
+                embeddings=embeddings,
+                metadatas=metadatas
+            )
+
+        # Ordered sequence for summaries / transcript reads (no metadata sort later)
+        if chunks:
+            write_transcript(chunks[0]["title"], chunks)
+            # Topic sections for navigation queries, from the embeddings just computed
+            with span("section_index", items=len(chunks)):
+                index_lecture(chunks[0]["title"], chunks, embeddings)
+            # Centroid + representative vectors for routing "All Lectures" queries
+            with span("lecture_routes", items=len(chunks)):
+                lecture_router.index_lecture(chunks[0]["title"], ids, embeddings)
+
+        trace["items"] = len(ids)
 
     return len(ids)
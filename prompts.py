@@ -0,0 +1,162 @@
+import hashlib
+import json
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+# Prompts are assembled static-first: everything that is the same across
+# requests (template instructions, then a shared transcript) comes before
+# anything that varies. Providers cache processed prompt prefixes (OpenAI
+# from 1024 tokens, reported as cached_tokens; Ollama reuses the KV cache of
+# a matching prefix), so only the varying tail is processed again.
+#
+# Bump a template's version whenever its text changes: the template id is
+# recorded on every inference span, so token use and cached-token rates can
+# be compared between versions.
+
+
+class Template:
+    def __init__(self, name, version, text):
+        self.name = name
+        self.version = version
+        self.text = text
+
+    @property
+    def id(self):
+        return f"{self.name}/v{self.version}"
+
+
+class Prompt:
+    """
+    An assembled prompt. `prefix` is byte-identical across the requests
+    meant to share a provider cache entry; `cache_key` groups them (sent
+    as the OpenAI prompt_cache_key).
+    """
+
+    def __init__(self, template, prefix, suffix, cache_key):
+        self.template = template
+        self.prefix = prefix
+        self.suffix = suffix
+        self.cache_key = cache_key
+
+    @property
+    def text(self):
+        return self.prefix + self.suffix
+
+    def __str__(self):
+        return self.text
+
+    def __len__(self):
+        return len(self.prefix) + len(self.suffix)
+
+
+# ============================================================
+# TEMPLATES
+# ============================================================
+
+ANSWER = Template("answer", 2, """You are an expert AI Teaching Assistant specialized in explaining lecture videos with timestamp grounding.
+
+Task:
+Generate a factually grounded answer to the user question strictly based on the transcript segments given after these instructions.
+
+Response Requirements:
+1. Clearly identify the exact concept or topic being asked.
+2. Mention the lecture title(s) where the answer is found.
+3. Provide the precise timestamp range(s) for each explanation.
+4. Explain the concept concisely but technically (no oversimplification, no fluff).
+5. Use well-structured bullet points with sub-bullets where helpful.
+6. Output in clean Markdown format.
+7. English only.
+8. Each bullet should be on its own line (no inline merging).
+9. Do not hallucinate or add information not present in the transcript.
+10. If the answer is partially present, explicitly state what is missing.
+
+Formatting:
+- Use **bold** for key terms.
+- Use `code` formatting for formulas, algorithms, or variables.
+- Keep each point short, precise, and exam-ready.
+""")
+
+# Shared by both summary requests, ahead of the transcript
+SUMMARY = Template("summary", 2, """You are a senior AI Teaching Assistant preparing revision material from a university lecture. The full lecture transcript follows; the task comes after it.
+
+Strict Rules (apply to every task):
+- Use only information present in the transcript
+- No hallucinations, no external knowledge
+- Academic, precise, and technical tone with precise terminology
+- No verbosity, no storytelling, no filler, no repetition
+""")
+
+QUICK_SUMMARY = Template("summary_quick", 2, """Task:
+Create a **1–2 minute executive summary** of the lecture for fast revision.
+
+Output Requirements:
+- 120–180 words (strict)
+- Make sure of this : Bullet points only (no paragraphs)
+- Capture only the most important concepts, principles, and conclusions
+- No derivations, no examples
+- Each bullet must be a complete, standalone idea
+
+Style:
+- Concise
+- Exam-focused
+- Clear hierarchy of ideas
+- Professional academic tone
+""")
+
+DETAILED_SUMMARY = Template("summary_detailed", 2, """Task:
+Transform the lecture transcript into **fully structured study material** suitable for university revision.
+
+Required Structure (use Markdown headings):
+
+1. **Lecture Title**
+2. **Executive Overview**
+- 5–8 bullet points summarizing the full lecture
+3. **Key Concepts Explained**
+- Each major concept with concise technical explanation
+4. **Step-by-Step Topic Flow**
+- Ordered progression of ideas as taught in the lecture
+5. **Important Definitions**
+- Clear, formal definitions of all core terms
+6. **Illustrative Examples** (only if present in transcript)
+7. **Final 10-Line Revision Notes**
+- Ultra-condensed exam-oriented takeaways
+
+Formatting:
+- Markdown formatting with clear section headers
+- Bullet points and numbered lists where appropriate
+- Each section must be logically coherent and complete
+""")
+
+
+# ============================================================
+# ASSEMBLY
+# ============================================================
+
+def _digest(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+def answer_prompt(query, top_chunks):
+    """Fixed instructions, then the retrieved segments (one JSON object per line), then the question."""
+    context = "\n".join(json.dumps(chunk, ensure_ascii=False) for chunk in top_chunks)
+    return Prompt(
+        ANSWER.id,
+        ANSWER.text,
+        f"\nContext (most relevant transcript segments):\n{context}\n\nUser Question:\n{query}\n",
+        cache_key=ANSWER.id
+    )
+
+
+def summary_prompts(title, full_text):
+    """
+    (quick, detailed) prompts for one lecture. Both start with the same
+    instructions + transcript prefix, so whichever runs second only pays
+    for its task block once the first has populated the cache.
+    """
+    prefix = f"{SUMMARY.text}\nLecture Title: {title}\n\nLecture Transcript:\n{full_text}\n\n"
+    cache_key = f"{SUMMARY.id}:{_digest(prefix)}"
+    return (
+        Prompt(f"{QUICK_SUMMARY.id}+{SUMMARY.id}", prefix, QUICK_SUMMARY.text, cache_key),
+        Prompt(f"{DETAILED_SUMMARY.id}+{SUMMARY.id}", prefix, DETAILED_SUMMARY.text, cache_key)
+    )
@@ -0,0 +1,390 @@
+import asyncio
+import json
+import os
+import threading
+
+import httpx
+from openai import OpenAI, AsyncOpenAI, DefaultHttpxClient, DefaultAsyncHttpxClient
+from dotenv import load_dotenv
+from metrics import usage_attrs
+from request_scheduler import OUTPUT_TOKEN_ESTIMATE, BACKGROUND, estimate_tokens, get_scheduler
+
+load_dotenv()
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+# Read when a backend is created, so callers can set the environment first.
+#
+#   RAG_EMBED_BACKEND / RAG_LLM_BACKEND   "openai" (default) or "ollama";
+#                                         embeddings can also use "local" (see local_embedding.py)
+#   OLLAMA_URL                            http://localhost:11434
+#   OLLAMA_EMBED_MODEL / OLLAMA_LLM_MODEL bge-m3 / llama3.2
+#   RAG_EMBED_BATCH                       texts per embedding request (50)
+#   RAG_<BACKEND>_CONCURRENCY             in-flight requests per backend
+#   RAG_MAX_CONNECTIONS                   keep-alive pool size per client
+#   RAG_SCHEDULER / RAG_RATE_LIMITS       OpenAI rate limiting and retries (see request_scheduler.py)
+
+OPENAI_EMBED_MODEL = "text-embedding-3-large"
+OPENAI_LLM_MODEL = "gpt-5"
+OPENAI_TRANSCRIBE_MODEL = "whisper-1"
+
+
+def _env_int(name, default):
+    return int(os.getenv(name, str(default)))
+
+
+def _batches(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _prompt_options(prompt):
+    """Text and cache routing key of a prompt (a str or a prompts.Prompt)."""
+    cache_key = getattr(prompt, "cache_key", None)
+    return {"input": str(prompt), **({"prompt_cache_key": cache_key} if cache_key else {})}
+
+
+def _add_usage(total, usage):
+    for key, value in usage.items():
+        if isinstance(value, (int, float)):
+            total[key] = total.get(key, 0) + value
+
+
+# ============================================================
+# BACKEND BASE
+# ============================================================
+
+class Backend:
+    """
+    Embedding + generation provider.
+
+    Sync methods serve the ingest scripts, async ones the RAG service. Each
+    backend batches embedding requests, keeps one pooled client per mode
+    and caps its own in-flight requests.
+    """
+
+    name = None
+
+    def __init__(self, concurrency, batch_size, max_connections):
+        self.batch_size = batch_size
+        self.max_connections = max_connections
+        self._sync_limit = threading.BoundedSemaphore(concurrency)
+        self._async_limit = asyncio.Semaphore(concurrency)
+
+    def _limits(self):
+        return httpx.Limits(max_connections=self.max_connections,
+                            max_keepalive_connections=self.max_connections)
+
+    # ---------- Embeddings (batched) ----------
+
+    def embed(self, texts):
+        """Return (vectors, usage) for texts, one request per batch."""
+        vectors, usage = [], {}
+        for batch in _batches(texts, self.batch_size):
+            with self._sync_limit:
+                batch_vectors, batch_usage = self._embed_batch(batch)
+            vectors.extend(batch_vectors)
+            _add_usage(usage, batch_usage)
+        return vectors, usage
+
+    async def aembed(self, texts):
+        """Return (vectors, usage); batches run concurrently up to the backend limit."""
+        async def _one(batch):
+            async with self._async_limit:
+                return await self._aembed_batch(batch)
+
+        results = await asyncio.gather(*[_one(b) for b in _batches(texts, self.batch_size)])
+        vectors, usage = [], {}
+        for batch_vectors, batch_usage in results:
+            vectors.extend(batch_vectors)
+            _add_usage(usage, batch_usage)
+        return vectors, usage
+
+    # ---------- Generation ----------
+
+    async def agenerate(self, prompt):
+        """Return (text, usage); prompt is a str or a prompts.Prompt."""
+        async with self._async_limit:
+            return await self._agenerate(prompt)
+
+    async def agenerate_stream(self, prompt, usage=None):
+        """Yield text deltas; token usage is written into `usage` when the stream ends."""
+        async with self._async_limit:
+            async for delta in self._agenerate_stream(prompt, usage if usage is not None else {}):
+                yield delta
+
+    async def awarm(self):
+        """Get the generation model ready ahead of a request (no-op unless the backend loads models)."""
+
+    async def aconnect(self, connections=1):
+        """Open pooled connections ahead of the first request (no-op for in-process backends)."""
+
+    async def aclose(self):
+        pass
+
+
+# ============================================================
+# OPENAI BACKEND
+# ============================================================
+
+class OpenAIBackend(Backend):
+    """
+    OpenAI API. Requests are admitted by the process-wide request scheduler
+    (rate limits, priority classes, retries); sync calls default to the
+    background class and async ones to interactive, see request_priority().
+    """
+
+    name = "openai"
+
+    def __init__(self, scheduler=None):
+        super().__init__(
+            concurrency=_env_int("RAG_OPENAI_CONCURRENCY", 32),
+            batch_size=_env_int("RAG_EMBED_BATCH", 50),
+            max_connections=_env_int("RAG_MAX_CONNECTIONS", 64)
+        )
+        self.embed_model = OPENAI_EMBED_MODEL
+        self.llm_model = OPENAI_LLM_MODEL
+        self.scheduler = scheduler or get_scheduler()
+        self._client = None
+        self._aclient = None
+
+    def _client_options(self):
+        # The scheduler owns retries; without it the SDK's own (2, no coordination) apply
+        return {"max_retries": 0} if self.scheduler else {}
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = OpenAI(http_client=DefaultHttpxClient(limits=self._limits()), **self._client_options())
+        return self._client
+
+    @property
+    def aclient(self):
+        if self._aclient is None:
+            self._aclient = AsyncOpenAI(http_client=DefaultAsyncHttpxClient(limits=self._limits()),
+                                        **self._client_options())
+        return self._aclient
+
+    @staticmethod
+    def _usage(usage):
+        return usage_attrs(usage)
+
+    @staticmethod
+    def _total_tokens(response):
+        return getattr(getattr(response, "usage", None), "total_tokens", None)
+
+    def _call(self, model, fn, tokens=0, priority=None):
+        if self.scheduler is None:
+            return fn()
+        return self.scheduler.call(model, fn, tokens, priority, used=self._total_tokens)
+
+    async def _acall(self, model, fn, tokens=0, used=None):
+        if self.scheduler is None:
+            return await fn()
+        return await self.scheduler.acall(model, fn, tokens, used=used)
+
+    def _embed_batch(self, batch):
+        response = self._call(self.embed_model, lambda: self.client.embeddings.create(
+            model=self.embed_model, input=batch), estimate_tokens(batch))
+        return [item.embedding for item in response.data], self._usage(response.usage)
+
+    async def _aembed_batch(self, batch):
+        response = await self._acall(self.embed_model, lambda: self.aclient.embeddings.create(
+            model=self.embed_model, input=batch), estimate_tokens(batch), self._total_tokens)
+        return [item.embedding for item in response.data], self._usage(response.usage)
+
+    async def _agenerate(self, prompt):
+        response = await self._acall(self.llm_model, lambda: self.aclient.responses.create(
+            model=self.llm_model, **_prompt_options(prompt)),
+            estimate_tokens(str(prompt)) + OUTPUT_TOKEN_ESTIMATE, self._total_tokens)
+        return response.output_text, self._usage(response.usage)
+
+    async def _agenerate_stream(self, prompt, usage):
+        estimate = estimate_tokens(str(prompt)) + OUTPUT_TOKEN_ESTIMATE
+        # Retried until the stream opens; its usage is only known at the end
+        stream = await self._acall(self.llm_model, lambda: self.aclient.responses.create(
+            model=self.llm_model, stream=True, **_prompt_options(prompt)), estimate)
+        # A stream closed before response.completed is charged the prompt plus
+        # the output seen so far, so the unused estimate goes back to the budget
+        used = None
+        streamed = []
+        try:
+            async for event in stream:
+                if event.type == "response.output_text.delta":
+                    streamed.append(event.delta)
+                    yield event.delta
+                elif event.type == "response.completed":
+                    usage.update(self._usage(event.response.usage))
+                    used = self._total_tokens(event.response)
+        finally:
+            if self.scheduler is not None:
+                if used is None:
+                    used = estimate - OUTPUT_TOKEN_ESTIMATE + estimate_tokens(["".join(streamed)])
+                await self.scheduler.asettle(self.llm_model, estimate, used)
+
+    async def aconnect(self, connections=1):
+        # Listing models costs no tokens and does not count against the model rate limits
+        await asyncio.gather(*[self.aclient.models.list() for _ in range(connections)])
+
+    def transcribe(self, audio_path):
+        """Whisper translation to English: [(start, end, text)] segments."""
+        def _request():
+            with open(audio_path, "rb") as f:
+                return self.client.audio.translations.create(
+                    file=f, model=OPENAI_TRANSCRIBE_MODEL, response_format="verbose_json")
+
+        transcript = self._call(OPENAI_TRANSCRIBE_MODEL, _request, priority=BACKGROUND)
+        return [(seg.start, seg.end, seg.text) for seg in transcript.segments]
+
+    async def aclose(self):
+        if self._aclient is not None:
+            await self._aclient.close()
+
+
+# ============================================================
+# OLLAMA-COMPATIBLE BACKEND
+# ============================================================
+
+class OllamaBackend(Backend):
+    """Talks to an Ollama-compatible server (/api/embed, /api/generate)."""
+
+    name = "ollama"
+
+    def __init__(self):
+        super().__init__(
+            concurrency=_env_int("RAG_OLLAMA_CONCURRENCY", 4),
+            batch_size=_env_int("RAG_EMBED_BATCH", 50),
+            max_connections=_env_int("RAG_MAX_CONNECTIONS", 64)
+        )
+        self.base_url = os.getenv("OLLAMA_URL", "http://localhost:11434").rstrip("/")
+        self.embed_model = os.getenv("OLLAMA_EMBED_MODEL", "bge-m3")
+        self.llm_model = os.getenv("OLLAMA_LLM_MODEL", "llama3.2")
+        self.timeout = httpx.Timeout(float(os.getenv("OLLAMA_TIMEOUT", "600")), connect=10.0)
+        self._client = None
+        self._aclient = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = httpx.Client(base_url=self.base_url, timeout=self.timeout, limits=self._limits())
+        return self._client
+
+    @property
+    def aclient(self):
+        if self._aclient is None:
+            self._aclient = httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout, limits=self._limits())
+        return self._aclient
+
+    @staticmethod
+    def _usage(data):
+        usage = {}
+        if "prompt_eval_count" in data:
+            usage["input_tokens"] = data["prompt_eval_count"]
+        if "eval_count" in data:
+            usage["output_tokens"] = data["eval_count"]
+        return usage
+
+    def _embed_batch(self, batch):
+        r = self.client.post("/api/embed", json={"model": self.embed_model, "input": batch})
+        r.raise_for_status()
+        data = r.json()
+        return data["embeddings"], self._usage(data)
+
+    async def _aembed_batch(self, batch):
+        r = await self.aclient.post("/api/embed", json={"model": self.embed_model, "input": batch})
+        r.raise_for_status()
+        data = r.json()
+        return data["embeddings"], self._usage(data)
+
+    async def _agenerate(self, prompt):
+        # Same-prefix prompts reuse the loaded model's KV cache, so no cache key is needed
+        r = await self.aclient.post("/api/generate", json={"model": self.llm_model, "prompt": str(prompt), "stream": False})
+        r.raise_for_status()
+        data = r.json()
+        return data["response"], self._usage(data)
+
+    async def _agenerate_stream(self, prompt, usage):
+        payload = {"model": self.llm_model, "prompt": str(prompt), "stream": True}
+        async with self.aclient.stream("POST", "/api/generate", json=payload) as r:
+            r.raise_for_status()
+            async for line in r.aiter_lines():
+                if not line:
+                    continue
+                data = json.loads(line)
+                if data.get("response"):
+                    yield data["response"]
+                if data.get("done"):
+                    usage.update(self._usage(data))
+
+    async def awarm(self):
+        # A generate call without a prompt only loads the model (and resets its keep-alive)
+        r = await self.aclient.post("/api/generate", json={"model": self.llm_model})
+        r.raise_for_status()
+
+    async def aconnect(self, connections=1):
+        responses = await asyncio.gather(*[self.aclient.get("/api/version") for _ in range(connections)])
+        for r in responses:
+            r.raise_for_status()
+
+    async def aclose(self):
+        if self._aclient is not None:
+            await self._aclient.aclose()
+
+
+# ============================================================
+# LOCAL CPU BACKEND (EMBEDDINGS ONLY)
+# ============================================================
+
+class LocalBackend(Backend):
+    """
+    In-process ONNX encoder. Requests from every caller share one
+    dynamic batcher, so there is no per-request batching or limit here.
+    """
+
+    name = "local"
+
+    def __init__(self):
+        super().__init__(concurrency=1, batch_size=1, max_connections=0)
+        from local_embedding import get_engine
+        self.engine = get_engine()
+        self.embed_model = self.engine.model.name
+
+    def embed(self, texts):
+        return self.engine.embed(texts)
+
+    async def aembed(self, texts):
+        results = await asyncio.gather(*[asyncio.wrap_future(f) for f in self.engine.submit(texts)])
+        return [v for v, _ in results], {"input_tokens": sum(t for _, t in results)}
+
+    async def _agenerate(self, prompt):
+        raise ValueError("The local backend only serves embeddings; set RAG_LLM_BACKEND to openai or ollama")
+
+    async def _agenerate_stream(self, prompt, usage):
+        raise ValueError("The local backend only serves embeddings; set RAG_LLM_BACKEND to openai or ollama")
+        yield
+
+
+# ============================================================
+# SELECTION
+# ============================================================
+
+BACKENDS = {
+    "openai": OpenAIBackend,
+    "ollama": OllamaBackend,
+    "local": LocalBackend,
+}
+
+
+def create_backend(name):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend '{name}'. Choose one of: {', '.join(BACKENDS)}")
+    return BACKENDS[name]()
+
+
+def embed_backend_name():
+    return os.getenv("RAG_EMBED_BACKEND", "openai")
+
+
+def llm_backend_name():
+    return os.getenv("RAG_LLM_BACKEND", "openai")
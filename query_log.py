@@ -0,0 +1,208 @@
+import argparse
+import glob
+import gzip
+import json
+import os
+import threading
+import time
+from collections import Counter
+
+from dotenv import load_dotenv
+from metrics import percentile
+
+load_dotenv()
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+# Append-only log of answered questions, written by the RAG service: one
+# compact JSON line per query with its scope, retrieved chunk ids and
+# distances, stage latencies and token counts. When the live file passes
+# MAX_BYTES it is gzipped into an archive next to it; the oldest archives
+# beyond KEEP are deleted. Offline jobs (cache warming at service startup,
+# the report CLI below) read the live file and the archives.
+
+LOG_DIR = os.getenv("RAG_QUERY_LOG_DIR", os.path.join(os.path.expanduser("~"), "rag_data", "querylog"))
+LOG_FILE = os.path.join(LOG_DIR, "queries.jsonl")
+
+ENABLED = os.getenv("RAG_QUERY_LOG", "1") != "0"
+MAX_BYTES = int(os.getenv("RAG_QUERY_LOG_MAX_BYTES", str(8 * 1024 ** 2)))
+KEEP = int(os.getenv("RAG_QUERY_LOG_KEEP", "8"))
+# Generated answers are logged too, so startup can re-seed the answer cache
+LOG_ANSWERS = os.getenv("RAG_QUERY_LOG_ANSWERS", "1") != "0"
+
+_lock = threading.Lock()
+
+
+# ============================================================
+# WRITING
+# ============================================================
+
+def _rotate():
+    """Gzip the live file into a timestamped archive and prune old archives."""
+    now = time.time()
+    archive = os.path.join(LOG_DIR, time.strftime("queries-%Y%m%d-%H%M%S", time.localtime(now)) +
+                           f"{now % 1:.3f}"[1:] + ".jsonl.gz")
+    with open(LOG_FILE, "rb") as src, gzip.open(archive + ".tmp", "wb") as dst:
+        dst.write(src.read())
+    os.replace(archive + ".tmp", archive)
+    os.remove(LOG_FILE)
+    for old in archives()[:-KEEP or None]:
+        os.remove(old)
+
+
+def log_query(record):
+    """Append one query record (a dict); "ts" is added. Never raises."""
+    if not ENABLED:
+        return
+    if not LOG_ANSWERS:
+        record.pop("answer", None)
+    line = json.dumps({"ts": round(time.time(), 3), **record}, ensure_ascii=False, separators=(",", ":"))
+    try:
+        with _lock:
+            os.makedirs(LOG_DIR, exist_ok=True)
+            with open(LOG_FILE, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                size = f.tell()
+            if size > MAX_BYTES:
+                _rotate()
+    except OSError:
+        pass
+
+
+# ============================================================
+# READING
+# ============================================================
+
+def archives():
+    """Rotated archives, oldest first."""
+    return sorted(glob.glob(os.path.join(LOG_DIR, "queries-*.jsonl.gz")))
+
+
+def read_queries(since=None):
+    """Every logged record (archives, then the live file), optionally only those newer than `since` (epoch s)."""
+    records = []
+    for path in archives() + [LOG_FILE]:
+        if not os.path.exists(path):
+            continue
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue    # a line cut short by a crash
+                if since is None or record.get("ts", 0) >= since:
+                    records.append(record)
+    return records
+
+
+# ============================================================
+# ANALYTICS
+# ============================================================
+
+def _key(record):
+    return record["query"].strip(), record.get("scope")
+
+
+def frequent_queries(records, n=20):
+    """
+    The n most asked (query, scope) pairs, most frequent first, each with
+    its count and its latest logged retrieval (ids, k, answer): the latest
+    one that generated an answer, if any did.
+    """
+    counts = Counter(_key(r) for r in records)
+    latest = {}
+    for r in records:
+        if r.get("ids") and (r.get("answer") or not latest.get(_key(r), {}).get("answer")):
+            latest[_key(r)] = r
+    frequent = []
+    for (query, scope), count in counts.most_common(n):
+        entry = {"query": query, "scope": scope, "count": count}
+        if (query, scope) in latest:
+            entry.update({key: latest[(query, scope)].get(key) for key in ("ids", "k", "answer", "ts")})
+        frequent.append(entry)
+    return frequent
+
+
+def slowest_queries(records, n=20, stage="total_ms"):
+    return sorted((r for r in records if r.get(stage) is not None), key=lambda r: -r[stage])[:n]
+
+
+def weakest_matches(records, n=20):
+    """Queries whose best hit was furthest away (latest record of each): candidates for missing content or index tuning."""
+    latest = {_key(r): r for r in records if r.get("distances")}
+    return sorted(latest.values(), key=lambda r: -r["distances"][0])[:n]
+
+
+def lecture_hits(records):
+    """How often each lecture supplied the top hit."""
+    return Counter(r["ids"][0].split("__")[0] for r in records if r.get("ids")).most_common()
+
+
+def summarize(records):
+    answered = [r for r in records if not r.get("direct")]
+    totals = [r["total_ms"] for r in records if r.get("total_ms") is not None]
+    return {
+        "queries": len(records),
+        "unique": len({_key(r) for r in records}),
+        "cached_answers": sum(1 for r in answered if r.get("cached")),
+        "direct_answers": len(records) - len(answered),
+        "p50_total_ms": percentile(totals, 50),
+        "p95_total_ms": percentile(totals, 95),
+        "input_tokens": sum(r.get("input_tokens") or 0 for r in records),
+        "output_tokens": sum(r.get("output_tokens") or 0 for r in records),
+        "scopes": dict(Counter(r.get("scope") for r in records).most_common())
+    }
+
+
+# ============================================================
+# REPORT CLI
+# ============================================================
+
+def _ms(value):
+    return "n/a" if value is None else f"{value:.0f} ms"
+
+
+def _short(text, width=60):
+    text = " ".join(text.split())
+    return text if len(text) <= width else text[:width - 1] + "…"
+
+
+def report(days=None, top=15):
+    since = time.time() - days * 86400 if days else None
+    records = read_queries(since)
+    if not records:
+        print(f"No queries logged in {LOG_DIR}")
+        return
+
+    overview = summarize(records)
+    print(f"{overview['queries']} queries ({overview['unique']} unique), "
+          f"{overview['cached_answers']} cached / {overview['direct_answers']} direct answers, "
+          f"total p50 {_ms(overview['p50_total_ms'])} / p95 {_ms(overview['p95_total_ms'])}, "
+          f"{overview['input_tokens']} input / {overview['output_tokens']} output tokens")
+
+    print("\nMost repeated")
+    for q in frequent_queries(records, top):
+        print(f"{q['count']:>6}  {_short(q['query'])}  [{q['scope']}]")
+
+    print("\nSlowest")
+    for r in slowest_queries(records, top):
+        print(f"{r['total_ms']:>8.0f} ms  retrieve {r.get('retrieve_ms') or 0:>6.0f}  "
+              f"first token {r.get('first_token_ms') or 0:>6.0f}  {_short(r['query'])}")
+
+    print("\nWeakest top hit (distance)")
+    for r in weakest_matches(records, top):
+        print(f"{r['distances'][0]:>8.3f}  {_short(r['query'])}  [{r.get('scope')}]")
+
+    print("\nLectures by top hits")
+    for title, n in lecture_hits(records)[:top]:
+        print(f"{n:>6}  {title}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report on the query log.")
+    parser.add_argument("--days", type=float, help="Only queries from the last N days")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+    report(args.days, args.top)
@@ -0,0 +1,136 @@
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+# Point at an external service; when unset, one is started in-process on first use
+SERVICE_URL = os.getenv("RAG_SERVICE_URL", "").rstrip("/")
+REQUEST_TIMEOUT = float(os.getenv("RAG_SERVICE_TIMEOUT", "300"))
+# Keep-alive connections per process; every Streamlit session thread shares them
+POOL_SIZE = int(os.getenv("RAG_CLIENT_POOL_SIZE", "64"))
+# How long wait_ready() waits for the service's startup warm-up
+READY_TIMEOUT = float(os.getenv("RAG_SERVICE_READY_TIMEOUT", "120"))
+
+_session = requests.Session()
+_session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE))
+_lock = threading.Lock()
+_base_url = SERVICE_URL or None
+
+
+# ============================================================
+# SERVICE DISCOVERY
+# ============================================================
+
+def ensure_service():
+    """Return the service base URL, starting an embedded service if needed."""
+    global _base_url
+
+    with _lock:
+        if _base_url is None:
+            from rag_service import start_in_thread
+            _base_url = start_in_thread(port=0)
+    return _base_url
+
+
+def use_service(url):
+    """Point this process at an already running service."""
+    global _base_url
+
+    with _lock:
+        _base_url = url.rstrip("/")
+
+
+def health():
+    response = _session.get(ensure_service() + "/health", timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+
+def wait_ready(timeout=READY_TIMEOUT, poll=0.2):
+    """Block until the service has finished its startup warm-up; returns its /health report."""
+    deadline = time.monotonic() + timeout
+    while True:
+        report = health()
+        if report.get("ready", True):     # services without a warm-up report no flag
+            return report
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"RAG service not ready after {timeout:.0f}s")
+        time.sleep(poll)
+
+
+def _post(path, payload, stream=False):
+    response = _session.post(
+        ensure_service() + path,
+        json=payload,
+        stream=stream,
+        timeout=REQUEST_TIMEOUT
+    )
+    response.raise_for_status()
+    return response
+
+
+# ============================================================
+# API
+# ============================================================
+
+def search(query, topic, k=None):
+    """Transcript chunks for a query: at most k, or as many as the service's retrieval policy picks."""
+    payload = {"query": query, "topic": topic}
+    if k:
+        payload["k"] = k
+    return _post("/search", payload).json()["chunks"]
+
+
+def answer_stream(query, topic, session=None):
+    """
+    Yield answer events ("chunks", "delta", "done", "error", "cancelled") as
+    they arrive. A new request with the same session id cancels this one.
+    """
+    payload = {"query": query, "topic": topic, "stream": True}
+    if session:
+        payload["session"] = session
+    response = _post("/answer", payload, stream=True)
+    with response:
+        for line in response.iter_lines(decode_unicode=True):
+            if line:
+                yield json.loads(line)
+
+
+def summarize(title):
+    data = _post("/summarize", {"title": title}).json()
+    return data["quick"], data["full"]
+
+
+def summarize_stream(title, session=None):
+    """
+    Yield summary events ("quick", "delta", "done", "error", "cancelled"):
+    the quick summary arrives whole, the detailed notes as deltas.
+    """
+    payload = {"title": title, "stream": True}
+    if session:
+        payload["session"] = session
+    response = _post("/summarize", payload, stream=True)
+    with response:
+        for line in response.iter_lines(decode_unicode=True):
+            if line:
+                yield json.loads(line)
+
+
+def cancel(session, kind=None):
+    """Cancel a session's running answer and/or summary ("answer" / "summary")."""
+    payload = {"session": session}
+    if kind:
+        payload["kind"] = kind
+    return _post("/cancel", payload).json()["cancelled"]
+
+
+def invalidate(title):
+    """Drop service-side cached answers for a lecture after it changes."""
+    return _post("/invalidate", {"title": title}).json()["invalidated"]
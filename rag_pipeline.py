@@ -0,0 +1,599 @@
+import asyncio
+import os
+import time
+
+from dotenv import load_dotenv
+from chroma_client import get_chroma
+from answer_cache import SemanticAnswerCache
+from context_expansion import ContextExpander
+from section_index import SECTION_ROUTING, SectionIndex, is_navigational, locate, navigation_answer
+from retrieval_policy import (ADAPTIVE_K, MAX_K, choose_k, collection_space, distances, is_dominant,
+                              similarities, timestamp_answer)
+from lecture_router import LectureRouter
+from transcripts import get_transcript, transcript_path
+from metrics import span, record_cache
+from prompts import answer_prompt, summary_prompts
+from query_log import frequent_queries, log_query, read_queries
+from shared_state import LRUCache, lecture_catalog
+from providers import create_backend, embed_backend_name, llm_backend_name
+from request_scheduler import SUMMARY, request_priority
+
+load_dotenv()
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+TOP_K = 5
+ALL_LECTURES = "All Lectures"
+# Routing scores returned with an answer, for suggesting a scoped search
+ROUTE_SUGGESTIONS = 3
+
+# Max model calls in flight per process; extra requests queue on the semaphore.
+# Each backend additionally enforces its own limit (see providers.py).
+MAX_CONCURRENCY = int(os.getenv("RAG_MAX_CONCURRENCY", "32"))
+
+# Query embeddings kept per process, so a question asked again (by anyone)
+# skips the embedding call
+EMBED_CACHE_SIZE = int(os.getenv("RAG_EMBED_CACHE_SIZE", "1024"))
+
+# Seconds between LLM warm-ups started alongside retrieval (keeps a local
+# model loaded; a no-op for hosted APIs)
+LLM_WARM_INTERVAL = float(os.getenv("RAG_LLM_WARM_INTERVAL", "60"))
+
+# The detailed summary starts once the quick one streams its first token,
+# i.e. once the shared transcript prefix is in the provider's prompt cache
+# (see prompts.py). "0" starts both generations at the same time.
+SUMMARY_SHARE_PREFIX = os.getenv("RAG_SUMMARY_SHARE_PREFIX", "1") != "0"
+
+# Most frequent logged questions (see query_log.py) whose embeddings, and
+# answers where retrieval is unchanged, are loaded into the caches at startup
+WARM_TOP = int(os.getenv("RAG_WARM_TOP", "50"))
+WARM_DAYS = float(os.getenv("RAG_WARM_DAYS", "14"))
+# Optional text file of popular questions (one per line) embedded at startup too
+WARM_QUERIES_FILE = os.getenv("RAG_WARM_QUERIES", "")
+# Keep-alive connections opened to each model API during the startup warm-up
+WARM_CONNECTIONS = int(os.getenv("RAG_WARM_CONNECTIONS", "4"))
+
+
+# ============================================================
+# VECTOR SEARCH & RESULT PACKING
+# ============================================================
+
+def query_collection(collection, q_emb, topic=ALL_LECTURES, k=TOP_K, titles=None):
+    """Vector search over the collection (scoped to one lecture, the given titles, or global)."""
+    if topic == ALL_LECTURES and titles:
+        return collection.query(
+            query_embeddings=[q_emb],
+            n_results=k,
+            where={"title": {"$in": list(titles)}}
+        )
+    if topic == ALL_LECTURES:
+        return collection.query(
+            query_embeddings=[q_emb],
+            n_results=k
+        )
+    return collection.query(
+        query_embeddings=[q_emb],
+        n_results=k,
+        where={"title": topic}
+    )
+
+
+def fetch_results(collection, ids, scores, space="l2"):
+    """A Chroma-shaped single-query result for chunk ids found outside Chroma (best first)."""
+    records = collection.get(ids=ids, include=["documents", "metadatas"])
+    found = {id: (doc, meta) for id, doc, meta in zip(records["ids"], records["documents"], records["metadatas"])}
+    # Ids deleted from the collection since the lecture matrix was written are skipped
+    keep = [i for i, id in enumerate(ids) if id in found]
+    return {
+        "ids": [[ids[i] for i in keep]],
+        "documents": [[found[ids[i]][0] for i in keep]],
+        "metadatas": [[found[ids[i]][1] for i in keep]],
+        "distances": [distances([scores[i] for i in keep], space)]
+    }
+
+
+def pack_chunks(results):
+    """Flatten a single-query Chroma result into the chunk dicts sent to the LLM."""
+    if not results["documents"] or not results["documents"][0]:
+        return []
+
+    top_chunks = []
+    for meta, text in zip(results["metadatas"][0], results["documents"][0]):
+        top_chunks.append({
+            "title": meta["title"],
+            "number": meta["number"],
+            "start": meta["start"],
+            "end": meta["end"],
+            "text": text
+        })
+    return top_chunks
+
+
+def candidate_count(k=None, adaptive=ADAPTIVE_K):
+    """Results to request from Chroma: k (default TOP_K), or enough for the adaptive policy to choose from."""
+    return max(k or 0, MAX_K) if adaptive else k or TOP_K
+
+
+def select_hits(results, space="l2", k=None, adaptive=ADAPTIVE_K):
+    """
+    (chunk_ids, hits, dominant) from a single-query Chroma result. With
+    RAG_ADAPTIVE_K the hit count follows the score distribution (see
+    retrieval_policy.py), at most k when given and RAG_MAX_K otherwise;
+    without it the first k (default TOP_K).
+    """
+    chunk_ids = results["ids"][0] if results["ids"] else []
+    hits = pack_chunks(results)
+    if not adaptive or not hits:
+        k = k or TOP_K
+        return chunk_ids[:k], hits[:k], False
+
+    scores = similarities(results["distances"][0], space)
+    keep = choose_k(scores, max_k=k or MAX_K)
+    return chunk_ids[:keep], hits[:keep], is_dominant(scores)
+
+
+def warm_queries(path=WARM_QUERIES_FILE):
+    """Questions listed in the RAG_WARM_QUERIES file (blank lines and # comments skipped)."""
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def _elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+def _log_query(record):
+    """Hand a record to the query log on the default thread pool: appends (and rotation's gzip) stay off the event loop."""
+    asyncio.get_running_loop().run_in_executor(None, log_query, record)
+
+
+def _consume_exception(task):
+    """Done-callback for background / abandoned tasks: retrieve the error so it is not logged as unhandled."""
+    if not task.cancelled():
+        task.exception()
+
+
+# ============================================================
+# ASYNC RAG PIPELINE
+# ============================================================
+
+class RAGPipeline:
+    """
+    Search → pack → answer over the lecture collection.
+
+    One instance is shared by every request of the service: it owns the
+    embedding and generation backends (pooled clients, selected by
+    RAG_EMBED_BACKEND / RAG_LLM_BACKEND) and caps concurrent model calls
+    with a semaphore. Chroma is synchronous, so its calls run on the
+    default thread pool.
+    """
+
+    def __init__(self, collection=None, max_concurrency=MAX_CONCURRENCY):
+        self.embedder = create_backend(embed_backend_name())
+        if llm_backend_name() == self.embedder.name:
+            self.llm = self.embedder
+        else:
+            self.llm = create_backend(llm_backend_name())
+
+        if collection is None:
+            _, collection = get_chroma()
+        self.collection = collection
+        self.space = collection_space(collection)
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.answer_cache = SemanticAnswerCache()
+        self.expander = ContextExpander(collection=collection)
+        self.sections = SectionIndex()
+        self.router = LectureRouter()
+        self.query_embeddings = LRUCache(EMBED_CACHE_SIZE)
+        self._warm_task = None
+        self._warmed_at = float("-inf")
+
+    async def aclose(self):
+        await self.embedder.aclose()
+        if self.llm is not self.embedder:
+            await self.llm.aclose()
+
+    # ---------- Model calls ----------
+
+    async def create_embedding(self, text_lists):
+        """Create vector embeddings for text with the configured embedding backend."""
+        with span("create_embedding", items=len(text_lists), backend=self.embedder.name) as trace:
+            async with self.semaphore:
+                vectors, usage = await self.embedder.aembed(text_lists)
+            trace.update(usage)
+        return vectors
+
+    async def inference(self, prompt):
+        """Generate answer from LLM using retrieved context."""
+        with span("inference", bytes=len(str(prompt).encode("utf-8")), backend=self.llm.name,
+                  template=getattr(prompt, "template", None)) as trace:
+            async with self.semaphore:
+                text, usage = await self.llm.agenerate(prompt)
+            trace.update(usage)
+        return text
+
+    async def inference_stream(self, prompt, usage=None):
+        """Yield answer text deltas as the LLM produces them; token counts are copied into `usage` at the end."""
+        started = time.perf_counter()
+        with span("inference", bytes=len(str(prompt).encode("utf-8")), backend=self.llm.name,
+                  template=getattr(prompt, "template", None), stream=True) as trace:
+            async with self.semaphore:
+                async for delta in self.llm.agenerate_stream(prompt, usage=trace):
+                    if "first_token_ms" not in trace:
+                        trace["first_token_ms"] = round((time.perf_counter() - started) * 1000, 3)
+                    yield delta
+            if usage is not None:
+                usage.update({key: trace[key] for key in ("input_tokens", "output_tokens", "cached_tokens")
+                              if key in trace})
+
+    def warm_llm(self):
+        """Start a background LLM warm-up unless one ran in the last LLM_WARM_INTERVAL seconds."""
+        now = time.monotonic()
+        if now - self._warmed_at < LLM_WARM_INTERVAL or (self._warm_task and not self._warm_task.done()):
+            return
+        self._warmed_at = now
+
+        async def _warm():
+            with span("llm_warm", backend=self.llm.name):
+                await self.llm.awarm()
+
+        self._warm_task = asyncio.create_task(_warm())
+        self._warm_task.add_done_callback(_consume_exception)
+
+    def _answer_current(self, entry, chunk_ids):
+        """True when a logged answer can be reused: same hits, still within the cache TTL, no transcript edited since."""
+        if entry.get("ids") != chunk_ids or time.time() - entry["ts"] > self.answer_cache.ttl:
+            return False
+        for title in {chunk_id.split("__")[0] for chunk_id in chunk_ids}:
+            path = transcript_path(title)
+            if os.path.exists(path) and os.path.getmtime(path) > entry["ts"]:
+                return False
+        return True
+
+    async def warm_caches(self, top=WARM_TOP, days=WARM_DAYS, queries=()):
+        """
+        Seed the query-embedding cache with the `top` most frequent logged
+        questions of the last `days` plus `queries`, and the answer cache
+        with their logged answers where retrieval still returns the same chunks.
+        """
+        with span("cache_warm") as trace:
+            records = await asyncio.to_thread(read_queries, time.time() - days * 86400)
+            frequent = frequent_queries(records, top)
+            logged = {entry["query"] for entry in frequent}
+            frequent += [{"query": q} for q in dict.fromkeys(queries) if q not in logged]
+            trace.update(records=len(records), queries=len(frequent))
+            if not frequent:
+                return
+
+            vectors = await self.create_embedding([q["query"] for q in frequent])
+            answers = 0
+            for entry, vec in zip(frequent, vectors):
+                self.query_embeddings.put(entry["query"], vec)
+                if not entry.get("answer"):
+                    continue
+                chunk_ids, hits, _, _, _ = await self.vector_search(vec, entry["scope"], entry.get("k"))
+                if self._answer_current(entry, chunk_ids):
+                    self.answer_cache.put(vec, entry["scope"], chunk_ids, [h["title"] for h in hits], entry["answer"],
+                                          created=entry["ts"])
+                    answers += 1
+            trace["answers"] = answers
+
+    async def touch_index(self):
+        """
+        Search once with a stored vector, through Chroma's HNSW index and
+        through the routed path, so index segments, routing centroids and
+        lecture matrices are loaded before the first real query.
+        """
+        sample = await asyncio.to_thread(self.collection.get, limit=1, include=["embeddings"])
+        if not sample["ids"]:
+            return
+        vec = [float(x) for x in sample["embeddings"][0]]
+        await asyncio.to_thread(query_collection, self.collection, vec, ALL_LECTURES, candidate_count())
+        await self.vector_search(vec)
+
+    async def connect(self, connections=WARM_CONNECTIONS):
+        """Open pooled connections to the model APIs and load the generation model."""
+        backends = [self.embedder] if self.llm is self.embedder else [self.embedder, self.llm]
+        await asyncio.gather(self.llm.awarm(), *[b.aconnect(connections) for b in backends])
+
+    async def warm_up(self, queries=None):
+        """
+        Get ready for the first query: load the index and open the model
+        connections (concurrently), then warm the caches from the query log
+        and `queries` (default: the RAG_WARM_QUERIES file). Returns the
+        timings in ms.
+        """
+        timings = {}
+
+        async def _timed(step, coro):
+            started = time.perf_counter()
+            await coro
+            timings[f"{step}_ms"] = _elapsed_ms(started)
+
+        started = time.perf_counter()
+        with span("warm_up") as trace:
+            await asyncio.gather(_timed("index", self.touch_index()), _timed("connect", self.connect()))
+            queries = warm_queries() if queries is None else queries
+            await _timed("caches", self.warm_caches(queries=queries))
+            trace.update(timings)
+        timings["total_ms"] = _elapsed_ms(started)
+        return timings
+
+    # ---------- Retrieval ----------
+
+    async def embed_query(self, query):
+        q_emb = self.query_embeddings.get(query)
+        record_cache("embedding", q_emb is not None)
+        if q_emb is None:
+            q_emb = (await self.create_embedding([query]))[0]
+            self.query_embeddings.put(query, q_emb)
+        return q_emb
+
+    async def route(self, q_emb):
+        """
+        (titles, routes) for an "All Lectures" query: the lectures to limit
+        the chunk search to (None = all) and the best routing scores.
+        """
+        with span("lecture_route") as trace:
+            catalog = await asyncio.to_thread(lecture_catalog, self.collection)
+            titles, scores = self.router.route(q_emb, catalog)
+            trace.update(lectures=len(catalog), routed=titles is not None)
+        routes = [{"title": t, "score": s} for t, s in scores[:ROUTE_SUGGESTIONS]]
+        return titles, routes
+
+    async def vector_search(self, q_emb, topic=ALL_LECTURES, k=None):
+        """
+        Run the vector search and pick the hits to use. "All Lectures"
+        queries search only the lectures the router picks; those and scoped
+        queries use the per-lecture chunk matrices when they exist, Chroma
+        otherwise. k caps the hits (see select_hits). Returns (chunk_ids,
+        hits, dominant, routes, distances), distances being those of the
+        kept hits.
+        """
+        titles, routes = await self.route(q_emb) if topic == ALL_LECTURES else ([topic], [])
+        n = candidate_count(k)
+
+        results = None
+        if titles:
+            with span("lecture_search", k=n, lectures=len(titles)) as trace:
+                found = await asyncio.to_thread(self.router.search, q_emb, titles, n)
+                if found is not None:
+                    results = await asyncio.to_thread(fetch_results, self.collection, *found, self.space)
+                trace["status"] = "ok" if found is not None else "skipped"
+        if results is None:
+            with span("chroma_query", k=n, scoped=topic != ALL_LECTURES, routed=titles is not None):
+                results = await asyncio.to_thread(query_collection, self.collection, q_emb, topic, n,
+                                                  titles if topic == ALL_LECTURES else None)
+
+        chunk_ids, hits, dominant = select_hits(results, self.space, k)
+        distances = results["distances"][0][:len(chunk_ids)] if results["distances"] else []
+        return chunk_ids, hits, dominant, routes, distances
+
+    async def expand(self, hits, timeline=None):
+        """
+        Widen each hit to its surrounding transcript. `timeline` is an
+        in-flight load of the scoped lecture's timeline, awaited first so it
+        is not read twice.
+        """
+        if timeline is not None:
+            await asyncio.wait([timeline])
+        with span("expand_context", items=len(hits)) as trace:
+            top_chunks = await asyncio.to_thread(self.expander.expand, hits)
+            trace["windows"] = len(top_chunks)
+        return top_chunks
+
+    async def retrieve(self, query, topic=ALL_LECTURES, k=None):
+        """
+        Embed the query, run the vector search and widen each hit to its
+        surrounding transcript. Returns (query_embedding, chunk_ids, top_chunks).
+        """
+        q_emb = await self.embed_query(query)
+        chunk_ids, hits, _, _, _ = await self.vector_search(q_emb, topic, k)
+        return q_emb, chunk_ids, await self.expand(hits)
+
+    async def prepare(self, query, topic=ALL_LECTURES, k=None):
+        """
+        Everything before generation, with independent stages overlapped
+        instead of run back to back: the query embedding, the section index
+        lookup, loading the scoped lecture's timeline and the LLM warm-up all
+        start at once. The embedding is speculative: a section hit cancels it.
+        A navigational question whose top hit dominates the rest is answered
+        with that hit's timestamp, without expansion or an LLM call.
+
+        Returns (routed, retrieved): routed is navigate()'s (chunk, answer) or
+        None, retrieved is (query_embedding, chunk_ids, top_chunks, routes,
+        distances) or None.
+        Cancelling the caller cancels every stage still running.
+        """
+        embedding = asyncio.create_task(self.embed_query(query))
+        timeline = None
+        if topic != ALL_LECTURES:
+            timeline = asyncio.create_task(asyncio.to_thread(self.expander.timeline, topic))
+        self.warm_llm()
+
+        try:
+            routed = await asyncio.to_thread(self.navigate, query, topic)
+            if routed:
+                return routed, None
+            q_emb = await embedding
+            chunk_ids, hits, dominant, routes, distances = await self.vector_search(q_emb, topic, k)
+            if dominant and is_navigational(query):
+                return (hits[0], timestamp_answer(hits[0])), None
+            return None, (q_emb, chunk_ids, await self.expand(hits, timeline), routes, distances)
+        finally:
+            for task in (embedding, timeline):
+                if task is not None and not task.done():
+                    task.cancel()
+                if task is not None:
+                    task.add_done_callback(_consume_exception)
+
+    def navigate(self, query, topic=ALL_LECTURES):
+        """
+        (chunk, answer) from the section index for a navigational question,
+        or None to fall through to retrieval + LLM.
+        """
+        if not SECTION_ROUTING or not is_navigational(query):
+            return None
+        with span("section_lookup") as trace:
+            found = self.sections.lookup(query, None if topic == ALL_LECTURES else topic)
+            trace["hit"] = found is not None
+            if found is None:
+                return None
+            title, section, _ = found
+            segments = get_transcript(title, self.collection)
+            segment = locate(section, query, segments)
+            if hasattr(segments, "close"):
+                segments.close()
+
+        start, end = (segment[0], segment[1]) if segment else (section["start"], section["end"])
+        chunk = {
+            "title": title,
+            "number": section.get("number", "NA"),
+            "start": start,
+            "end": end,
+            "text": segment[2].strip() if segment else section["preview"]
+        }
+        return chunk, navigation_answer(title, section, segment)
+
+    async def search(self, query, topic=ALL_LECTURES, k=None):
+        """Return the top-k transcript chunks (scoped or global)."""
+        _, _, top_chunks = await self.retrieve(query, topic, k)
+        return top_chunks
+
+    async def answer(self, query, topic=ALL_LECTURES, k=None):
+        """Return (top_chunks, answer) for a question."""
+        async for event in self.answer_stream(query, topic, k):
+            if event["type"] == "chunks":
+                top_chunks, answer = event["chunks"], []
+            elif event["type"] == "delta":
+                answer.append(event["text"])
+        return top_chunks, "".join(answer) if answer else None
+
+    async def answer_stream(self, query, topic=ALL_LECTURES, k=None):
+        """
+        Yield answer events: one "chunks" event with the retrieved segments
+        (and, for "All Lectures", the lecture routing scores), "delta" events
+        with answer text, then "done". Generation starts as
+        soon as the top chunks are final; closing the generator cancels
+        whatever is still in flight.
+        """
+        started = time.perf_counter()
+        record = {"query": query, "scope": topic, "k": k}
+        routed, retrieved = await self.prepare(query, topic, k)
+        record["retrieve_ms"] = _elapsed_ms(started)
+        if routed:
+            yield {"type": "chunks", "chunks": [routed[0]]}
+            yield {"type": "delta", "text": routed[1]}
+            yield {"type": "done", "cached": False, "direct": True}
+            _log_query({**record, "direct": True, "title": routed[0]["title"], "total_ms": _elapsed_ms(started)})
+            return
+
+        q_emb, chunk_ids, top_chunks, routes, distances = retrieved
+        yield {"type": "chunks", "chunks": top_chunks, "routes": routes}
+        record.update(ids=chunk_ids, distances=[round(d, 4) for d in distances])
+
+        cached = None
+        if top_chunks:
+            cached = self.answer_cache.get(q_emb, topic, chunk_ids)
+            record_cache("answer", cached is not None)
+            if cached is not None:
+                yield {"type": "delta", "text": cached}
+            else:
+                parts = []
+                async for delta in self.inference_stream(answer_prompt(query, top_chunks), usage=record):
+                    if not parts:
+                        record["first_token_ms"] = _elapsed_ms(started)
+                    parts.append(delta)
+                    yield {"type": "delta", "text": delta}
+                record["answer"] = "".join(parts)
+                self.answer_cache.put(q_emb, topic, chunk_ids, [c["title"] for c in top_chunks], record["answer"])
+
+        yield {"type": "done", "cached": cached is not None}
+        _log_query({**record, "cached": cached is not None, "total_ms": _elapsed_ms(started)})
+
+    def invalidate_lecture(self, title):
+        """Forget everything derived from this lecture: answers, timeline, sections, routes (call after delete / re-index)."""
+        self.expander.invalidate(title)
+        self.sections.invalidate(title)
+        self.router.invalidate(title)
+        return self.answer_cache.invalidate_title(title)
+
+    # ---------- Summaries ----------
+
+    async def summarize_stream(self, title):
+        """
+        Quick summary and detailed notes, generated concurrently. Yields
+        {"type": "quick", "text"} as soon as the quick summary is complete,
+        {"type": "delta", "text"} while the detailed notes stream, then
+        {"type": "done", "quick", "full"}. Closing the generator (lecture
+        switched, client gone) cancels whatever is still generating.
+        """
+        started = time.perf_counter()
+        # Ranked below searches when the model's rate limit is contended
+        with span("summarize_lecture_both", stream=True) as trace, request_priority(SUMMARY):
+            # Segments already in playback order (precomputed at ingest)
+            segments = await asyncio.to_thread(get_transcript, title, self.collection)
+            try:
+                full_text = "\n".join(text for _, _, text in segments)
+                trace.update(items=len(segments), bytes=len(full_text.encode("utf-8")))
+            finally:
+                if hasattr(segments, "close"):
+                    segments.close()
+            quick_prompt, full_prompt = summary_prompts(title, full_text)
+
+            events = asyncio.Queue()
+            prefix_cached = asyncio.Event()
+
+            async def _quick():
+                parts = []
+                async for delta in self.inference_stream(quick_prompt):
+                    prefix_cached.set()
+                    parts.append(delta)
+                await events.put({"type": "quick", "text": "".join(parts)})
+
+            async def _detailed():
+                if SUMMARY_SHARE_PREFIX:
+                    await prefix_cached.wait()
+                async for delta in self.inference_stream(full_prompt):
+                    await events.put({"type": "delta", "text": delta})
+
+            quick = asyncio.create_task(_quick())
+            quick.add_done_callback(lambda _: prefix_cached.set())
+            tasks = [quick, asyncio.create_task(_detailed())]
+            for task in tasks:
+                # The finished task itself marks the end of its events
+                task.add_done_callback(events.put_nowait)
+
+            quick_summary, full_parts, running = None, [], len(tasks)
+            try:
+                while running:
+                    event = await events.get()
+                    if isinstance(event, asyncio.Task):
+                        running -= 1
+                        if not event.cancelled() and event.exception() is not None:
+                            raise event.exception()
+                        continue
+                    if event["type"] == "quick":
+                        quick_summary = event["text"]
+                        trace["first_summary_ms"] = round((time.perf_counter() - started) * 1000, 3)
+                    else:
+                        full_parts.append(event["text"])
+                    yield event
+            finally:
+                for task in tasks:
+                    task.cancel()
+                    task.add_done_callback(_consume_exception)
+
+            yield {"type": "done", "quick": quick_summary, "full": "".join(full_parts)}
+
+    async def summarize_lecture_both(self, title):
+        """(quick summary, detailed notes) once both are complete."""
+        summaries = None
+        async for event in self.summarize_stream(title):
+            if event["type"] == "done":
+                summaries = event["quick"], event["full"]
+        return summaries
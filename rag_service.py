@@ -0,0 +1,283 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+
+from aiohttp import web
+from rag_pipeline import RAGPipeline, ALL_LECTURES
+from metrics import render_prometheus, set_gauge
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+SERVICE_HOST = os.getenv("RAG_SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.getenv("RAG_SERVICE_PORT", "8765"))
+# The service reports ready once its startup warm-up finishes, or after this
+# many seconds if it has not (requests are served either way)
+WARMUP_TIMEOUT = float(os.getenv("RAG_WARMUP_TIMEOUT", "30"))
+
+
+# ============================================================
+# REQUEST HELPERS
+# ============================================================
+
+async def _read_json(request):
+    try:
+        return await request.json()
+    except json.JSONDecodeError:
+        raise web.HTTPBadRequest(text="Request body must be JSON")
+
+
+def _require(body, key):
+    value = str(body.get(key, "")).strip()
+    if not value:
+        raise web.HTTPBadRequest(text=f"'{key}' is required")
+    return value
+
+
+def _positive_int(body, key, default=None):
+    value = body.get(key)
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise web.HTTPBadRequest(text=f"'{key}' must be an integer")
+    if value < 1:
+        raise web.HTTPBadRequest(text=f"'{key}' must be at least 1")
+    return value
+
+
+async def _write_event(response, event):
+    await response.write((json.dumps(event) + "\n").encode("utf-8"))
+
+
+def _supersede(app, session, task):
+    """Make task the session's in-flight request (of one kind), cancelling the one it replaces."""
+    previous = app["inflight"].get(session)
+    if previous is not None and not previous.done():
+        app["superseded"].add(previous)
+        previous.cancel()
+    app["inflight"][session] = task
+
+
+def _release(app, session, task):
+    if app["inflight"].get(session) is task:
+        del app["inflight"][session]
+    app["superseded"].discard(task)
+
+
+async def _stream_events(request, events, session=None):
+    """
+    Write an async generator's events as NDJSON. With a session key the
+    stream can be superseded or cancelled; it then ends with a
+    "cancelled" event.
+    """
+    response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+    await response.prepare(request)
+
+    async def _pump():
+        async for event in events:
+            await _write_event(response, event)
+
+    work = asyncio.ensure_future(_pump())
+    if session:
+        _supersede(request.app, session, work)
+    try:
+        await work
+    except asyncio.CancelledError:
+        if work not in request.app["superseded"]:
+            raise
+        await _write_event(response, {"type": "cancelled"})
+    except Exception as e:
+        await _write_event(response, {"type": "error", "message": str(e)})
+    finally:
+        if session:
+            _release(request.app, session, work)
+
+    await response.write_eof()
+    return response
+
+
+# ============================================================
+# ROUTES
+# ============================================================
+
+async def handle_health(request):
+    """Liveness plus readiness: "ready" turns true when the startup warm-up is over, with its timings."""
+    return web.json_response({"status": "ok", **request.app["warmup"]})
+
+
+async def handle_metrics(request):
+    return web.Response(text=render_prometheus(), content_type="text/plain", charset="utf-8",
+                        headers={"X-Prometheus-Format": "0.0.4"})
+
+
+async def handle_search(request):
+    body = await _read_json(request)
+    query = _require(body, "query")
+    pipeline = request.app["pipeline"]
+
+    chunks = await pipeline.search(
+        query,
+        body.get("topic", ALL_LECTURES),
+        _positive_int(body, "k")
+    )
+    return web.json_response({"chunks": chunks})
+
+
+async def handle_answer(request):
+    """
+    Answer a question.
+
+    With "stream": true (default) the reply is NDJSON: one "chunks" event with
+    the retrieved segments, then "delta" events with answer text, then "done".
+
+    Requests carrying a "session" id cancel that session's previous answer if
+    it is still running; the superseded stream ends with a "cancelled" event.
+    """
+    body = await _read_json(request)
+    query = _require(body, "query")
+    topic = body.get("topic", ALL_LECTURES)
+    k = _positive_int(body, "k")
+    pipeline = request.app["pipeline"]
+
+    if not body.get("stream", True):
+        chunks, answer = await pipeline.answer(query, topic, k)
+        return web.json_response({"chunks": chunks, "answer": answer})
+
+    session = body.get("session")
+    return await _stream_events(request, pipeline.answer_stream(query, topic, k),
+                                ("answer", session) if session else None)
+
+
+async def handle_summarize(request):
+    """
+    Quick summary + detailed notes of a lecture, generated concurrently.
+
+    With "stream": true the reply is NDJSON: a "quick" event with the whole
+    quick summary as soon as it is ready, "delta" events with detailed-notes
+    text, then "done" with both. A "session" id works as for /answer: the
+    session's next summary request (or /cancel) cancels this one.
+    """
+    body = await _read_json(request)
+    title = _require(body, "title")
+    pipeline = request.app["pipeline"]
+
+    if not body.get("stream"):
+        quick_summary, full_summary = await pipeline.summarize_lecture_both(title)
+        return web.json_response({"quick": quick_summary, "full": full_summary})
+
+    session = body.get("session")
+    return await _stream_events(request, pipeline.summarize_stream(title),
+                                ("summary", session) if session else None)
+
+
+async def handle_cancel(request):
+    """Cancel a session's in-flight answer and/or summary ("kind": "answer" | "summary", default both)."""
+    body = await _read_json(request)
+    session = _require(body, "session")
+    kinds = [body["kind"]] if body.get("kind") else ["answer", "summary"]
+    cancelled = 0
+    for kind in kinds:
+        task = request.app["inflight"].get((kind, session))
+        if task is not None and not task.done():
+            request.app["superseded"].add(task)
+            task.cancel()
+            cancelled += 1
+    return web.json_response({"cancelled": cancelled})
+
+
+async def handle_invalidate(request):
+    body = await _read_json(request)
+    title = _require(body, "title")
+    dropped = request.app["pipeline"].invalidate_lecture(title)
+    return web.json_response({"invalidated": dropped})
+
+
+# ============================================================
+# APP FACTORY & RUNNERS
+# ============================================================
+
+async def _warm_up(app):
+    """Warm the pipeline up, then mark the service ready (also when warm-up fails or overruns)."""
+    warmup = app["warmup"]
+    try:
+        warmup.update(await asyncio.wait_for(app["pipeline"].warm_up(), WARMUP_TIMEOUT))
+    except asyncio.TimeoutError:
+        warmup["error"] = f"warm-up timed out after {WARMUP_TIMEOUT:.0f}s"
+    except Exception as e:
+        warmup["error"] = f"warm-up failed: {e}"
+    warmup["ready"] = True
+    set_gauge("service_ready", 1, help="1 once the startup warm-up has finished")
+    print(f"RAG service ready: {warmup}", file=sys.stderr)
+
+
+def create_app(pipeline=None):
+    app = web.Application()
+    app["pipeline"] = pipeline
+    app["inflight"] = {}      # (kind, session id) -> its running answer / summary task
+    app["superseded"] = set()
+    app["warmup"] = {"ready": False}
+
+    async def _startup(app):
+        if app["pipeline"] is None:
+            app["pipeline"] = RAGPipeline()
+        # Runs in the background so /health answers (not ready) meanwhile
+        set_gauge("service_ready", 0, help="1 once the startup warm-up has finished")
+        app["warmup_task"] = asyncio.create_task(_warm_up(app))
+
+    async def _cleanup(app):
+        app["warmup_task"].cancel()
+        await app["pipeline"].aclose()
+
+    app.on_startup.append(_startup)
+    app.on_cleanup.append(_cleanup)
+
+    app.router.add_get("/health", handle_health)
+    app.router.add_get("/metrics", handle_metrics)
+    app.router.add_post("/search", handle_search)
+    app.router.add_post("/answer", handle_answer)
+    app.router.add_post("/summarize", handle_summarize)
+    app.router.add_post("/invalidate", handle_invalidate)
+    app.router.add_post("/cancel", handle_cancel)
+    return app
+
+
+def start_in_thread(host=SERVICE_HOST, port=SERVICE_PORT, pipeline=None):
+    """
+    Run the service on a daemon thread with its own event loop.
+    Returns the base URL once the socket is listening.
+    """
+    ready = threading.Event()
+    result = {}
+
+    def _run():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        runner = web.AppRunner(create_app(pipeline))
+        try:
+            loop.run_until_complete(runner.setup())
+            loop.run_until_complete(web.TCPSite(runner, host, port).start())
+            bound_host, bound_port = runner.addresses[0][:2]
+            result["url"] = f"http://{bound_host}:{bound_port}"
+        except Exception as e:
+            result["error"] = e
+            ready.set()
+            return
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=_run, name="rag-service", daemon=True).start()
+    ready.wait()
+
+    if "error" in result:
+        raise result["error"]
+    return result["url"]
+
+
+if __name__ == "__main__":
+    sys.stdout.reconfigure(encoding="utf-8")
+    web.run_app(create_app(), host=SERVICE_HOST, port=SERVICE_PORT)
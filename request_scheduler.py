@@ -0,0 +1,470 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import os
+import random
+import struct
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from dotenv import load_dotenv
+from openai import APIConnectionError, APIStatusError
+
+from metrics import set_gauge, span
+
+try:
+    import fcntl
+except ImportError:      # Windows: buckets are kept per process
+    fcntl = None
+
+load_dotenv()
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+# Every OpenAI request goes through one scheduler per process. Each model
+# has a requests/min and a tokens/min token bucket; their levels live in a
+# small flock-ed file per model, so the Streamlit app, the RAG service and
+# the transcription subprocesses on one host draw from the same budget.
+# Waiting requests are granted by priority class, and lower classes leave
+# a reserve of each bucket untouched so searches never queue behind ingest
+# running in another process. Read when the scheduler is created.
+#
+#   RAG_SCHEDULER            "0" sends requests straight to the API (SDK retries only)
+#   RAG_RATE_LIMITS          per-model overrides, "model=rpm:tpm,..." (0 = unlimited)
+#   RAG_RATE_LIMIT_DIR       shared bucket state (~/rag_data/ratelimit)
+#   RAG_MAX_RETRIES          retries of 429 / 5xx / connection errors (6)
+
+BASE_DATA_DIR = os.path.join(os.path.expanduser("~"), "rag_data")
+
+# Roughly an entry usage tier; set RAG_RATE_LIMITS to the account's limits
+DEFAULT_LIMITS = {
+    "gpt-5": (500, 500_000),
+    "text-embedding-3-large": (3_000, 1_000_000),
+    "whisper-1": (50, 0),
+}
+
+# The API enforces limits over windows shorter than a minute, so a bucket
+# holds at most this many seconds' worth of requests / tokens
+BURST_SECONDS = 10
+
+INTERACTIVE, SUMMARY, BACKGROUND = 0, 1, 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", SUMMARY: "summary", BACKGROUND: "background"}
+# Fraction of each bucket a priority class may not use
+RESERVES = {INTERACTIVE: 0.0, SUMMARY: 0.1, BACKGROUND: 0.3}
+
+BACKOFF_BASE_S = 0.5
+BACKOFF_MAX_S = 30.0
+# Output tokens charged up front for a generation, settled against the real usage
+OUTPUT_TOKEN_ESTIMATE = 1000
+# Waiting requests re-check the shared buckets at least this often
+POLL_S = 0.25
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+def scheduler_enabled():
+    return os.getenv("RAG_SCHEDULER", "1") != "0"
+
+
+def parse_limits(spec, defaults=DEFAULT_LIMITS):
+    """"gpt-5=500:30000,whisper-1=50:0" on top of the defaults."""
+    limits = dict(defaults)
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        model, _, values = item.partition("=")
+        rpm, _, tpm = values.partition(":")
+        limits[model.strip()] = (int(rpm or 0), int(tpm or 0))
+    return limits
+
+
+def estimate_tokens(texts):
+    """~4 characters per token, as the API estimates before counting."""
+    if isinstance(texts, str):
+        texts = [texts]
+    return sum(len(t) // 4 + 1 for t in texts)
+
+
+# ============================================================
+# PRIORITY CONTEXT
+# ============================================================
+
+_priority = contextvars.ContextVar("request_priority", default=None)
+
+
+@contextmanager
+def request_priority(priority):
+    """Run the enclosed model calls (sync or async) in a priority class."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority(default):
+    priority = _priority.get()
+    return default if priority is None else priority
+
+
+# ============================================================
+# TOKEN BUCKETS
+# ============================================================
+
+_STATE = struct.Struct("<4d")    # requests, tokens, updated (epoch s), paused until (epoch s)
+
+
+class ModelLimiter:
+    """
+    Requests/min and tokens/min buckets of one model. With a state_dir the
+    levels are kept in a file locked for each update, shared by every
+    process on the host; otherwise in memory.
+    """
+
+    def __init__(self, model, rpm, tpm, state_dir=None):
+        self.model = model
+        self.rates = (rpm / 60, tpm / 60)
+        self.capacity = (max(1.0, rpm * BURST_SECONDS / 60), max(1.0, tpm * BURST_SECONDS / 60))
+        self.limited = bool(rpm or tpm)
+        self._lock = threading.Lock()
+        self._state = None
+        self._fd = None
+        if state_dir and fcntl is not None and self.limited:
+            os.makedirs(state_dir, exist_ok=True)
+            self._fd = os.open(os.path.join(state_dir, f"{model}.bucket"), os.O_RDWR | os.O_CREAT, 0o644)
+
+    def _full(self):
+        return [*self.capacity, time.time(), 0.0]
+
+    @contextmanager
+    def _locked(self):
+        with self._lock:
+            if self._fd is None:
+                if self._state is None:
+                    self._state = self._full()
+                yield self._state
+                return
+
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                raw = os.pread(self._fd, _STATE.size, 0)
+                state = list(_STATE.unpack(raw)) if len(raw) == _STATE.size else self._full()
+                yield state
+                os.pwrite(self._fd, _STATE.pack(*state), 0)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _refill(self, state, now):
+        elapsed = max(0.0, now - state[2])
+        for i in (0, 1):
+            state[i] = min(self.capacity[i], state[i] + elapsed * self.rates[i])
+        state[2] = now
+
+    def try_take(self, tokens, reserve=0.0):
+        """Take one request and `tokens`: 0 on success, else seconds until they could be taken."""
+        if not self.limited:
+            return 0.0
+        now = time.time()
+        with self._locked() as state:
+            self._refill(state, now)
+            if state[3] > now:
+                return state[3] - now
+
+            wait = 0.0
+            for i, amount in ((0, 1.0), (1, float(tokens))):
+                if not self.rates[i]:
+                    continue
+                floor = reserve * self.capacity[i]
+                # A request larger than the bucket waits for a full one and leaves it in debt
+                need = floor + min(amount, self.capacity[i] - floor)
+                if state[i] < need:
+                    wait = max(wait, (need - state[i]) / self.rates[i])
+            if wait == 0.0:
+                state[0] -= 1.0
+                state[1] -= tokens
+            return wait
+
+    def adjust(self, requests=0.0, tokens=0.0):
+        """Give back (positive) or charge (negative) capacity, e.g. once real usage is known."""
+        if not self.limited:
+            return
+        with self._locked() as state:
+            self._refill(state, time.time())
+            state[0] = min(self.capacity[0], state[0] + requests)
+            state[1] = min(self.capacity[1], state[1] + tokens)
+
+    def pause(self, seconds):
+        """Hold every request for this model, in all processes (after a 429)."""
+        if not self.limited:
+            return
+        with self._locked() as state:
+            state[3] = max(state[3], time.time() + seconds)
+
+
+# ============================================================
+# SCHEDULER
+# ============================================================
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "tokens", "wake", "granted", "cancelled")
+
+    def __init__(self, priority, seq, tokens, wake):
+        self.priority = priority
+        self.seq = seq
+        self.tokens = tokens
+        self.wake = wake
+        self.granted = False
+        self.cancelled = False
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class RequestScheduler:
+    """
+    Admits model requests against per-model rate limits. A request that
+    fits the buckets and has nobody queued ahead of it runs at once;
+    otherwise it waits in a per-model heap (priority class, then arrival)
+    that a dispatcher thread drains as the buckets refill. Sync callers
+    block on an event, async callers await a future, so ingest threads and
+    the RAG service's event loop share one queue.
+    """
+
+    def __init__(self, limits=None, state_dir=None, max_retries=None):
+        self.limits = limits if limits is not None else parse_limits(os.getenv("RAG_RATE_LIMITS"))
+        self.state_dir = state_dir if state_dir is not None else os.getenv(
+            "RAG_RATE_LIMIT_DIR", os.path.join(BASE_DATA_DIR, "ratelimit"))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("RAG_MAX_RETRIES", "6"))
+        self._limiters = {}
+        self._queues = defaultdict(list)     # model -> heap of _Waiter
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._dispatcher = None
+
+    def limiter(self, model):
+        with self._cond:
+            if model not in self._limiters:
+                rpm, tpm = self.limits.get(model, (0, 0))
+                self._limiters[model] = ModelLimiter(model, rpm, tpm, self.state_dir)
+            return self._limiters[model]
+
+    # ---------- Queue ----------
+
+    def queue_depth(self):
+        """{model: {priority name: waiting requests}}."""
+        with self._cond:
+            depth = {}
+            for model, queue in self._queues.items():
+                counts = {name: 0 for name in PRIORITY_NAMES.values()}
+                for waiter in queue:
+                    if not waiter.cancelled:
+                        counts[PRIORITY_NAMES[waiter.priority]] += 1
+                depth[model] = counts
+            return depth
+
+    def _publish(self, model):
+        counts = defaultdict(int)
+        for waiter in self._queues[model]:
+            if not waiter.cancelled:
+                counts[waiter.priority] += 1
+        for priority, name in PRIORITY_NAMES.items():
+            set_gauge("scheduler_queue_depth", counts[priority],
+                      help="Model requests waiting for rate-limit capacity.", model=model, priority=name)
+
+    def _submit(self, model, tokens, priority, wake):
+        """Take capacity right away (returns None) or queue a waiter the dispatcher wakes."""
+        limiter = self.limiter(model)
+        with self._cond:
+            queue = self._queues[model]
+            if not queue and limiter.try_take(tokens, RESERVES[priority]) == 0.0:
+                return None
+            waiter = _Waiter(priority, next(self._seq), tokens, wake)
+            heapq.heappush(queue, waiter)
+            self._publish(model)
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._dispatch, name="request-scheduler", daemon=True)
+                self._dispatcher.start()
+            self._cond.notify()
+            return waiter
+
+    def _cancel(self, waiter, model, tokens=0):
+        """Withdraw a request: dequeue its waiter, or refund the capacity it was granted (waiter None: granted at submit)."""
+        with self._cond:
+            if waiter is None or waiter.granted:
+                self._limiters[model].adjust(requests=1.0, tokens=tokens)
+            else:
+                waiter.cancelled = True
+            self._publish(model)
+            self._cond.notify()
+
+    def _dispatch(self):
+        with self._cond:
+            while True:
+                timeout = None
+                for model, queue in self._queues.items():
+                    if not queue:
+                        continue
+                    limiter = self._limiters[model]
+                    while queue:
+                        head = queue[0]
+                        if head.cancelled:
+                            heapq.heappop(queue)
+                            continue
+                        wait = limiter.try_take(head.tokens, RESERVES[head.priority])
+                        if wait > 0.0:
+                            timeout = wait if timeout is None else min(timeout, wait)
+                            break
+                        heapq.heappop(queue)
+                        head.granted = True
+                        head.wake()
+                    self._publish(model)
+                # Other processes draw from the same buckets, so re-check regularly
+                self._cond.wait(None if timeout is None else min(timeout, POLL_S))
+
+    def acquire(self, model, tokens=0, priority=BACKGROUND):
+        event = threading.Event()
+        if self._submit(model, tokens, priority, event.set) is not None:
+            event.wait()
+
+    async def aacquire(self, model, tokens=0, priority=INTERACTIVE):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def wake():
+            try:
+                loop.call_soon_threadsafe(_resolve, future)
+            except RuntimeError:
+                pass    # loop already closed
+
+        def abandon(submitted):
+            if not submitted.cancelled() and submitted.exception() is None:
+                loop.run_in_executor(None, self._cancel, submitted.result(), model, tokens)
+
+        # _submit and _cancel take the cross-process bucket lock (flock + file
+        # I/O), so they run on the thread pool rather than on the event loop
+        submit = loop.run_in_executor(None, self._submit, model, tokens, priority, wake)
+        try:
+            if await asyncio.shield(submit) is None:
+                return
+            await future
+        except asyncio.CancelledError:
+            submit.add_done_callback(abandon)
+            raise
+
+    # ---------- Retries ----------
+
+    def _retry_delay(self, error, attempt):
+        """Seconds to wait before retrying `error`, or None if it should propagate."""
+        if attempt >= self.max_retries:
+            return None
+        if isinstance(error, APIStatusError):
+            if error.status_code not in RETRYABLE_STATUS:
+                return None
+            headers = error.response.headers
+            retry_after = None
+            try:
+                if "retry-after-ms" in headers:
+                    retry_after = float(headers["retry-after-ms"]) / 1000
+                elif "retry-after" in headers:
+                    retry_after = float(headers["retry-after"])
+            except ValueError:
+                pass
+            if retry_after is not None and 0 < retry_after <= BACKOFF_MAX_S:
+                delay = retry_after * random.uniform(1.0, 1.25)
+            else:
+                delay = self._backoff(attempt)
+            return delay
+        if isinstance(error, APIConnectionError):
+            return self._backoff(attempt)
+        return None
+
+    @staticmethod
+    def _backoff(attempt):
+        """Exponential backoff with jitter, so rejected callers do not retry in lockstep."""
+        ceiling = min(BACKOFF_MAX_S, BACKOFF_BASE_S * 2 ** attempt)
+        return random.uniform(ceiling / 2, ceiling)
+
+    @staticmethod
+    def _rate_limited(error):
+        # Everyone sharing the budget backs off on a 429, not just this request
+        return isinstance(error, APIStatusError) and error.status_code == 429
+
+    def settle(self, model, estimated, actual):
+        """Correct the tokens charged up front once the response reports its usage."""
+        if actual is not None and actual != estimated:
+            self.limiter(model).adjust(tokens=estimated - actual)
+
+    async def asettle(self, model, estimated, actual):
+        """settle() without taking the bucket lock on the event loop."""
+        await asyncio.get_running_loop().run_in_executor(None, self.settle, model, estimated, actual)
+
+    # ---------- Calls ----------
+
+    def call(self, model, fn, tokens=0, priority=None, used=None):
+        """
+        Run fn() once `model` has capacity for one request and `tokens`,
+        retrying rate limits, 5xx and connection errors. used(result)
+        returns the tokens actually consumed. Priority defaults to
+        BACKGROUND (sync callers are ingest jobs).
+        """
+        priority = current_priority(BACKGROUND) if priority is None else priority
+        for attempt in itertools.count():
+            with span("rate_limit_wait", model=model, priority=PRIORITY_NAMES[priority], retry=attempt):
+                self.acquire(model, tokens, priority)
+            try:
+                result = fn()
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                if self._rate_limited(e):
+                    self.limiter(model).pause(delay)
+                with span("rate_limit_backoff", model=model, reason=getattr(e, "status_code", "connection")):
+                    time.sleep(delay)
+                continue
+            if used is not None:
+                self.settle(model, tokens, used(result))
+            return result
+
+    async def acall(self, model, fn, tokens=0, priority=None, used=None):
+        """Async call(); fn returns an awaitable. Priority defaults to INTERACTIVE."""
+        priority = current_priority(INTERACTIVE) if priority is None else priority
+        for attempt in itertools.count():
+            with span("rate_limit_wait", model=model, priority=PRIORITY_NAMES[priority], retry=attempt):
+                await self.aacquire(model, tokens, priority)
+            try:
+                result = await fn()
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                if self._rate_limited(e):
+                    await asyncio.get_running_loop().run_in_executor(None, self.limiter(model).pause, delay)
+                with span("rate_limit_backoff", model=model, reason=getattr(e, "status_code", "connection")):
+                    await asyncio.sleep(delay)
+                continue
+            if used is not None:
+                await self.asettle(model, tokens, used(result))
+            return result
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """The process-wide scheduler, or None when RAG_SCHEDULER=0."""
+    global _scheduler
+    if not scheduler_enabled():
+        return None
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RequestScheduler()
+        return _scheduler
@@ -0,0 +1,87 @@
+import os
+from dotenv import load_dotenv
+from section_index import format_ts
+
+load_dotenv()
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+# How many retrieved chunks reach the LLM is decided per query from the
+# similarity scores Chroma returns, instead of a fixed top-k. Scores are
+# cosine similarities, so the thresholds below depend on the embedding
+# model; the defaults are tuned on benchmarks/retrieval_benchmark.py.
+
+ADAPTIVE_K = os.getenv("RAG_ADAPTIVE_K", "1") != "0"
+MIN_K = int(os.getenv("RAG_MIN_K", "1"))
+# Candidates fetched from Chroma; flat score distributions may use all of them
+MAX_K = int(os.getenv("RAG_MAX_K", "10"))
+
+# Hits scoring more than this below the best one are dropped
+SCORE_MARGIN = float(os.getenv("RAG_SCORE_MARGIN", "0.1"))
+# A drop of at least this much between consecutive hits ends the list (elbow)
+ELBOW_GAP = float(os.getenv("RAG_ELBOW_GAP", "0.05"))
+# The top hit "dominates" when it leads the runner-up by this much and is a
+# good match in itself (a lone weak hit is no answer)
+DOMINANT_GAP = float(os.getenv("RAG_DOMINANT_GAP", "0.15"))
+DOMINANT_MIN_SCORE = float(os.getenv("RAG_DOMINANT_MIN_SCORE", "0.5"))
+
+
+# ============================================================
+# SCORES
+# ============================================================
+
+def collection_space(collection):
+    return (collection.metadata or {}).get("hnsw:space", "l2")
+
+
+def similarities(distances, space="l2"):
+    """Chroma distances → cosine similarities (embeddings are unit length)."""
+    if space == "l2":
+        # Squared L2 between unit vectors is 2 - 2·cos
+        return [1 - d / 2 for d in distances]
+    return [1 - d for d in distances]
+
+
+def distances(scores, space="l2"):
+    """Inverse of similarities(): cosine similarities → Chroma distances."""
+    if space == "l2":
+        return [2 - 2 * s for s in scores]
+    return [1 - s for s in scores]
+
+
+def choose_k(scores, min_k=MIN_K, max_k=MAX_K):
+    """
+    Number of hits to keep from scores sorted best first: those within
+    SCORE_MARGIN of the best, cut at the largest gap if it is an elbow.
+    """
+    if not scores:
+        return 0
+    n = min(len(scores), max_k)
+    keep = sum(1 for s in scores[:n] if s >= scores[0] - SCORE_MARGIN)
+
+    gaps = [scores[i] - scores[i + 1] for i in range(keep - 1)]
+    if gaps:
+        cut = max(range(len(gaps)), key=gaps.__getitem__)
+        if gaps[cut] >= ELBOW_GAP:
+            keep = cut + 1
+    return max(min(min_k, n), keep)
+
+
+def is_dominant(scores):
+    """True when the best of at least two candidates scores well and clearly outscores the rest."""
+    if len(scores) < 2:
+        return False
+    return scores[0] >= DOMINANT_MIN_SCORE and scores[0] - scores[1] >= DOMINANT_GAP
+
+
+# ============================================================
+# DIRECT ANSWERS
+# ============================================================
+
+def timestamp_answer(chunk):
+    """Templated answer pointing at one dominant segment (no LLM call)."""
+    return (
+        f"**{chunk['title']}** covers this at `{format_ts(chunk['start'])}–{format_ts(chunk['end'])}`:\n"
+        f"- \"{chunk['text'].strip()}\""
+    )
@@ -0,0 +1,363 @@
+import json
+import math
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+from dotenv import load_dotenv
+
+from chroma_client import COLLECTION_NAME
+
+load_dotenv()
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+# Per collection, like the lecture routes: sections are cut from its embeddings
+SECTIONS_DIR = os.path.join(os.getenv(
+    "RAG_SECTIONS_DIR",
+    os.path.join(os.path.expanduser("~"), "rag_data", "sections")
+), COLLECTION_NAME)
+
+WINDOW_S = 20.0          # transcript is compared in windows of about this length
+CONTEXT_WINDOWS = 3      # windows on each side of a candidate boundary
+MIN_SECTION_S = 60.0     # shortest section worth navigating to
+SECTION_TERMS = 40       # per-section terms kept for lookup
+
+# Navigational questions ("when is X explained?") can be answered from the
+# section index without an LLM call when the best section scores at least
+# this. Off by default: on the retrieval benchmark it is less accurate than
+# vector search, whose dominant-hit direct answers cover the same questions
+SECTION_ROUTING = os.getenv("RAG_SECTION_ROUTING", "0") == "1"
+MIN_NAV_SCORE = float(os.getenv("RAG_SECTION_MIN_SCORE", "0.3"))
+
+_STOPWORDS = set("""
+a about after again all also am an and any are around as at be because been before being below between both
+but by can could did do does doing done don down during each even every few for from further get gets getting
+go goes going gonna got guys had has have having he her here hers him his how i if in into is it its itself
+just know let lets like look make many may me means might more most much must my need now of off ok okay on
+once one only or other our out over own particular please put really right said same say says see she should
+so some something such suppose take than thank thanks that the their them then there these they thing things
+think this those through thus to too try two uh um understand under until up us use used using very want was
+way we well were what whatever when where whether which while who whom why will with would yeah yes you your
+""".split())
+
+# Words that make a question navigational rather than part of its topic
+_NAV_WORDS = set("""
+timestamp timestamps time minute minutes second seconds part section point moment lecture video audio clip
+explained explain explains explaining discussed discuss discusses covered cover covers mentioned mention
+talked talk talks introduced introduce introduces described describe shown show shows taught teach jump find
+start starts begin begins where when
+""".split())
+
+_NAV_PATTERN = re.compile(
+    r"\b(at what (time|timestamp|point|minute)|what (time|timestamp|minute)|which (part|section|minute)"
+    r"|where (is|are|does|do|did|in the)|when (is|are|does|do|did)|timestamp|jump to|skip to|find the part)\b",
+    re.IGNORECASE
+)
+
+
+def _terms(text):
+    words = re.findall(r"[a-z][a-z0-9]+", text.lower())
+    # Crude plural folding so "trees" matches "tree"
+    return [w[:-1] if len(w) > 3 and w.endswith("s") and not w.endswith("ss") else w
+            for w in words if w not in _STOPWORDS]
+
+
+def is_navigational(query):
+    return bool(_NAV_PATTERN.search(query))
+
+
+def format_ts(seconds):
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
+
+
+# ============================================================
+# SEGMENTATION (INGEST)
+# ============================================================
+
+def _unit(v):
+    norm = np.linalg.norm(v)
+    return v / norm if norm else v
+
+
+def _windows(segments):
+    """Group consecutive segments into ~WINDOW_S windows of segment indexes."""
+    windows, current = [], []
+    for i, (start, end, _) in enumerate(segments):
+        current.append(i)
+        if end - segments[current[0]][0] >= WINDOW_S:
+            windows.append(current)
+            current = []
+    if current:
+        windows.append(current)
+    return windows
+
+
+def find_boundaries(segments, embeddings):
+    """
+    Segment indexes where a new topic starts (TextTiling over embeddings).
+
+    Each gap between windows is scored by the cosine similarity of the
+    windows before vs after it. Gaps sitting in a deep valley of that curve
+    are topic changes. The deepest are kept first, so every section lasts
+    at least MIN_SECTION_S.
+    """
+    vectors = np.asarray(embeddings, dtype=np.float32)
+    windows = _windows(segments)
+    if len(windows) < 3:
+        return []
+
+    window_vecs = np.stack([_unit(vectors[w].mean(axis=0)) for w in windows])
+    sims = []
+    for gap in range(1, len(windows)):
+        left = _unit(window_vecs[max(0, gap - CONTEXT_WINDOWS):gap].mean(axis=0))
+        right = _unit(window_vecs[gap:gap + CONTEXT_WINDOWS].mean(axis=0))
+        sims.append(float(left @ right))
+
+    depths = []
+    for i, sim in enumerate(sims):
+        left_peak = max(sims[max(0, i - CONTEXT_WINDOWS):i + 1])
+        right_peak = max(sims[i:i + CONTEXT_WINDOWS + 1])
+        depths.append((left_peak - sim) + (right_peak - sim))
+
+    cutoff = float(np.mean(depths) + 0.5 * np.std(depths))
+    candidates = sorted(
+        (i for i, d in enumerate(depths) if d > cutoff and d > 0),
+        key=lambda i: -depths[i]
+    )
+
+    lecture_start, lecture_end = segments[0][0], segments[-1][1]
+    chosen = []
+    for i in candidates:
+        boundary = windows[i + 1][0]
+        t = segments[boundary][0]
+        edges = [lecture_start] + sorted(segments[b][0] for b in chosen) + [lecture_end]
+        if all(abs(t - e) >= MIN_SECTION_S for e in edges):
+            chosen.append(boundary)
+    return sorted(chosen)
+
+
+def build_sections(segments, embeddings):
+    """
+    Topical sections of one lecture: title (distinctive keywords), time span,
+    ordinal range, a representative line and weighted terms for lookups.
+    """
+    if not segments:
+        return []
+
+    bounds = [0] + find_boundaries(segments, embeddings) + [len(segments)]
+    spans = list(zip(bounds, bounds[1:]))
+    counts = [Counter(t for s in segments[lo:hi] for t in _terms(s[2])) for lo, hi in spans]
+    df = Counter(term for c in counts for term in c)
+    vectors = np.asarray(embeddings, dtype=np.float32)
+
+    sections = []
+    for (lo, hi), count in zip(spans, counts):
+        weights = {t: n * math.log(1 + len(spans) / df[t]) for t, n in count.items()}
+        top = sorted(weights, key=lambda t: -weights[t])
+        keywords = [t for t in top if count[t] >= 2][:3] or top[:3]
+
+        centroid = _unit(vectors[lo:hi].mean(axis=0))
+        central = lo + int(np.argmax(vectors[lo:hi] @ centroid))
+        preview = segments[central][2].strip()
+
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        sections.append({
+            "title": " · ".join(k.capitalize() for k in keywords) or "Section",
+            "start": segments[lo][0],
+            "end": segments[hi - 1][1],
+            "first_ordinal": lo,
+            "last_ordinal": hi - 1,
+            "preview": preview[:160],
+            "terms": {t: round(weights[t] / norm, 4) for t in top[:SECTION_TERMS]}
+        })
+    return sections
+
+
+# ============================================================
+# STORAGE
+# ============================================================
+
+def sections_path(title):
+    return os.path.join(SECTIONS_DIR, f"{title}.json")
+
+
+def save_sections(title, sections):
+    os.makedirs(SECTIONS_DIR, exist_ok=True)
+    tmp = sections_path(title) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"title": title, "sections": sections}, f, ensure_ascii=False)
+    os.replace(tmp, sections_path(title))
+
+
+def load_sections(title):
+    try:
+        with open(sections_path(title), "r", encoding="utf-8") as f:
+            return json.load(f)["sections"]
+    except FileNotFoundError:
+        return []
+
+
+def delete_sections(title):
+    if os.path.exists(sections_path(title)):
+        os.remove(sections_path(title))
+
+
+def index_lecture(title, chunks, embeddings, ordinals=None):
+    """
+    Ingest stage: chunks in playback order with their embeddings. When the
+    chunks skip some of the transcript, `ordinals` gives each one's position
+    in it, so section ordinal ranges still index get_transcript().
+    """
+    segments = [[c["start"], c["end"], c["text"]] for c in chunks]
+    sections = build_sections(segments, embeddings)
+    for section in sections:
+        section["number"] = chunks[0].get("number", "NA")
+        if ordinals is not None:
+            section["first_ordinal"] = ordinals[section["first_ordinal"]]
+            section["last_ordinal"] = ordinals[section["last_ordinal"]]
+    save_sections(title, sections)
+    return sections
+
+
+# ============================================================
+# LOOKUP
+# ============================================================
+
+class SectionIndex:
+    """
+    In-memory inverted index (term -> sections) over every lecture's
+    section file. Re-scans the folder at most every refresh_s so lectures
+    indexed by another process show up without a restart.
+    """
+
+    def __init__(self, refresh_s=5.0):
+        self.refresh_s = refresh_s
+        self._lock = threading.Lock()
+        self._mtimes = {}
+        self._sections = {}       # lecture title -> sections
+        self._postings = {}       # term -> [(lecture title, section index, weight)]
+        self._checked = 0.0
+
+    def _refresh(self):
+        now = time.monotonic()
+        if now - self._checked < self.refresh_s:
+            return
+        self._checked = now
+
+        mtimes = {}
+        if os.path.isdir(SECTIONS_DIR):
+            for entry in os.scandir(SECTIONS_DIR):
+                if entry.name.endswith(".json"):
+                    mtimes[entry.name[:-5]] = entry.stat().st_mtime
+        if mtimes == self._mtimes:
+            return
+
+        sections = {t: self._sections[t] if self._mtimes.get(t) == m else load_sections(t)
+                    for t, m in mtimes.items()}
+        postings = {}
+        for title, lecture_sections in sections.items():
+            for i, section in enumerate(lecture_sections):
+                for term, weight in section["terms"].items():
+                    postings.setdefault(term, []).append((title, i, weight))
+        self._mtimes, self._sections, self._postings = mtimes, sections, postings
+
+    def invalidate(self, title=None):
+        with self._lock:
+            self._checked = 0.0
+
+    def sections(self, title):
+        with self._lock:
+            self._refresh()
+            return self._sections.get(title, [])
+
+    def lookup(self, query, topic=None):
+        """Best (lecture title, section, score) for the query's topic words, or None."""
+        words = [t for t in _terms(query) if t not in _NAV_WORDS]
+        if not words:
+            return None
+
+        with self._lock:
+            self._refresh()
+            scores = Counter()
+            matched = {}
+            for word in set(words):
+                for title, i, weight in self._postings.get(word, ()):
+                    if topic and title != topic:
+                        continue
+                    scores[(title, i)] += weight
+                    matched.setdefault((title, i), set()).add(word)
+            if not scores:
+                return None
+
+            # Sections must cover most of the question's words, not just one
+            need = max(1, math.ceil(len(set(words)) * 2 / 3))
+            ranked = [(s, key) for key, s in scores.items()
+                      if len(matched[key]) >= need and s >= MIN_NAV_SCORE]
+            if not ranked:
+                return None
+            score, (title, i) = max(ranked)
+            return title, self._sections[title][i], score
+
+
+def navigation_answer(title, section, segment=None):
+    """Templated answer for a navigational question (no LLM call)."""
+    when = f"{format_ts(section['start'])}–{format_ts(section['end'])}"
+    lines = [f"**{title}** covers this in the section **{section['title']}** ({when})."]
+    if segment:
+        lines.append(f"- It comes up at `{format_ts(segment[0])}`: \"{segment[2].strip()}\"")
+    lines.append(f"- Section overview: {section['preview']}")
+    return "\n".join(lines)
+
+
+def locate(section, query, segments):
+    """The first segment inside the section that mentions most of the query's words."""
+    words = {t for t in _terms(query) if t not in _NAV_WORDS}
+    best, best_hits = None, 0
+    for segment in segments[section["first_ordinal"]:section["last_ordinal"] + 1]:
+        hits = len(words & set(_terms(segment[2])))
+        if hits > best_hits:
+            best, best_hits = segment, hits
+    return best
+
+
+# ============================================================
+# BACKFILL CLI
+# ============================================================
+
+def backfill(titles=None):
+    """Build section files for lectures indexed before this stage existed."""
+    from chroma_client import get_chroma, iter_records, lecture_titles
+    from chroma_maintenance import read_embeddings
+    from transcripts import order_chunks
+
+    _, collection = get_chroma()
+    for title in titles or lecture_titles(collection):
+        records = list(iter_records(collection, ("documents", "metadatas"), where={"title": title}))
+        vectors = dict(zip((r["id"] for r in records), read_embeddings(collection, [r["id"] for r in records])))
+        # Every record in transcript order (as transcripts._rebuild_from_store
+        # orders them), so ordinals match get_transcript()
+        chunks = sorted(({**r["metadata"], "text": r["document"], "id": r["id"]} for r in records),
+                        key=lambda c: (c.get("ordinal", float("inf")), c["start"]))
+        if any("ordinal" not in c for c in chunks):
+            chunks = order_chunks(chunks)
+        # Records whose vector was lost from the index are left out of segmentation
+        kept = [(i, c) for i, c in enumerate(chunks) if vectors[c["id"]] is not None]
+        if not kept:
+            print(f"   - no vectors  {title}")
+            continue
+        sections = index_lecture(title, [c for _, c in kept], [vectors[c["id"]] for _, c in kept],
+                                 ordinals=[i for i, _ in kept])
+        print(f"{len(sections):>4} sections  {title}")
+
+
+if __name__ == "__main__":
+    backfill(sys.argv[1:] or None)
@@ -0,0 +1,130 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+# Streamlit re-runs app.py per session but imports modules once per
+# process, so objects held here are shared by every browser session.
+# Sessions keep only small per-user values (history, selected lecture,
+# the title of the summary on screen).
+
+HISTORY_SIZE = int(os.getenv("RAG_HISTORY_SIZE", "50"))
+SUMMARY_CACHE_SIZE = int(os.getenv("RAG_SUMMARY_CACHE_SIZE", "64"))
+CATALOG_TTL = float(os.getenv("RAG_CATALOG_TTL", "30"))
+
+
+# ============================================================
+# CACHES
+# ============================================================
+
+class LRUCache:
+    """Thread-safe LRU mapping with an optional per-entry TTL (seconds)."""
+
+    def __init__(self, max_entries, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()   # key -> (stored_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            if self.ttl is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return entry[1] if entry else None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class QueryHistory:
+    """
+    A session's recent questions, newest first, capped at max_entries.
+    Membership and re-asking are O(1); re-asking moves a question to the top.
+    """
+
+    def __init__(self, max_entries=HISTORY_SIZE):
+        self.max_entries = max_entries
+        self._queries = {}   # insertion-ordered: oldest -> newest
+
+    def add(self, query):
+        self._queries.pop(query, None)
+        self._queries[query] = None
+        if len(self._queries) > self.max_entries:
+            del self._queries[next(iter(self._queries))]
+
+    def __contains__(self, query):
+        return query in self._queries
+
+    def __iter__(self):
+        return reversed(self._queries)
+
+    def __len__(self):
+        return len(self._queries)
+
+
+# ============================================================
+# PROCESS-WIDE OBJECTS
+# ============================================================
+
+_collection = None
+_collection_lock = threading.Lock()
+
+# title -> (quick_summary, full_summary)
+summaries = LRUCache(SUMMARY_CACHE_SIZE)
+_catalog = LRUCache(1, ttl=CATALOG_TTL)
+
+
+def get_collection():
+    """One Chroma client/collection handle for the whole process."""
+    global _collection
+    with _collection_lock:
+        if _collection is None:
+            from chroma_client import get_chroma
+            _, _collection = get_chroma()
+        return _collection
+
+
+def lecture_catalog(collection):
+    """Indexed lecture titles, re-read from Chroma at most every CATALOG_TTL seconds."""
+    titles = _catalog.get("titles")
+    if titles is None:
+        from chroma_client import lecture_titles
+        titles = lecture_titles(collection)
+        _catalog.put("titles", titles)
+    return titles
+
+
+def invalidate_lecture(title):
+    """Drop shared state derived from a lecture (call after ingest, delete or re-index)."""
+    summaries.pop(title)
+    _catalog.clear()
@@ -0,0 +1,60 @@
+import time
+
+from answer_cache import SemanticAnswerCache
+
+CHUNKS = ["lecture a__1", "lecture a__2"]
+
+
+def test_near_duplicate_query_is_served():
+    cache = SemanticAnswerCache(threshold=0.9, ttl=60)
+    cache.put([1.0, 0.0], "All", CHUNKS, ["lecture a"], "answer")
+    assert cache.get([0.99, 0.05], "All", list(reversed(CHUNKS))) == "answer"
+    assert cache.hits == 1
+
+
+def test_threshold():
+    cache = SemanticAnswerCache(threshold=0.9, ttl=60)
+    cache.put([1.0, 0.0], "All", CHUNKS, ["lecture a"], "answer")
+    # cos = 0.8
+    assert cache.get([0.8, 0.6], "All", CHUNKS) is None
+    assert cache.misses == 1
+
+
+def test_other_chunks_or_scope_miss():
+    cache = SemanticAnswerCache(threshold=0.9, ttl=60)
+    cache.put([1.0, 0.0], "All", CHUNKS, ["lecture a"], "answer")
+    assert cache.get([1.0, 0.0], "All", CHUNKS[:1]) is None
+    assert cache.get([1.0, 0.0], "lecture a", CHUNKS) is None
+
+
+def test_ttl():
+    cache = SemanticAnswerCache(threshold=0.9, ttl=60)
+    cache.put([1.0, 0.0], "All", CHUNKS, ["lecture a"], "old", created=time.time() - 120)
+    assert cache.get([1.0, 0.0], "All", CHUNKS) is None
+    assert len(cache) == 0
+
+    cache.put([1.0, 0.0], "All", CHUNKS, ["lecture a"], "recent", created=time.time() - 30)
+    assert cache.get([1.0, 0.0], "All", CHUNKS) == "recent"
+
+
+def test_invalidate_title():
+    cache = SemanticAnswerCache(threshold=0.9, ttl=60)
+    cache.put([1.0, 0.0], "All", CHUNKS, ["lecture a"], "a")
+    cache.put([0.0, 1.0], "All", ["lecture b__1"], ["lecture b"], "b")
+    cache.put([1.0, 1.0], "All", ["lecture a__1", "lecture b__1"], ["lecture a", "lecture b"], "ab")
+
+    assert cache.invalidate_title("lecture a") == 2
+    assert cache.get([1.0, 0.0], "All", CHUNKS) is None
+    assert cache.get([0.0, 1.0], "All", ["lecture b__1"]) == "b"
+    assert cache.invalidate_title("lecture a") == 0
+
+
+def test_lru_eviction():
+    cache = SemanticAnswerCache(threshold=0.9, ttl=60, max_entries=2)
+    cache.put([1.0, 0.0], "All", ["x__1"], ["x"], "1")
+    cache.put([1.0, 0.0], "All", ["x__2"], ["x"], "2")
+    assert cache.get([1.0, 0.0], "All", ["x__1"]) == "1"
+    cache.put([1.0, 0.0], "All", ["x__3"], ["x"], "3")
+    assert len(cache) == 2
+    assert cache.get([1.0, 0.0], "All", ["x__2"]) is None
+    assert cache.get([1.0, 0.0], "All", ["x__1"]) == "1"
@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+import binary_transcript
+from binary_transcript import MappedTranscript
+
+SEGMENTS = [[0.0, 4.5, "Welcome to the course."], [4.5, 9.0, "Bayes’ theorem — part 1"], [9.0, 12.25, ""]]
+META = {"title": "Lecture 1", "number": "1"}
+
+
+@pytest.fixture
+def rtx(tmp_path):
+    path = str(tmp_path / "lecture.rtx")
+    binary_transcript.write(path, SEGMENTS, META)
+    return path
+
+
+def test_round_trip(rtx):
+    with MappedTranscript(rtx) as transcript:
+        assert transcript.meta == META
+        assert transcript.title == "Lecture 1"
+        assert len(transcript) == len(SEGMENTS)
+        assert list(transcript) == SEGMENTS
+        assert transcript[-1] == SEGMENTS[-1]
+        assert transcript[1:] == SEGMENTS[1:]
+        assert transcript.full_text() == "\n".join(s[2] for s in SEGMENTS)
+        with pytest.raises(IndexError):
+            transcript[len(SEGMENTS)]
+
+
+def test_index_at(rtx):
+    with MappedTranscript(rtx) as transcript:
+        assert transcript.index_at(0.0) == 0
+        assert transcript.index_at(4.5) == 1
+        assert transcript.index_at(100.0) == 2
+        assert transcript.index_at(-1.0) == 0
+
+
+def test_empty_transcript(tmp_path):
+    path = str(tmp_path / "empty.rtx")
+    binary_transcript.write(path, [], {"title": None})
+    with MappedTranscript(path) as transcript:
+        assert not transcript
+        assert list(transcript) == []
+
+
+def test_json_conversion_round_trip(tmp_path):
+    chunks = [{"number": "1", "title": "Lecture 1", "start": s, "end": e, "text": t} for s, e, t in SEGMENTS]
+    json_path = tmp_path / "lecture.json"
+    # Converters order chunks by time and drop empty ones
+    json_path.write_text(json.dumps({"chunks": chunks[::-1]}), encoding="utf-8")
+
+    (tmp_path / "out").mkdir()
+    rtx = binary_transcript.json_to_rtx(str(json_path), str(tmp_path / "out"))
+    back = binary_transcript.rtx_to_json(rtx)
+    with open(back, encoding="utf-8") as f:
+        assert json.load(f)["chunks"] == chunks[:2]
+
+
+@pytest.mark.parametrize("data", [b"", b"not a transcript", b"\0" * 64])
+def test_rejects_other_files(tmp_path, data):
+    path = tmp_path / "bad.rtx"
+    path.write_bytes(data)
+    with pytest.raises(ValueError):
+        MappedTranscript(str(path))
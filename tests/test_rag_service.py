@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+from rag_pipeline import ALL_LECTURES
+from rag_service import create_app
+
+
+class RecordingPipeline:
+    """Stands in for RAGPipeline: records the arguments the handlers pass on."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def warm_up(self):
+        return {}
+
+    async def aclose(self):
+        pass
+
+    async def search(self, query, topic, k):
+        self.calls.append(("search", query, topic, k))
+        return [{"title": "Lecture 1", "text": query}]
+
+    async def answer(self, query, topic, k):
+        self.calls.append(("answer", query, topic, k))
+        return [], "answer"
+
+    async def answer_stream(self, query, topic, k):
+        self.calls.append(("answer_stream", query, topic, k))
+        yield {"type": "chunks", "chunks": []}
+        yield {"type": "delta", "text": "answer"}
+        yield {"type": "done"}
+
+    def invalidate_lecture(self, title):
+        self.calls.append(("invalidate", title))
+        return 0
+
+
+def post(path, pipeline=None, **kwargs):
+    """(status, body text) of one request against a fresh app."""
+    async def run():
+        async with TestClient(TestServer(create_app(pipeline or RecordingPipeline()))) as client:
+            response = await client.post(path, **kwargs)
+            return response.status, await response.text()
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("path", ["/search", "/answer", "/summarize", "/invalidate", "/cancel"])
+def test_body_must_be_json(path):
+    status, text = post(path, data="not json", headers={"Content-Type": "application/json"})
+    assert status == 400
+    assert "JSON" in text
+
+
+@pytest.mark.parametrize("path, key", [
+    ("/search", "query"), ("/answer", "query"), ("/summarize", "title"), ("/invalidate", "title"),
+    ("/cancel", "session"),
+])
+def test_required_fields(path, key):
+    for body in ({}, {key: ""}, {key: "   "}):
+        status, text = post(path, json=body)
+        assert status == 400
+        assert f"'{key}' is required" in text
+
+
+@pytest.mark.parametrize("k, message", [("many", "must be an integer"), (0, "at least 1"), (-3, "at least 1")])
+def test_bad_k(k, message):
+    pipeline = RecordingPipeline()
+    for path in ("/search", "/answer"):
+        status, text = post(path, pipeline, json={"query": "bayes", "k": k})
+        assert status == 400
+        assert message in text
+    assert pipeline.calls == []
+
+
+def test_search_defaults():
+    pipeline = RecordingPipeline()
+    status, text = post("/search", pipeline, json={"query": "  bayes  "})
+    assert status == 200
+    assert json.loads(text)["chunks"][0]["text"] == "bayes"
+    assert pipeline.calls == [("search", "bayes", ALL_LECTURES, None)]
+
+
+def test_answer_k_and_stream():
+    pipeline = RecordingPipeline()
+    status, text = post("/answer", pipeline, json={"query": "bayes", "topic": "Lecture 1", "k": "3"})
+    assert status == 200
+    events = [json.loads(line) for line in text.splitlines()]
+    assert [e["type"] for e in events] == ["chunks", "delta", "done"]
+    assert pipeline.calls == [("answer_stream", "bayes", "Lecture 1", 3)]
+
+    status, text = post("/answer", pipeline, json={"query": "bayes", "stream": False})
+    assert status == 200
+    assert json.loads(text) == {"chunks": [], "answer": "answer"}
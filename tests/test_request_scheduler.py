@@ -0,0 +1,94 @@
+import time
+
+import pytest
+
+from request_scheduler import BURST_SECONDS, INTERACTIVE, ModelLimiter, RequestScheduler, parse_limits
+
+# 60 requests / 600 tokens per minute: 1 request and 10 tokens per second
+RPM, TPM = 60, 600
+CAPACITY = (RPM * BURST_SECONDS / 60, TPM * BURST_SECONDS / 60)
+
+
+def level(limiter):
+    with limiter._locked() as state:
+        return state[0], state[1]
+
+
+def test_take_and_refill():
+    limiter = ModelLimiter("m", RPM, TPM)
+    assert limiter.capacity == CAPACITY
+    assert limiter.try_take(40) == 0.0
+    requests, tokens = level(limiter)
+    assert requests == pytest.approx(CAPACITY[0] - 1, abs=0.05)
+    assert tokens == pytest.approx(CAPACITY[1] - 40, abs=0.5)
+
+    # 60 tokens left; 80 more need 2 s of refill at 10 tokens/s, and nothing is taken
+    assert limiter.try_take(80) == pytest.approx(2.0, abs=0.05)
+    assert level(limiter)[1] == pytest.approx(CAPACITY[1] - 40, abs=0.5)
+
+
+def test_oversized_request_waits_for_full_bucket():
+    limiter = ModelLimiter("m", RPM, TPM)
+    limiter.try_take(50)
+    # Waits until the bucket is full again, then leaves it in debt
+    assert limiter.try_take(500) == pytest.approx(5.0, abs=0.05)
+    limiter.adjust(tokens=CAPACITY[1])
+    assert limiter.try_take(500) == 0.0
+    assert level(limiter)[1] == pytest.approx(CAPACITY[1] - 500, abs=0.5)
+
+
+def test_reserve():
+    limiter = ModelLimiter("m", RPM, TPM)
+    assert limiter.try_take(75) == 0.0
+    # 25 tokens left: below a 30% reserve (30 tokens), not below none
+    assert limiter.try_take(1, reserve=0.3) > 0.0
+    assert limiter.try_take(1) == 0.0
+
+
+def test_adjust_is_capped():
+    limiter = ModelLimiter("m", RPM, TPM)
+    limiter.try_take(40)
+    limiter.adjust(requests=5, tokens=1000)
+    assert level(limiter) == CAPACITY
+
+
+def test_pause():
+    limiter = ModelLimiter("m", RPM, TPM)
+    limiter.pause(3)
+    assert limiter.try_take(1) == pytest.approx(3.0, abs=0.05)
+
+
+def test_unlimited_model():
+    limiter = ModelLimiter("m", 0, 0)
+    assert all(limiter.try_take(10 ** 9) == 0.0 for _ in range(100))
+
+
+def test_state_file_is_shared(tmp_path):
+    a = ModelLimiter("m", RPM, TPM, state_dir=str(tmp_path))
+    b = ModelLimiter("m", RPM, TPM, state_dir=str(tmp_path))
+    assert a.try_take(90) == 0.0
+    assert b.try_take(90) > 0.0
+    b.pause(2)
+    assert a.try_take(1) == pytest.approx(2.0, abs=0.05)
+
+
+def test_settle_refunds_overestimate():
+    scheduler = RequestScheduler(limits={"m": (RPM, TPM)}, state_dir="")
+    scheduler.call("m", lambda: None, tokens=80)
+    before = level(scheduler.limiter("m"))[1]
+    scheduler.settle("m", 80, 30)
+    assert level(scheduler.limiter("m"))[1] == pytest.approx(before + 50, abs=0.5)
+
+
+def test_scheduler_waits_for_capacity():
+    scheduler = RequestScheduler(limits={"m": (RPM, TPM)}, state_dir="")
+    scheduler.call("m", lambda: None, tokens=CAPACITY[1], priority=INTERACTIVE)
+    started = time.monotonic()
+    scheduler.call("m", lambda: None, tokens=10, priority=INTERACTIVE)
+    assert time.monotonic() - started == pytest.approx(1.0, abs=0.3)
+    assert scheduler.queue_depth()["m"] == {"interactive": 0, "summary": 0, "background": 0}
+
+
+def test_parse_limits():
+    limits = parse_limits("gpt-5=100:2000, whisper-1=5", defaults={"gpt-5": (1, 1), "x": (2, 2)})
+    assert limits == {"gpt-5": (100, 2000), "x": (2, 2), "whisper-1": (5, 0)}
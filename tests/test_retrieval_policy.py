@@ -0,0 +1,52 @@
+import pytest
+
+import retrieval_policy
+from retrieval_policy import choose_k, is_dominant
+
+
+@pytest.fixture(autouse=True)
+def default_thresholds(monkeypatch):
+    monkeypatch.setattr(retrieval_policy, "SCORE_MARGIN", 0.1)
+    monkeypatch.setattr(retrieval_policy, "ELBOW_GAP", 0.05)
+    monkeypatch.setattr(retrieval_policy, "DOMINANT_GAP", 0.15)
+    monkeypatch.setattr(retrieval_policy, "DOMINANT_MIN_SCORE", 0.5)
+
+
+def test_no_scores():
+    assert choose_k([]) == 0
+
+
+def test_keeps_hits_within_margin():
+    assert choose_k([0.9, 0.89, 0.88, 0.6], min_k=1, max_k=10) == 3
+
+
+def test_cuts_at_elbow():
+    assert choose_k([0.9, 0.83, 0.82, 0.6], min_k=1, max_k=10) == 1
+
+
+def test_min_k():
+    assert choose_k([0.9, 0.83, 0.82, 0.6], min_k=2, max_k=10) == 2
+    # Never more than there are
+    assert choose_k([0.9], min_k=3, max_k=10) == 1
+
+
+def test_flat_scores_capped_by_max_k():
+    assert choose_k([0.7] * 10, min_k=1, max_k=4) == 4
+
+
+@pytest.mark.parametrize("scores, dominant", [
+    ([], False),
+    ([0.9], False),
+    ([0.8, 0.6], True),
+    ([0.8, 0.7], False),
+    ([0.4, 0.1], False),
+])
+def test_is_dominant(scores, dominant):
+    assert is_dominant(scores) is dominant
+
+
+def test_similarities_round_trip():
+    scores = [0.9, 0.5, -0.2]
+    for space in ("l2", "cosine"):
+        back = retrieval_policy.similarities(retrieval_policy.distances(scores, space), space)
+        assert back == pytest.approx(scores)
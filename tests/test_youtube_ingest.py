@@ -0,0 +1,77 @@
+import os
+import time
+
+import pytest
+
+import youtube_ingest
+from benchmarks.ingest_benchmark import serve
+
+NAMES = ["lecture one.mp3", "lecture two.mp3", "lecture three.mp3"]
+
+
+@pytest.fixture
+def playlist(tmp_path, monkeypatch):
+    media = tmp_path / "media"
+    media.mkdir()
+    for i, name in enumerate(NAMES):
+        (media / name).write_bytes(bytes([i]) * 4096)
+    monkeypatch.setattr(youtube_ingest, "DOWNLOADS_DIR", str(tmp_path / "downloads"))
+    monkeypatch.setattr(youtube_ingest, "SOURCES_FILE", str(tmp_path / "sources.json"))
+    return serve(str(media), throttle_kbps=0) + "?run=test"
+
+
+def test_list_entries(playlist):
+    assert len(youtube_ingest.list_entries(playlist)) == len(NAMES)
+
+
+def test_file_urls_are_refused_by_default(tmp_path):
+    path = tmp_path / "local.mp3"
+    path.write_bytes(b"\0" * 16)
+    with pytest.raises(Exception):
+        youtube_ingest.list_entries(path.as_uri())
+
+
+def test_download_audio_keeps_same_titles_apart(playlist):
+    items = youtube_ingest.list_entries(playlist)
+    for item in items:
+        item["title"] = "Same title"
+    downloads = [youtube_ingest.download_audio(item) for item in items]
+    lectures = {lecture for lecture, _, _ in downloads}
+    assert len(lectures) == len(NAMES)
+    for lecture, title, path in downloads:
+        assert title == "Same title"
+        assert os.path.exists(path)
+        assert lecture == os.path.splitext(os.path.basename(path))[0]
+        assert lecture in youtube_ingest.load_sources()
+
+    lecture, title, path = youtube_ingest.download_audio(items[0], skip=lambda lecture: True)
+    assert path is None
+
+
+def test_ingest(playlist):
+    processed = []
+
+    def process(path):
+        processed.append(path)
+        os.remove(path)
+        return 1
+
+    events = list(youtube_ingest.ingest([playlist], download_workers=2, ingest_workers=1, process=process))
+    kinds = [e["type"] for e in events]
+    assert kinds[0] == "listed" and events[0]["count"] == len(NAMES)
+    assert kinds.count("downloaded") == kinds.count("indexed") == len(NAMES)
+    assert len(processed) == len(NAMES)
+
+
+def test_ingest_closed_early_leaves_no_files(playlist):
+    def process(path):
+        time.sleep(0.2)
+        os.remove(path)
+        return 1
+
+    events = youtube_ingest.ingest([playlist], download_workers=1, ingest_workers=1, process=process)
+    for event in events:
+        if event["type"] == "downloaded":
+            break
+    events.close()
+    assert os.listdir(youtube_ingest.DOWNLOADS_DIR) == []
@@ -0,0 +1,99 @@
+import json
+import os
+from dotenv import load_dotenv
+from binary_transcript import EXTENSION, MappedTranscript, write
+from chroma_client import iter_records
+
+load_dotenv()
+
+# ============================================================
+# ORDERED LECTURE TRANSCRIPTS
+# ============================================================
+# One file per lecture holding its segments in playback order, written at
+# ingest in the columnar .rtx format (binary_transcript.py). Reading a
+# transcript maps the file; segments are decoded only when accessed, so
+# windowed lookups never parse the whole lecture. Legacy .json files are
+# converted on first read, and lectures indexed before these files existed
+# are rebuilt from the vector store once and saved.
+
+TRANSCRIPTS_DIR = os.getenv(
+    "RAG_TRANSCRIPTS_DIR",
+    os.path.join(os.path.expanduser("~"), "rag_data", "transcripts")
+)
+
+
+def transcript_path(title):
+    return os.path.join(TRANSCRIPTS_DIR, f"{title}{EXTENSION}")
+
+
+def _legacy_path(title):
+    return os.path.join(TRANSCRIPTS_DIR, f"{title}.json")
+
+
+def order_chunks(chunks):
+    """Chunks in playback order with an integer "ordinal" (0..n-1) set on each."""
+    ordered = sorted(chunks, key=lambda c: (c["start"], c["end"]))
+    return [{**c, "ordinal": i} for i, c in enumerate(ordered)]
+
+
+def write_transcript(title, chunks):
+    """Save already-ordered chunks as segments [start, end, text] (index = ordinal)."""
+    os.makedirs(TRANSCRIPTS_DIR, exist_ok=True)
+    meta = {"title": title, "number": chunks[0].get("number") if chunks else None}
+    write(transcript_path(title), [[c["start"], c["end"], c["text"]] for c in chunks], meta)
+
+
+def delete_transcript(title):
+    for path in (transcript_path(title), _legacy_path(title)):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _migrate_legacy(title):
+    """Convert a pre-.rtx JSON transcript in place. False if there is none."""
+    try:
+        with open(_legacy_path(title), "r", encoding="utf-8") as f:
+            segments = json.load(f)["segments"]
+    except FileNotFoundError:
+        return False
+    write(transcript_path(title), segments, {"title": title, "number": None})
+    os.remove(_legacy_path(title))
+    return True
+
+
+def _rebuild_from_store(title, collection):
+    records = [
+        {**r["metadata"], "text": r["document"]}
+        for r in iter_records(collection, ("documents", "metadatas"), where={"title": title})
+    ]
+    if not records:
+        return []
+    # Stored ordinals win; older records without one fall back to their start time
+    records.sort(key=lambda m: (m.get("ordinal", float("inf")), m["start"]))
+    chunks = order_chunks(records) if any("ordinal" not in m for m in records) else records
+    write_transcript(title, chunks)
+    return MappedTranscript(transcript_path(title))
+
+
+def get_transcript(title, collection=None):
+    """
+    A lecture's segments [start, end, text] in playback order (index is the
+    segment ordinal), as a memory-mapped sequence to close after use. Empty
+    if the lecture is unknown.
+    """
+    try:
+        return MappedTranscript(transcript_path(title))
+    except FileNotFoundError:
+        if _migrate_legacy(title):
+            return MappedTranscript(transcript_path(title))
+        if collection is None:
+            return []
+        return _rebuild_from_store(title, collection)
+
+
+def transcript_text(title, collection=None):
+    segments = get_transcript(title, collection)
+    if not hasattr(segments, "close"):
+        return "\n".join(text for _, _, text in segments)
+    with segments:
+        return segments.full_text()
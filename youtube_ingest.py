@@ -0,0 +1,260 @@
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import yt_dlp
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ============================================================
+# CONFIGURATION
+# ============================================================
+
+BASE_DATA_DIR = os.path.join(os.path.expanduser("~"), "rag_data")
+DOWNLOADS_DIR = os.path.join(BASE_DATA_DIR, "downloads")
+VIDEOS_DIR = os.path.join(BASE_DATA_DIR, "videos")
+AUDIOS_DIR = os.path.join(BASE_DATA_DIR, "audios")
+
+# Lecture title -> page URL it was imported from (for fetching the video later)
+SOURCES_FILE = os.path.join(BASE_DATA_DIR, "sources.json")
+
+# Downloads are network-bound, processing (ffmpeg + transcription + embedding)
+# is CPU/API-bound; each stage gets its own pool so they overlap
+DOWNLOAD_WORKERS = int(os.getenv("RAG_DOWNLOAD_WORKERS", "3"))
+INGEST_WORKERS = int(os.getenv("RAG_INGEST_WORKERS", "2"))
+
+# Most entries taken from one playlist / channel URL
+PLAYLIST_LIMIT = int(os.getenv("RAG_PLAYLIST_LIMIT", "50"))
+
+AUDIO_FORMAT = "bestaudio/best"
+VIDEO_FORMAT = "bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]/best"
+
+_sources_lock = threading.Lock()
+
+
+def _ydl_opts(allow_files=False, **extra):
+    # file:// URLs would let whoever types a URL into the app make the
+    # server ingest its local files; only tests / benchmarks enable them
+    return {"quiet": True, "no_warnings": True, "noprogress": True, "enable_file_urls": allow_files, **extra}
+
+
+# ============================================================
+# SOURCES
+# ============================================================
+
+def load_sources():
+    try:
+        with open(SOURCES_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _write_sources(sources):
+    os.makedirs(BASE_DATA_DIR, exist_ok=True)
+    tmp = SOURCES_FILE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(sources, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, SOURCES_FILE)
+
+
+def record_source(title, url):
+    with _sources_lock:
+        sources = load_sources()
+        sources[title] = url
+        _write_sources(sources)
+
+
+def forget_source(title):
+    with _sources_lock:
+        sources = load_sources()
+        if sources.pop(title, None) is not None:
+            _write_sources(sources)
+
+
+# ============================================================
+# STAGES
+# ============================================================
+
+def list_entries(url, limit=PLAYLIST_LIMIT, allow_files=False):
+    """
+    Items behind a video, playlist or channel URL, listed flat (nothing is
+    downloaded). An item is a URL, or an already-resolved info dict for
+    extractors that return full entries (e.g. media embedded in a web page).
+    """
+    opts = _ydl_opts(allow_files, extract_flat="in_playlist", playlistend=limit)
+    with yt_dlp.YoutubeDL(opts) as ydl:
+        info = ydl.extract_info(url, download=False)
+
+    if info.get("_type") not in ("playlist", "multi_video"):
+        return [info.get("webpage_url") or url]
+
+    urls = []
+    for entry in info.get("entries") or []:
+        if not entry:
+            continue
+        if entry.get("_type") == "playlist":
+            # Channels list their tabs (videos, shorts...) as nested playlists
+            urls.extend(list_entries(entry["url"], limit - len(urls), allow_files))
+        elif entry.get("_type") == "url":
+            urls.append(entry["url"])
+        else:
+            urls.append(entry)
+        if len(urls) >= limit:
+            break
+    return urls[:limit]
+
+
+def download_audio(item, skip=None, allow_files=False):
+    """
+    Download the best audio-only stream of a list_entries() item as-is (no
+    video, no merge). Returns (lecture, title, path): the lecture name is
+    the file name, "<title> [<video id>]" so videos sharing a title stay
+    apart; title is the video's own, for display. path is None if
+    skip(lecture) says it is already indexed.
+    """
+    os.makedirs(DOWNLOADS_DIR, exist_ok=True)
+    opts = _ydl_opts(allow_files, format=AUDIO_FORMAT, noplaylist=True,
+                     outtmpl=os.path.join(DOWNLOADS_DIR, "%(title).100B [%(id)s].%(ext)s"))
+    with yt_dlp.YoutubeDL(opts) as ydl:
+        info = ydl.extract_info(item, download=False) if isinstance(item, str) else item
+        lecture = os.path.splitext(os.path.basename(ydl.prepare_filename(info)))[0]
+        title = info.get("title") or lecture
+        if skip and skip(lecture):
+            return lecture, title, None
+        info = ydl.process_ie_result(info, download=True)
+
+    # Resolved entries share their page's URL; keep the media URL for those
+    record_source(lecture, item if isinstance(item, str) else info.get("url") or info["webpage_url"])
+    return lecture, title, info["requested_downloads"][0]["filepath"]
+
+
+def process_download(path):
+    """Raw audio → 16 kHz mono MP3 → transcript JSON → embeddings. Returns the chunk count."""
+    from preprocess_json_uploaded import embed_json_file
+    import shared_state
+
+    audio_path = subprocess.run(
+        [sys.executable, "video_to_audio.py", path],
+        capture_output=True, text=True, check=True
+    ).stdout.strip()
+    os.remove(path)
+
+    json_path = subprocess.run(
+        [sys.executable, "audio_to_json_uploaded.py", os.path.basename(audio_path)],
+        capture_output=True, text=True, check=True
+    ).stdout.strip()
+
+    count = embed_json_file(json_path)
+    shared_state.invalidate_lecture(os.path.splitext(os.path.basename(audio_path))[0])
+    return count
+
+
+def fetch_video(title, allow_files=False):
+    """Download the MP4 of an imported lecture for video playback (on demand). Returns its path."""
+    url = load_sources().get(title)
+    if url is None:
+        raise KeyError(f"No source URL recorded for '{title}'")
+    os.makedirs(VIDEOS_DIR, exist_ok=True)
+    opts = _ydl_opts(allow_files, format=VIDEO_FORMAT, noplaylist=True,
+                     merge_output_format="mp4", outtmpl=os.path.join(VIDEOS_DIR, f"{title}.%(ext)s"))
+    with yt_dlp.YoutubeDL(opts) as ydl:
+        info = ydl.extract_info(url, download=True)
+    return info["requested_downloads"][0]["filepath"]
+
+
+# ============================================================
+# PIPELINED BATCH INGEST
+# ============================================================
+
+def ingest(urls, skip=None, download_workers=DOWNLOAD_WORKERS, ingest_workers=INGEST_WORKERS,
+           process=process_download, allow_files=False):
+    """
+    Import videos, playlists and channels. Yields progress events as they happen:
+
+        {"type": "listed", "count"}
+        {"type": "downloaded", "lecture", "title", "url"}
+        {"type": "skipped", "lecture", "title", "url"}
+        {"type": "indexed", "lecture", "title", "chunks"}
+        {"type": "error", "stage", "url", "title", "message"}
+
+    Each item starts processing as soon as its download finishes, while the
+    remaining downloads continue in parallel. Closing the generator early
+    lets running downloads and processing finish, drops the queued ones and
+    deletes files downloaded but never processed.
+    """
+    items = []
+    for url in urls:
+        try:
+            items.extend(list_entries(url, allow_files=allow_files))
+        except Exception as e:
+            yield {"type": "error", "stage": "list", "url": url, "title": None, "message": str(e)}
+    yield {"type": "listed", "count": len(items)}
+    if not items:
+        return
+
+    events = queue.Queue()
+    pending = {"items": len(items)}
+    lock = threading.Lock()
+
+    def finish(event):
+        events.put(event)
+        with lock:
+            pending["items"] -= 1
+            done = pending["items"] == 0
+        if done:
+            events.put(None)
+
+    def run_process(lecture, title, path):
+        try:
+            finish({"type": "indexed", "lecture": lecture, "title": title, "chunks": process(path)})
+        except subprocess.CalledProcessError as e:
+            finish({"type": "error", "stage": "process", "url": None, "title": title,
+                    "message": (e.stderr or e.stdout or str(e)).strip()})
+        except Exception as e:
+            finish({"type": "error", "stage": "process", "url": None, "title": title, "message": str(e)})
+
+    closing = threading.Event()
+    queued = {}     # processing future -> the downloaded file it consumes
+    downloads = ThreadPoolExecutor(download_workers)
+    workers = ThreadPoolExecutor(ingest_workers)
+
+    def run_download(item):
+        url = item if isinstance(item, str) else item.get("webpage_url")
+        try:
+            lecture, title, path = download_audio(item, skip, allow_files)
+        except Exception as e:
+            finish({"type": "error", "stage": "download", "url": url, "title": None, "message": str(e)})
+            return
+        if path is None:
+            finish({"type": "skipped", "lecture": lecture, "title": title, "url": url})
+            return
+        if closing.is_set():
+            os.remove(path)
+            return
+        events.put({"type": "downloaded", "lecture": lecture, "title": title, "url": url})
+        with lock:
+            queued[workers.submit(run_process, lecture, title, path)] = path
+
+    try:
+        for item in items:
+            downloads.submit(run_download, item)
+
+        while True:
+            event = events.get()
+            if event is None:
+                break
+            yield event
+    finally:
+        # Downloads first: a running one may still hand its file to the workers
+        closing.set()
+        downloads.shutdown(cancel_futures=True)
+        workers.shutdown(cancel_futures=True)
+        for future, path in queued.items():
+            if future.cancelled() and os.path.exists(path):
+                os.remove(path)